@@ -0,0 +1,171 @@
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.dicts.unit_trained_from import UNIT_TRAINED_FROM
+from BuildListProcessorDicts import (
+    COMBAT_DATA,
+    CONVERT_TO_ID,
+    MORPHED_UNITS,
+    PRODUCTION_DATA
+)
+from MatchCoordinator import Winner
+
+# Definitions
+# ----------------------------------------
+
+# damage of an attack is reduced by armor but never below this
+MIN_DAMAGE = 0.5
+
+# matchups whose weaker army has at least this share of the stronger army's strength are close
+DEFAULT_CLOSE_RATIO = 0.5
+
+
+class BattleEstimate(NamedTuple):
+    """Predicted outcome of the final fight of a matchup.
+
+    strengthRatio is the strength of the weaker army divided by the strength
+    of the stronger one (1 is an even fight). survivingValue is the
+    resource value (minerals plus vespene) of the winner's survivors.
+    """
+    winner: Winner
+    survivingValue: float
+    strengthRatio: float
+
+
+def getArmyComposition(buildList: List[str]) -> Dict[UnitTypeId, int]:
+    """Army units that exist once a build list is done (the units that attack).
+
+    Morphs replace the unit they are morphed from, a zergling task produces
+    two zerglings.
+    """
+    composition: Dict[UnitTypeId, int] = dict()
+    for taskName in buildList:
+        unitId: UnitTypeId = CONVERT_TO_ID[taskName]
+        if unitId not in COMBAT_DATA:
+            continue
+        if unitId in MORPHED_UNITS:
+            for producerId in UNIT_TRAINED_FROM.get(unitId, ()):
+                if composition.get(producerId, 0) > 0:
+                    composition[producerId] -= 1
+                    break
+        composition[unitId] = composition.get(unitId, 0) + (2 if unitId == UnitTypeId.ZERGLING else 1)
+    return {unitId: count for unitId, count in composition.items() if count > 0}
+
+
+def getUnitValue(unitId: UnitTypeId):
+    """Minerals plus vespene spent on a unit, including the unit it was morphed from.
+    """
+    data = PRODUCTION_DATA[unitId]
+    value = data.minerals + data.vespene
+    if unitId == UnitTypeId.ZERGLING:
+        # the cost is for a pair
+        value /= 2.0
+    if unitId in MORPHED_UNITS:
+        producers = [producerId for producerId in UNIT_TRAINED_FROM.get(unitId, ()) if producerId in PRODUCTION_DATA]
+        if producers:
+            value += getUnitValue(producers[0])
+    return value
+
+# Class
+# ----------------------------------------
+
+class BattleEstimator:
+    """Lanchester square law estimate of army against army fights.
+
+    The strength of an army is its total damage per second against the
+    other army times its total hit points. The stronger army wins and keeps
+    sqrt(1 - weaker / stronger) of its units. Damage is spread over the
+    other army by hit points, so units that can only hit air or ground lose
+    damage against a mixed army. Ignores bonus damage, splash, spells,
+    range and upgrades; it is meant to sort out lopsided matchups, not to
+    replace the game.
+
+    Armies are rows of unit counts (one column per unit of COMBAT_DATA) so
+    any number of fights is estimated at once.
+    """
+
+    def __init__(self):
+        self.unitIds: List[UnitTypeId] = list(COMBAT_DATA)
+        self.columns: Dict[UnitTypeId, int] = {unitId: column for column, unitId in enumerate(self.unitIds)}
+        combatData = [COMBAT_DATA[unitId] for unitId in self.unitIds]
+        self.hitPoints = np.array([data.hitPoints for data in combatData], dtype=np.float64)
+        self.values = np.array([getUnitValue(unitId) for unitId in self.unitIds], dtype=np.float64)
+
+        # damage per second of every unit (rows) against every unit (columns)
+        self.damagePerSecond = np.zeros((len(self.unitIds), len(self.unitIds)), dtype=np.float64)
+        for row, attacker in enumerate(combatData):
+            for column, target in enumerate(combatData):
+                damage, attacks = (attacker.airDamage, attacker.airAttacks) if target.isAir else (attacker.groundDamage, attacker.groundAttacks)
+                if attacks > 0:
+                    self.damagePerSecond[row, column] = attacks * max(MIN_DAMAGE, damage - target.armor) / attacker.cooldown
+
+    def toRow(self, composition: Dict[UnitTypeId, int]) -> np.ndarray:
+        """Unit counts of an army as a row.
+        """
+        row = np.zeros(len(self.unitIds), dtype=np.float64)
+        for unitId, count in composition.items():
+            row[self.columns[unitId]] = count
+        return row
+
+    def estimateArrays(self, armiesOne: np.ndarray, armiesTwo: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Estimate many fights at once.
+
+        Returns arrays with the winner (1 for army one, 2 for army two, 0 for
+        a tie), the surviving value and the strength ratio of every fight.
+        """
+        hitPointsOne = armiesOne * self.hitPoints
+        hitPointsTwo = armiesTwo * self.hitPoints
+        totalOne = hitPointsOne.sum(axis=1)
+        totalTwo = hitPointsTwo.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # share of the hit points of the other army every unit type has
+            targetsOne = np.nan_to_num(hitPointsTwo / totalTwo[:, None])
+            targetsTwo = np.nan_to_num(hitPointsOne / totalOne[:, None])
+        damageOne = ((armiesOne @ self.damagePerSecond) * targetsOne).sum(axis=1)
+        damageTwo = ((armiesTwo @ self.damagePerSecond) * targetsTwo).sum(axis=1)
+
+        # an army that is there beats one that is not
+        strengthOne = np.where(totalTwo == 0, totalOne, damageOne * totalOne)
+        strengthTwo = np.where(totalOne == 0, totalTwo, damageTwo * totalTwo)
+        stronger = np.maximum(strengthOne, strengthTwo)
+        weaker = np.minimum(strengthOne, strengthTwo)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ratio = np.where(stronger > 0, weaker / stronger, 1.0)
+
+        winners = np.where(strengthOne > strengthTwo, 1, np.where(strengthTwo > strengthOne, 2, 0))
+        survivingShare = np.sqrt(np.clip(1.0 - ratio, 0.0, 1.0))
+        winnerValue = np.where(winners == 1, armiesOne @ self.values, armiesTwo @ self.values)
+        survivingValue = np.where(winners == 0, 0.0, survivingShare * winnerValue)
+        return (winners, survivingValue, ratio)
+
+    def estimate(self, armyOne: Dict[UnitTypeId, int], armyTwo: Dict[UnitTypeId, int]) -> BattleEstimate:
+        """Estimate a single fight.
+        """
+        winners, survivingValue, ratio = self.estimateArrays(self.toRow(armyOne)[None, :], self.toRow(armyTwo)[None, :])
+        return BattleEstimate(self.toWinner(winners[0]), float(survivingValue[0]), float(ratio[0]))
+
+    def estimateBuildLists(self, buildListPairs: List[Tuple[List[str], List[str]]]) -> List[BattleEstimate]:
+        """Estimate the final fights of many pairs of build lists (player one first).
+        """
+        armiesOne = np.array([self.toRow(getArmyComposition(pair[0])) for pair in buildListPairs]).reshape(-1, len(self.unitIds))
+        armiesTwo = np.array([self.toRow(getArmyComposition(pair[1])) for pair in buildListPairs]).reshape(-1, len(self.unitIds))
+        winners, survivingValue, ratio = self.estimateArrays(armiesOne, armiesTwo)
+        return [BattleEstimate(self.toWinner(winners[index]), float(survivingValue[index]), float(ratio[index])) for index in range(len(buildListPairs))]
+
+    def toWinner(self, winner: int):
+        """Winner of an estimate (UNKNOWN for a tie).
+        """
+        if winner == 1:
+            return Winner.PLAYER_ONE
+        if winner == 2:
+            return Winner.PLAYER_TWO
+        return Winner.UNKNOWN
+
+
+def selectCloseMatchups(buildListPairs: List[Tuple[List[str], List[str]]], closeRatio: float = DEFAULT_CLOSE_RATIO) -> List[int]:
+    """Indices of the pairs of build lists whose final fight is close enough to be played.
+    """
+    estimates = BattleEstimator().estimateBuildLists(buildListPairs)
+    return [index for index, estimate in enumerate(estimates) if estimate.strengthRatio >= closeRatio]
@@ -0,0 +1,164 @@
+import logging
+import os
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+from BuildListProcessorDicts import CONVERT_TO_ID
+
+# Definitions
+# ----------------------------------------
+
+# A file holds any number of named build lists:
+#
+#     [TenRoaches]
+#     @race = Zerg
+#     @description = roach timing
+#     Drone x2, Overlord
+#     SpawningPool
+#     Roach x10
+#
+# A list starts with its name in brackets, followed by its metadata lines
+# (@key = value) and its tasks. Tasks are separated by commas or line
+# breaks, "Name xN" stands for N times the task. Everything after a # is a
+# comment.
+
+# extension of build list files when a directory is loaded
+BUILD_LIST_EXTENSION = ".bl"
+
+# tasks written per line by writeBuildLists
+TASKS_PER_LINE = 8
+
+loggerBuildListFile = logging.getLogger("BuildListFile")
+
+
+class NamedBuildList(NamedTuple):
+    """A build list read from a file.
+    """
+    name: str
+    buildList: List[str]
+    metadata: Dict[str, str]
+    path: str
+    lineNumber: int
+
+
+# Encoding
+# ----------------------------------------
+
+def encodeBuildList(buildList: Iterable[str]) -> List[str]:
+    """Run-length encode a build list into tasks ("Marine x12").
+    """
+    tokens: List[str] = list()
+    previous = None
+    count = 0
+    for task in buildList:
+        if task == previous:
+            count += 1
+            continue
+        if previous is not None:
+            tokens.append(previous if count == 1 else previous + " x" + str(count))
+        previous = task
+        count = 1
+    if previous is not None:
+        tokens.append(previous if count == 1 else previous + " x" + str(count))
+    return tokens
+
+
+def writeBuildLists(path: str, buildLists: Iterable[NamedBuildList]):
+    """Write build lists to a file (replaces the file).
+    """
+    with open(path, "w") as file:
+        for entry in buildLists:
+            file.write("[" + entry.name + "]\n")
+            for key, value in entry.metadata.items():
+                file.write("@" + key + " = " + value + "\n")
+            tokens = encodeBuildList(entry.buildList)
+            for start in range(0, len(tokens), TASKS_PER_LINE):
+                file.write(", ".join(tokens[start:start + TASKS_PER_LINE]) + "\n")
+            file.write("\n")
+
+# Decoding
+# ----------------------------------------
+
+def parseTask(token: str, path: str, lineNumber: int) -> Tuple[str, int]:
+    """Split a task into its name and count and check the name.
+    """
+    name, separator, count = token.rpartition(" x")
+    if not separator or not count.isdigit():
+        name, count = token, "1"
+    name = name.strip()
+    if name not in CONVERT_TO_ID:
+        raise Exception(path + ":" + str(lineNumber) + ": " + name + " is not available in CONVERT_TO_ID!")
+    if int(count) < 1:
+        raise Exception(path + ":" + str(lineNumber) + ": Count of " + name + " must be at least one! Have: " + count)
+    return (name, int(count))
+
+
+def readBuildLists(path: str, skipInvalid: bool = False) -> Iterator[NamedBuildList]:
+    """Read the build lists of a file one at a time.
+
+    Only the list that is being read is kept in memory. Invalid lists raise
+    an exception, or are logged and skipped if skipInvalid is set.
+    """
+    name = None
+    buildList: List[str] = list()
+    metadata: Dict[str, str] = dict()
+    startLine = 0
+    invalid = False
+    with open(path, "r") as file:
+        for lineNumber, line in enumerate(file, 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            if line.startswith("[") and line.endswith("]"):
+                if name is not None and not invalid:
+                    yield NamedBuildList(name, buildList, metadata, path, startLine)
+                name = line[1:-1].strip()
+                buildList = list()
+                metadata = dict()
+                startLine = lineNumber
+                invalid = False
+                continue
+            if name is None:
+                raise Exception(path + ":" + str(lineNumber) + ": Tasks before the first build list name!")
+            if invalid:
+                continue
+            try:
+                if line.startswith("@"):
+                    key, separator, value = line[1:].partition("=")
+                    if not separator:
+                        raise Exception(path + ":" + str(lineNumber) + ": Metadata needs the form @key = value!")
+                    metadata[key.strip()] = value.strip()
+                    continue
+                for token in line.split(","):
+                    if token.strip():
+                        taskName, count = parseTask(token.strip(), path, lineNumber)
+                        buildList.extend([taskName] * count)
+            except Exception as error:
+                if not skipInvalid:
+                    raise
+                loggerBuildListFile.warning("Skipping build list " + name + ": " + str(error))
+                invalid = True
+    if name is not None and not invalid:
+        yield NamedBuildList(name, buildList, metadata, path, startLine)
+
+
+def readCorpus(paths: Iterable[str], skipInvalid: bool = False) -> Iterator[NamedBuildList]:
+    """Read the build lists of many files one at a time.
+
+    A directory stands for all build list files in it (sorted by name).
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(os.path.join(path, fileName) for fileName in os.listdir(path) if fileName.endswith(BUILD_LIST_EXTENSION))
+        else:
+            files = [path]
+        for filePath in files:
+            yield from readBuildLists(filePath, skipInvalid)
+
+
+def loadBuildList(path: str, name: str) -> List[str]:
+    """Read a single build list by name.
+    """
+    for entry in readBuildLists(path):
+        if entry.name == name:
+            return entry.buildList
+    raise Exception("There is no build list " + name + " in " + path + "!")
@@ -1,8 +1,9 @@
+import asyncio
 import logging
 import math
-from typing import Union, Dict, Set
-from enum import Enum
-import threading
+from typing import Union, Dict, List, NamedTuple, Set, Tuple
+
+import numpy as np
 
 import sc2
 from sc2 import run_game, maps, Race, Difficulty
@@ -29,39 +30,92 @@ from sc2.constants import (
 )
 from BuildListProcessorDicts import (
     BASE_BUILDINGS,
+    COMBAT_DATA,
     CONVERT_TO_ID,
+    MORPHED_UNITS,
+    PRODUCTION_DATA,
     StartLocation
 )
+from GameDefinitions import (
+    GAME_LOOPS_PER_SECOND,
+    MAX_VESPENE_WORKER_RATIO,
+    race_supplyUnit
+)
+from MatchCoordinator import (
+    MatchCoordinator,
+    Player,
+    Winner
+)
+from WorkerDistribution import (
+    SITE_RADIUS,
+    distanceMatrix,
+    minCostAssignment,
+    closestPerRow
+)
+from ResourceIndex import ResourceIndex
+from ProducerIndex import ProducerIndex
+from TaskPlan import (
+    DEFAULT_LOOKAHEAD_DEPTH,
+    PlannedTask,
+    TaskPlan,
+    compileTaskPlan
+)
+from StepProfiler import StepProfiler
+from UnitDataTable import ensureUnitDataTable
+from FrameScheduler import FrameScheduler
+from IncomeEstimator import IncomeEstimator
+from MapAnalysis import MapAnalysisCache, classifyStartLocation
+from BattleEstimator import getUnitValue
 
 # Definitions
 # ----------------------------------------
 
 
-race_supplyUnit: Dict[Race, UnitTypeId] = {
-    Race.Protoss: UnitTypeId.PYLON,
-    Race.Terran: UnitTypeId.SUPPLYDEPOT,
-    Race.Zerg: UnitTypeId.OVERLORD,
-}
-
-
 raceBasicTownhall = {
     Race.Terran: UnitTypeId.COMMANDCENTER,
     Race.Zerg: UnitTypeId.HATCHERY,
     Race.Protoss: UnitTypeId.NEXUS
 }
 
-class Player(Enum):
-    """A way of differentiating players.
+# sections of the on_step pipeline timed by the step profiler (missing ones are skipped)
+PROFILED_SECTIONS = [
+    "on_step",
+    "onStepBase",
+    "checkPreconditions",
+    "myWorkerDistribution",
+    "terranOnStep",
+    "zergOnStep"
+]
+
+# movement speed of units is given per second on normal game speed (16 game loops)
+GAME_LOOPS_PER_NORMAL_SECOND = 16.0
+
+# a cost reservation is dropped if its structure was not started after this many game loops
+RESERVATION_TIMEOUT_LOOPS = 1000
+
+# resources spent on every army unit, compared by the early stop policy
+ARMY_UNIT_VALUES: Dict[UnitTypeId, float] = {unitId: getUnitValue(unitId) for unitId in COMBAT_DATA}
+
+
+class CostReservation(NamedTuple):
+    """Costs of a structure a worker was sent to build.
+
+    The game only subtracts the costs once the worker starts the structure
+    so they are reserved until then.
     """
-    PLAYER_ONE = 1,
-    PLAYER_TWO = 2,
+    unitId: UnitTypeId
+    minerals: int
+    vespene: int
+    orderedLoop: int
+
 
-class Winner(Enum):
-    """A way of differentiating winners.
+class WorkerPreposition(NamedTuple):
+    """A worker sent ahead to the build location of a structure that is not affordable yet.
     """
-    PLAYER_ONE = 1,
-    PLAYER_TWO = 2,
-    UNKNOWN = 3
+    workerTag: int
+    location: Point2
+    orderedLoop: int
+    travelLoops: float
 
 # Class
 # ----------------------------------------
@@ -77,14 +131,31 @@ class BuildListProcessBotBase(sc2.BotAI):
     # Constructor
     # ----------------------------------------
 
-    def __init__(self, inputBuildList, player: Player):
+    def __init__(self, inputBuildList, player: Player, coordinator: MatchCoordinator, profilePath: str = None, lookAheadDepth: int = DEFAULT_LOOKAHEAD_DEPTH, prepositionWorkers: bool = True, taskPlan: TaskPlan = None):
         """Initialize the bot.
         
         Provide a buildlist as a list of build tasks. Strings must be
         written as in CONVERT_TO_ID from BuildListProcessorDicts.py.
 
-        Player param must be either player one or player two.
+        Player param must be either player one or player two. Both bots of
+        a match must be given the same coordinator.
+
+        If a profile path is given the on_step pipeline is timed and the
+        latency histograms are written to that path as JSON at match end.
+
+        The look-ahead depth is the number of build list tasks that may be
+        dispatched out of order (see processTaskWindow).
+
+        If prepositionWorkers is set workers are sent to the build location
+        of a structure before it is affordable (see prepositionWorkerForCurrentTask).
+
+        A task plan compiled before the match (see compileTaskPlanFromData)
+        is used instead of compiling the build list at on_start.
         """
+        if lookAheadDepth < 1:
+            raise Exception("Look-ahead depth must be at least one! Have: " + str(lookAheadDepth))
+        if taskPlan is not None and [task.name for task in taskPlan] != list(inputBuildList):
+            raise Exception("Task plan does not match the build list!")
         # player as string
         self.playerString = "UNKNOWN"
         if player == Player.PLAYER_ONE:
@@ -95,42 +166,79 @@ class BuildListProcessBotBase(sc2.BotAI):
         self.loggerBase = logging.getLogger("BuildListProcessBotBase" + self.playerString)
         # player
         self.player: Player = player
-        # start locations of both players
-        BuildListProcessBotBase.PLAYER_ONE_START_LOCATION: StartLocation = StartLocation.UNKNOWN
-        BuildListProcessBotBase.PLAYER_TWO_START_LOCATION: StartLocation = StartLocation.UNKNOWN
+        # communication between bots (shared by both bots of a match)
+        self.coordinator: MatchCoordinator = coordinator
         # my start location
         self.startLocation: StartLocation = StartLocation.UNKNOWN
-        # communication between bots
-        # will be set when player one has set his start location
-        BuildListProcessBotBase.PLAYER_ONE_START_LOCATION_EVENT: threading.Event = threading.Event()
-        # will be set when player two has set his start location
-        BuildListProcessBotBase.PLAYER_TWO_START_LOCATION_EVENT: threading.Event = threading.Event()
-        # expansion locations (different datastructures for computing the expansion locations)
+        # expansion locations (computed once per map and stored on disk)
         self.expansionLocationsComputed = False
-        self.bottomExpansions = list()
-        self.topExpansions = list()
-        self.leftExpansions = list()
-        self.rightExpansions = list()
-        BuildListProcessBotBase.PLAYER_ONE_EXPANSION_LOCATIONS = list()
-        BuildListProcessBotBase.PLAYER_TWO_EXPANSION_LOCATIONS = list()
+        self.mapAnalysisCache = MapAnalysisCache()
         self.expansionLocations = list()
         # build list
         self.buildList = inputBuildList
         self.currentTask = UnitTypeId.NOTAUNIT
+        # compiled build list (see TaskPlan.py), available after on_start unless given
+        self.taskPlan: TaskPlan = taskPlan if taskPlan is not None else tuple()
+        self.taskPlanGiven = taskPlan is not None
+        self.nextTaskIndex = 0
+        self.currentPlannedTask: PlannedTask = None
+        # tasks taken from the plan that were not dispatched yet (in build list order)
+        self.lookAheadDepth = lookAheadDepth
+        self.taskWindow: List[PlannedTask] = list()
+        # true while a task behind a waiting task is processed (must not raise)
+        self.lookingAhead = False
+        # index of the processed task in the window
+        self.currentTaskWindowIndex = 0
+        # number of identical tasks following the processed task that were dispatched together with it
+        self.batchedTasks = 0
+        # costs and supply of the waiting tasks in front of the processed task (supply also of the dispatched ones)
+        self.windowReservedMinerals = 0
+        self.windowReservedVespene = 0
+        self.windowReservedSupply = 0
+        # supply of the tasks dispatched in this step (training does not lower supply_left within a step)
+        self.dispatchedSupply = 0
         self.done = False
         self.remainingBuildTasks = dict()
-
-        # gas building locations
-        self.occupiedGeysers = set()
+        # number of units and structures in remainingBuildTasks that were not created yet (without workers)
+        self.outstandingBuildTasks = 0
+        # types counted for each unit or structure that still exists (more than one if it was morphed)
+        self.countedTypesByTag: Dict[int, List[UnitTypeId]] = dict()
+        # iteration at which the build list was completed (-1 if never)
+        self.buildListCompletedIteration = -1
+        # costs of structures that workers were sent to build but did not start yet
+        self.costReservations: List[CostReservation] = list()
+        # income per game loop from the collected resources
+        self.incomeEstimator = IncomeEstimator()
+        # game loop at which the current task is predicted to be affordable (None if unknown)
+        self.currentTaskWakeLoop = None
+        # workers sent ahead to build locations by structure type
+        self.prepositionWorkers = prepositionWorkers
+        self.prepositions: Dict[UnitTypeId, WorkerPreposition] = dict()
+        # game loops saved by every pre-positioned worker
+        self.prepositionSavedLoops: List[float] = list()
+
+        # runs the subsystems of the on_step pipeline (registered in on_start)
+        self.scheduler = FrameScheduler()
+
+        # mineral fields and geysers (including occupancy) per base, built in on_start
+        self.resourceIndex: ResourceIndex = None
+        # own units and structures by type, kept up to date by the unit events
+        self.producerIndex = ProducerIndex()
 
         # attacking
         self.attacking = False
-        BuildListProcessBotBase.PLAYER_ONE_READY_TO_ATTACK = False
-        BuildListProcessBotBase.PLAYER_TWO_READY_TO_ATTACK = False
         self.attackDone = False
-        BuildListProcessBotBase.PLAYER_ONE_ARMY_COUNT = -1
-        BuildListProcessBotBase.PLAYER_TWO_ARMY_COUNT = -1
-        BuildListProcessBotBase.WINNER: Winner = Winner.UNKNOWN
+        self.surrendering = False
+        self.leftGame = False
+        # tasks waiting for events of the coordinator
+        self.watchers = list()
+
+        # step profiling (sections are only wrapped if enabled)
+        self.profilePath = profilePath
+        self.profiler: StepProfiler = None
+        if profilePath is not None:
+            self.profiler = StepProfiler()
+            self.profiler.instrument(self, PROFILED_SECTIONS)
 
 
     # Startup Preparation
@@ -140,305 +248,59 @@ class BuildListProcessBotBase(sc2.BotAI):
         """Derive start location from coordinates.
 
         Sets the bots start location (enum StartLocation in BuildListProcesserDicts.py)
-        based on the start location coordinates.
+        based on the quadrant of the map the start location is in.
         """
-        if (self.game_info.player_start_location.x == 24.5):
-            # left side of map
-            if (self.game_info.player_start_location.y == 22.5):
-                self.startLocation = StartLocation.BOTTOM_LEFT
-            else:
-                self.startLocation = StartLocation.TOP_LEFT
-        else:
-            # right side of map
-            if (self.game_info.player_start_location.y == 22.5):
-                self.startLocation = StartLocation.BOTTOM_RIGHT
-            else:
-                self.startLocation = StartLocation.TOP_RIGHT
+        self.startLocation = self.getCorrespondingStartLocation(self.game_info.player_start_location)
         
         self.loggerBase.info("Start location is " + str(self.startLocation))
 
-        if self.player == Player.PLAYER_ONE:
-            BuildListProcessBotBase.PLAYER_ONE_START_LOCATION = self.startLocation
-        else:
-            BuildListProcessBotBase.PLAYER_TWO_START_LOCATION = self.startLocation
+        self.coordinator.publishStartLocation(self.player, self.startLocation)
 
     def getCorrespondingStartLocation(self, point: Point2):
         """For a point get the start location.
         """
-        if (point[0] == 24.5):
-            # left side of map
-            if (point[1] == 22.5):
-                return StartLocation.BOTTOM_LEFT
-            else:
-                return StartLocation.TOP_LEFT
-        else:
-            # right side of map
-            if (point[1] == 22.5):
-                return StartLocation.BOTTOM_RIGHT
-            else:
-                return StartLocation.TOP_RIGHT
+        return classifyStartLocation(Point2(point), self.game_info.map_center)
 
     def getLocationFromStartLocation(self, startLocation: StartLocation):
         """Return the coordinates for a start location.
         
         Counterpart to getCorrespondingStartLocation().
         """
-        if startLocation == StartLocation.BOTTOM_LEFT:
-            return Point2((24.5, 22.5))
-        if startLocation == StartLocation.BOTTOM_RIGHT:
-            return Point2((127.5, 22.5))
-        if startLocation == StartLocation.TOP_RIGHT:
-            return Point2((127.5, 125.5))
-        if startLocation == StartLocation.TOP_LEFT:
-            return Point2((24.5, 125.5))
+        for location in self.game_info.start_locations + [self.game_info.player_start_location]:
+            if self.getCorrespondingStartLocation(location) == startLocation:
+                return location
         raise Exception("Location is not a start location! " + str(startLocation))
 
-    def findNextExpansion(self, current: Point2, ccwDirection: bool):
-        """Get the next expansion in a certain direction.
-
-        Only works on simple map. This is used in determining the expansions for
-        each bot on the map.
-        """
-        if current in self.game_info.start_locations + [self.game_info.player_start_location]:
-            # first need to check if current is one of the start locations
-            # "corners of map"
-            correspondingStartLocation = self.getCorrespondingStartLocation(current)
-            if (correspondingStartLocation == StartLocation.UNKNOWN):
-                raise Exception("Could not find start location for " + str(current))
-            if ccwDirection:
-                if correspondingStartLocation == StartLocation.BOTTOM_LEFT:
-                    return self.bottomExpansions[1] # they are sorted from low to high x so this is fine
-                if correspondingStartLocation == StartLocation.BOTTOM_RIGHT:
-                    return self.rightExpansions[1]
-                if correspondingStartLocation == StartLocation.TOP_RIGHT:
-                    return self.topExpansions[len(self.topExpansions) - 2]
-                if correspondingStartLocation == StartLocation.TOP_LEFT:
-                    return self.leftExpansions[len(self.leftExpansions) - 2]
-            else:
-                # cw direction
-                if correspondingStartLocation == StartLocation.BOTTOM_LEFT:
-                    return self.leftExpansions[1]
-                if correspondingStartLocation == StartLocation.BOTTOM_RIGHT:
-                    return self.bottomExpansions[len(self.bottomExpansions) - 2]
-                if correspondingStartLocation == StartLocation.TOP_RIGHT:
-                    return self.rightExpansions[len(self.rightExpansions) - 2]
-                if correspondingStartLocation == StartLocation.TOP_LEFT:
-                    return self.topExpansions[1]
-        else:
-            # not in one of the corners
-            if current in self.bottomExpansions:
-                index = self.bottomExpansions.index(current)
-                if ccwDirection:
-                    # go right
-                    return self.bottomExpansions[index+1]
-                else:
-                    # go left
-                    return self.bottomExpansions[index-1]
-            if current in self.rightExpansions:
-                index = self.rightExpansions.index(current)
-                if ccwDirection:
-                    return self.rightExpansions[index+1]
-                else:
-                    return self.rightExpansions[index-1]
-            if current in self.topExpansions:
-                index = self.topExpansions.index(current)
-                if ccwDirection:
-                    return self.topExpansions[index-1]
-                else:
-                    return self.topExpansions[index+1]
-            if current in self.leftExpansions:
-                index = self.leftExpansions.index(current)
-                if ccwDirection:
-                    return self.leftExpansions[index-1]
-                else:
-                    return self.leftExpansions[index+1]
-
     def computeExpansionLocations(self):
         """Computes expansion locations.
         
-        Only works on simple map. This is used in determining the expansions for
-        each bot on the map."""
-        possibleExpansionLocations = set()
-
-        # add all expansions including player start locations to the set
-        for expansionLocation in self.expansion_locations_list:
-            possibleExpansionLocations.add(expansionLocation)
-
-        for expansionLocation in possibleExpansionLocations:
-            # the bottom row of expansions is roughly at 22.5
-            # use a threshhold to ensure every single one is in
-            if abs(expansionLocation[1] - 22.5) < 2.0: 
-                self.bottomExpansions.append(expansionLocation)
-        self.bottomExpansions.sort(key=lambda x: x[0])
-
-        for expansionLocation in possibleExpansionLocations:
-            # the top row of expansions is roughly at 125.5
-            # use a threshhold to ensure every single one is in
-            if abs(expansionLocation[1] - 125.5) < 2.0: 
-                self.topExpansions.append(expansionLocation)
-        self.topExpansions.sort(key=lambda x: x[0])
-
-        for expansionLocation in possibleExpansionLocations:
-            # the left column of expansions is roughly at 24.5
-            # use a threshhold to ensure every single one is in
-            if abs(expansionLocation[0] - 24.5) < 2.0: 
-                self.leftExpansions.append(expansionLocation)
-        self.leftExpansions.sort(key=lambda x: x[1])
-
-        for expansionLocation in possibleExpansionLocations:
-            # the right column of expansions is roughly at 24.5
-            # use a threshhold to ensure every single one is in
-            if abs(expansionLocation[0] - 127.5) < 2.0: 
-                self.rightExpansions.append(expansionLocation)
-        self.rightExpansions.sort(key=lambda x: x[1])
-
-        # there is always two directions in which we could go to find expansions:
-        # in ccw and in cw direction
-        # we always prefer ccw direction but alternate between the two to stay close to our main
-
-        # my side:
-        # --------------------
-
-        playerOnePreferredExpansionCCWDirection = list()
-        playerOnePreferredExpansionCWDirection = list()
-
-        currentCCW: Point2 = self.getLocationFromStartLocation(BuildListProcessBotBase.PLAYER_ONE_START_LOCATION)
-        currentCW: Point2 = currentCCW
-
-        currentCCW = self.findNextExpansion(currentCCW, True)
-        currentCW = self.findNextExpansion(currentCW, False)
-
-        while currentCW != currentCCW:
-            # store
-            playerOnePreferredExpansionCCWDirection.append(currentCCW)
-            playerOnePreferredExpansionCWDirection.append(currentCW)
-            # advance
-            currentCCW = self.findNextExpansion(currentCCW, True)
-            currentCW = self.findNextExpansion(currentCW, False)
-        
-        # append one last time
-        playerOnePreferredExpansionCCWDirection.append(currentCCW)
-        playerOnePreferredExpansionCWDirection.append(currentCW)
-
-        # opponents side side:
-        # --------------------
-
-        playerTwoPreferredExpansionCCWDirection = list()
-        playerTwoPreferredExpansionCWDirection = list()
-
-        currentCCW: Point2 = self.getLocationFromStartLocation(BuildListProcessBotBase.PLAYER_TWO_START_LOCATION)
-        currentCW: Point2 = currentCCW
-
-        currentCCW = self.findNextExpansion(currentCCW, True)
-        currentCW = self.findNextExpansion(currentCW, False)
-
-        while currentCW != currentCCW:
-            # store
-            playerTwoPreferredExpansionCCWDirection.append(currentCCW)
-            playerTwoPreferredExpansionCWDirection.append(currentCW)
-            # advance
-            currentCCW = self.findNextExpansion(currentCCW, True)
-            currentCW = self.findNextExpansion(currentCW, False)
-        
-        # append one last time
-        playerTwoPreferredExpansionCCWDirection.append(currentCCW)
-        playerTwoPreferredExpansionCWDirection.append(currentCW)
-
-        # now of both players the preferences of expansions in both possible directions are known
-        
-        # remove both start locations from possibleExpansionLocations
-        possibleExpansionLocations.remove(self.getLocationFromStartLocation(BuildListProcessBotBase.PLAYER_ONE_START_LOCATION))
-        possibleExpansionLocations.remove(self.getLocationFromStartLocation(BuildListProcessBotBase.PLAYER_TWO_START_LOCATION))
-
-        playerOneExpansionLocations = list()
-        playerTwoExpansionLocations = list()
-
-        # ccw direction is always taken first
-        ccwRoundPlayerOne = True
-        ccwRoundPlayerTwo = True
-        while bool(possibleExpansionLocations):
-            # player one goes first
-            if ccwRoundPlayerOne:  
-                playerOneSelectedExpansion = playerOnePreferredExpansionCCWDirection.pop(0)
-                if playerOneSelectedExpansion in possibleExpansionLocations:
-                    playerOneExpansionLocations.append(playerOneSelectedExpansion)
-                    possibleExpansionLocations.remove(playerOneSelectedExpansion)
-                    ccwRoundPlayerOne = False
-                else:
-                    playerOneSelectedExpansion = playerOnePreferredExpansionCWDirection.pop(0)
-                    if playerOneSelectedExpansion in possibleExpansionLocations:
-                        playerOneExpansionLocations.append(playerOneSelectedExpansion)
-                        possibleExpansionLocations.remove(playerOneSelectedExpansion)
-                        ccwRoundPlayerOne = True
-                    else:
-                        raise Exception("There are no expansion locations left for player one even though there is still locations available!")
-            else:
-                playerOneSelectedExpansion = playerOnePreferredExpansionCWDirection.pop(0)
-                if playerOneSelectedExpansion in possibleExpansionLocations:
-                    playerOneExpansionLocations.append(playerOneSelectedExpansion)
-                    possibleExpansionLocations.remove(playerOneSelectedExpansion)
-                    ccwRoundPlayerOne = True
-                else:
-                    playerOneSelectedExpansion = playerOnePreferredExpansionCCWDirection.pop(0)
-                    if playerOneSelectedExpansion in possibleExpansionLocations:
-                        playerOneExpansionLocations.append(playerOneSelectedExpansion)
-                        possibleExpansionLocations.remove(playerOneSelectedExpansion)
-                        ccwRoundPlayerOne = False
-                    else:
-                        raise Exception("There are no expansion locations left for player one even though there is still locations available!")
-            # player two goes second
-            if ccwRoundPlayerTwo:
-                playerTwoSelectedExpansion = playerTwoPreferredExpansionCCWDirection.pop(0)
-                if playerTwoSelectedExpansion in possibleExpansionLocations:
-                    playerTwoExpansionLocations.append(playerTwoSelectedExpansion)
-                    possibleExpansionLocations.remove(playerTwoSelectedExpansion)
-                    ccwRoundPlayerTwo = False
-                else:
-                    playerTwoSelectedExpansion = playerTwoPreferredExpansionCWDirection.pop(0)
-                    if playerTwoSelectedExpansion in possibleExpansionLocations:
-                        playerTwoExpansionLocations.append(playerTwoSelectedExpansion)
-                        possibleExpansionLocations.remove(playerTwoSelectedExpansion)
-                        ccwRoundPlayerTwo = True
-                    else:
-                        raise Exception("There are no expansion locations left for player one even though there is still locations available!")
-            else:
-                playerTwoSelectedExpansion = playerTwoPreferredExpansionCWDirection.pop(0)
-                if playerTwoSelectedExpansion in possibleExpansionLocations:
-                    playerTwoExpansionLocations.append(playerTwoSelectedExpansion)
-                    possibleExpansionLocations.remove(playerTwoSelectedExpansion)
-                    ccwRoundPlayerTwo = False
-                else:
-                    playerTwoSelectedExpansion = playerTwoPreferredExpansionCCWDirection.pop(0)
-                    if playerTwoSelectedExpansion in possibleExpansionLocations:
-                        playerTwoExpansionLocations.append(playerTwoSelectedExpansion)
-                        possibleExpansionLocations.remove(playerTwoSelectedExpansion)
-                        ccwRoundPlayerTwo = True
-                    else:
-                        raise Exception("There are no expansion locations left for player one even though there is still locations available!")
-
-        
-        
-        
-
-
-        BuildListProcessBotBase.PLAYER_ONE_EXPANSION_LOCATIONS = playerOneExpansionLocations
-        BuildListProcessBotBase.PLAYER_TWO_EXPANSION_LOCATIONS = playerTwoExpansionLocations   
-
-        return
+        Both players take the expansions in turns, starting with the ones
+        with the shortest walking distance from their start location. The
+        result is cached per map (see MapAnalysis.py).
+        """
+        # townhall spots are placeable but may be covered by the start townhalls in the pathing grid
+        pathable = (self.game_info.pathing_grid.data_numpy != 0) | (self.game_info.placement_grid.data_numpy != 0)
+        playerOneExpansionLocations, playerTwoExpansionLocations = self.mapAnalysisCache.getExpansionOrders(
+            self.game_info.map_name,
+            self.expansion_locations_list,
+            pathable,
+            self.getLocationFromStartLocation(self.coordinator.playerOneStartLocation),
+            self.getLocationFromStartLocation(self.coordinator.playerTwoStartLocation)
+        )
+        self.coordinator.publishExpansionLocations(playerOneExpansionLocations, playerTwoExpansionLocations)
 
     def fillExpansionLocations(self):
         """Wrapper for calling computeExpansionLocations() and doing some logging.
 
-        Only works on simple map. This is used in determining the expansions for
-        each bot on the map.
+        This is used in determining the expansions for each bot on the map.
         """
-        assert(BuildListProcessBotBase.PLAYER_TWO_START_LOCATION != StartLocation.UNKNOWN)
-        assert(BuildListProcessBotBase.PLAYER_ONE_START_LOCATION != StartLocation.UNKNOWN)
+        assert(self.coordinator.playerTwoStartLocation != StartLocation.UNKNOWN)
+        assert(self.coordinator.playerOneStartLocation != StartLocation.UNKNOWN)
         # compute expansions
         self.loggerBase.info("Computing expansion locations...")
         self.computeExpansionLocations()
-        self.loggerBase.info("Player one expansion locations: " + str(BuildListProcessBotBase.PLAYER_ONE_EXPANSION_LOCATIONS))
-        self.loggerBase.info("Player two expansion locations: " + str(BuildListProcessBotBase.PLAYER_TWO_EXPANSION_LOCATIONS))
+        self.loggerBase.info("Player one expansion locations: " + str(self.coordinator.playerOneExpansionLocations))
+        self.loggerBase.info("Player two expansion locations: " + str(self.coordinator.playerTwoExpansionLocations))
     
     def onStartBase(self):
         """ Call this from implementing bot in on_start().
@@ -450,30 +312,255 @@ class BuildListProcessBotBase(sc2.BotAI):
         self.setSelfStartLocation()
         self.loggerBase.info("Available start locations: " + str(self.game_info.start_locations))
         self.scanBuildList()
+        self.resourceIndex = ResourceIndex(self.expansion_locations_dict)
+        for unit in self.all_own_units:
+            self.producerIndex.add(unit.tag, unit.type_id)
+        if not self.taskPlanGiven:
+            self.taskPlan = compileTaskPlan(self, self.buildList)
         self.prepareBuildListCompletedCheck()
+        self.countOutstandingBuildTasks()
+        self.registerSubsystems()
+        # react to what the other bot publishes
+        self.watchers.append(asyncio.ensure_future(self.waitForExpansionLocations()))
+        self.watchers.append(asyncio.ensure_future(self.waitForAttack()))
+        self.watchers.append(asyncio.ensure_future(self.waitForArmyEliminated()))
+        # generate the unit data table again if the game version changed (both bots share the process)
+        if self.player == Player.PLAYER_ONE:
+            self.watchers.append(asyncio.ensure_future(ensureUnitDataTable(self)))
+
+    # Match Events
+    # ----------------------------------------
+
+    async def waitForExpansionLocations(self):
+        """Wait until the expansion locations of both players are known.
+
+        Player one computes them for both players as soon as both start
+        locations are published.
+        """
+        if self.player == Player.PLAYER_ONE:
+            await self.coordinator.startLocationsPublished.wait()
+            self.fillExpansionLocations()
+        await self.coordinator.expansionLocationsPublished.wait()
+
+        if self.player == Player.PLAYER_ONE:
+            self.expansionLocations = self.coordinator.playerOneExpansionLocations
+        else:
+            self.expansionLocations = self.coordinator.playerTwoExpansionLocations
+        self.expansionLocationsComputed = True
+        self.loggerBase.info("Expansion locations available at game loop: " + str(self.state.game_loop))
+
+    async def waitForAttack(self):
+        """Wait until both players are ready and then attack.
+
+        The orders are sent with the next step.
+        """
+        await self.coordinator.bothReadyToAttack.wait()
+        self.loggerBase.info("Attacking the map center with all available units!")
+        self.attackMapCenterWithArmy()
+        self.attackDone = True
+        self.coordinator.publishArmyCount(self.player, self.army_count)
+
+    async def waitForArmyEliminated(self):
+        """Wait until one of the armies is gone or the fight is decided and surrender if we lost.
+        """
+        await self.coordinator.armyEliminated.wait()
+        if self.player == Player.PLAYER_ONE and self.coordinator.winner == Winner.PLAYER_TWO:
+            self.loggerBase.info("Player one should surrender now!")
+            self.surrendering = True
+        if self.player == Player.PLAYER_TWO and self.coordinator.winner == Winner.PLAYER_ONE:
+            self.loggerBase.info("Player two should surrender now!")
+            self.surrendering = True
+
+    async def on_unit_destroyed(self, unit_tag: int):
+        """Publish the army count whenever a unit dies during the attack.
+
+        Also frees the geyser if the unit was a gas building. A unit that
+        dies before the build list is completed has to be created again.
+        """
+        for unitId in self.countedTypesByTag.pop(unit_tag, ()):
+            if self.buildListCompletedIteration == -1:
+                self.loggerBase.info("Counted " + str(unitId) + " was destroyed!")
+                self.restoreDestroyedUnit(unitId)
+        self.producerIndex.remove(unit_tag)
+        self.resourceIndex.gasBuildingDestroyed(unit_tag)
+        if self.attackDone:
+            self.coordinator.publishArmyCount(self.player, self.army_count)
+
+    async def on_end(self, game_result):
+        """Stop waiting for match events once the game is over.
+
+        Also writes the step profile if profiling is enabled.
+        """
+        for watcher in self.watchers:
+            watcher.cancel()
+        self.scheduler.logDeferrals()
+        if self.prepositionSavedLoops:
+            self.loggerBase.info("Pre-positioned workers saved " + str(round(sum(self.prepositionSavedLoops))) + " game loops over " + str(len(self.prepositionSavedLoops)) + " structures")
+        if self.profiler is not None:
+            self.profiler.dump(self.profilePath)
     
     # BuildList
     # ----------------------------------------
 
     def checkAndAdvance(self):
         """ Checks buildlist progress and advances it.
+
+        Fills the task window up to the look-ahead depth. The build list is
+        done once every task was dispatched.
         """
 
         if not self.done:
-            if self.currentTask == UnitTypeId.NOTAUNIT:
-                if len(self.buildList) > 0:
-                    # extract first build list element and set as current task
-                    nextTaskName = self.buildList.pop(0)
-                    self.currentTask = self.unitToId(nextTaskName)
-                    self.loggerBase.info("Beginning next task: " + nextTaskName + "(" + str(self.currentTask) + ")")
-                else:
-                    self.done = True
+            while len(self.taskWindow) < self.lookAheadDepth and self.nextTaskIndex < len(self.taskPlan):
+                # take the next planned task into the window
+                task: PlannedTask = self.taskPlan[self.nextTaskIndex]
+                self.nextTaskIndex += 1
+                self.taskWindow.append(task)
+                self.loggerBase.info("Beginning next task: " + task.name + "(" + str(task.unitId) + ")")
+            if not self.taskWindow:
+                self.done = True
+
+    def dependsOnWaitingTasks(self, task: PlannedTask, waitingTasks: List[PlannedTask]):
+        """Check if a task has to wait for tasks in front of it.
+
+        A task waits if it competes for a producer with a waiting task or if
+        it needs a producer or tech requirement that only a waiting task makes.
+        Costs do not make tasks dependent, they are reserved instead.
+        """
+        for waitingTask in waitingTasks:
+            if task.producerIds & waitingTask.producerIds:
+                return True
+            if waitingTask.unitId in task.producerIds and not self.getOwnUnitsOfTypes(task.producerIds):
+                return True
+            if waitingTask.unitId in task.requirementEquivalents and not self.getOwnUnitsOfTypes(task.requirementEquivalents):
+                return True
+        return False
+
+    def processTaskWindow(self):
+        """Dispatch every task of the window that can be built right now.
+
+        The first task behaves exactly as without look-ahead. Every task
+        behind a waiting task is only dispatched if it does not depend on a
+        waiting task and if it is affordable with the costs and supply of all
+        waiting tasks in front of it reserved. This keeps the order of the
+        build list for everything that depends on each other. The supply of
+        tasks dispatched in this step is reserved as well.
+
+        Returns the game loop at which the first waiting task is predicted
+        to become affordable if every waiting task only waits for resources
+        or supply (None otherwise).
+        """
+        waitingTasks: List[PlannedTask] = list()
+        # earliest predicted wake loop of the waiting tasks (None if one of them has to be checked again next step)
+        wakeLoop = math.inf
+        # identical tasks that were dispatched in a batch with a task in front of them
+        skippedTasks = 0
+        self.dispatchedSupply = 0
+        for index, task in enumerate(self.taskWindow):
+            if skippedTasks > 0:
+                skippedTasks -= 1
+                continue
+            if waitingTasks and self.dependsOnWaitingTasks(task, waitingTasks):
+                waitingTasks.append(task)
+                continue
+            self.currentTaskWakeLoop = None
+            self.currentTaskWindowIndex = index
+            self.batchedTasks = 0
+            self.lookingAhead = bool(waitingTasks)
+            self.windowReservedMinerals = sum(waitingTask.minerals for waitingTask in waitingTasks)
+            self.windowReservedVespene = sum(waitingTask.vespene for waitingTask in waitingTasks)
+            self.windowReservedSupply = sum(waitingTask.supply for waitingTask in waitingTasks) + self.dispatchedSupply
+            self.currentPlannedTask = task
+            self.currentTask = task.unitId
+            self.raceSpecificOnStep()
+            # finishedCurrentTask resets the current task once the task is dispatched
+            if self.currentPlannedTask is None:
+                skippedTasks = self.batchedTasks
+                self.dispatchedSupply += task.supply * (1 + self.batchedTasks)
+            else:
+                waitingTasks.append(task)
+                if self.prepositionWorkers and task.builtByWorker and task.isStructure and self.currentTaskWakeLoop is not None:
+                    self.prepositionWorkerForCurrentTask()
+                if wakeLoop is not None:
+                    wakeLoop = None if self.currentTaskWakeLoop is None else min(wakeLoop, self.currentTaskWakeLoop)
+
+        # batched tasks that were not in the window yet come straight from the plan
+        self.nextTaskIndex += skippedTasks
+        self.taskWindow = waitingTasks
+        self.batchedTasks = 0
+        self.lookingAhead = False
+        self.windowReservedMinerals = 0
+        self.windowReservedVespene = 0
+        self.windowReservedSupply = 0
+        self.dispatchedSupply = 0
+        self.currentTask = UnitTypeId.NOTAUNIT
+        self.currentPlannedTask = None
+        self.currentTaskWakeLoop = None
+        if not waitingTasks or wakeLoop == math.inf:
+            return None
+        return wakeLoop
+
+    def countFollowingIdenticalTasks(self):
+        """Count the tasks right behind the current task that are the same task.
+
+        Continues into the plan if the window ends with identical tasks. Race
+        specific bots may dispatch those together with the current task by
+        setting batchedTasks.
+        """
+        count = 0
+        for task in self.taskWindow[self.currentTaskWindowIndex + 1:]:
+            if task != self.currentPlannedTask:
+                return count
+            count += 1
+        for task in self.taskPlan[self.nextTaskIndex:]:
+            if task != self.currentPlannedTask:
+                return count
+            count += 1
+        return count
+
+    def prepositionWorkerForCurrentTask(self):
+        """Send a worker to the build location of the current task ahead of time.
+
+        The worker leaves once the predicted time until the task is affordable
+        is not longer than its way to the build location, so that it arrives
+        together with the resources. Before that the wake loop of the task is
+        moved to the moment the worker has to leave.
+        """
+        if self.currentTask in self.prepositions or not self.workers.gathering:
+            return
+        location: Point2 = self.peekBuildLocationForCurrentTask()
+        if location is None:
+            return
+        worker: Unit = self.getWorker(location)
+        if worker.movement_speed <= 0:
+            return
+        travelLoops = worker.distance_to(location) / (worker.movement_speed / GAME_LOOPS_PER_NORMAL_SECOND)
+        departureLoop = self.currentTaskWakeLoop - travelLoops
+        if departureLoop > self.state.game_loop:
+            self.currentTaskWakeLoop = departureLoop
+            return
+        self.loggerBase.info("Sending a worker ahead to build " + str(self.currentTask) + " at " + str(location))
+        worker.move(location)
+        self.prepositions[self.currentTask] = WorkerPreposition(worker.tag, location, self.state.game_loop, travelLoops)
+
+    def peekBuildLocationForCurrentTask(self):
+        """Get the build location of the current task without reserving it (None if unknown)."""
+        raise Exception("Has to be implemented by race specific bot!")
 
     def finishedCurrentTask(self):
         """ Advance buildlist by one task.
+
+        Reserves the costs if a worker was sent to build a structure.
         """
         self.loggerBase.info("Finished task: " + str(self.currentTask))
+        if self.currentPlannedTask.builtByWorker and self.currentPlannedTask.isStructure:
+            self.costReservations.append(CostReservation(
+                self.currentTask,
+                self.currentPlannedTask.minerals,
+                self.currentPlannedTask.vespene,
+                self.state.game_loop
+            ))
         self.currentTask = UnitTypeId.NOTAUNIT
+        self.currentPlannedTask = None
 
     def scanBuildList(self):
         """ Preprocess/check of buildlist.
@@ -534,19 +621,75 @@ class BuildListProcessBotBase(sc2.BotAI):
         """
         raise Exception("Has to be implemented by race specific class!")
 
+    def countOutstandingBuildTasks(self):
+        """Count how many units and structures still have to be created.
+
+        Call once remainingBuildTasks is complete (including race specific changes).
+        Workers are left out, missing workers are only warned about in
+        checkBuildListCompleted.
+        """
+        worker = race_worker[self.race]
+        self.outstandingBuildTasks = sum(count for unitId, count in self.remainingBuildTasks.items() if count > 0 and unitId != worker)
+
+    def countCreatedUnit(self, unit: Unit):
+        """Count a created unit or structure for the build list completed check.
+        """
+        unitId = unit.type_id
+        count = self.remainingBuildTasks[unitId]
+        if count > 0 and unitId != race_worker[self.race]:
+            self.outstandingBuildTasks -= 1
+        self.remainingBuildTasks[unitId] = count - 1
+        self.countedTypesByTag.setdefault(unit.tag, list()).append(unitId)
+
+    def restoreDestroyedUnit(self, unitId: UnitTypeId):
+        """Undo countCreatedUnit for a unit or structure that was destroyed.
+
+        Workers are not restored, drones are used up by the structures they build.
+        """
+        if unitId == race_worker[self.race]:
+            return
+        count = self.remainingBuildTasks[unitId] + 1
+        if count > 0:
+            self.outstandingBuildTasks += 1
+        self.remainingBuildTasks[unitId] = count
+
+    async def on_building_construction_started(self, unit: Unit):
+        """Release the cost reservation of a started structure.
+
+        When a gas building is started also mark its geyser as occupied.
+        """
+        self.producerIndex.add(unit.tag, unit.type_id)
+        for index, reservation in enumerate(self.costReservations):
+            if reservation.unitId == unit.type_id:
+                del self.costReservations[index]
+                break
+        if unit.type_id == race_gas[self.race]:
+            self.resourceIndex.setGeyserOccupied(unit)
+
     async def on_building_construction_complete(self, unit: Unit):
         """When building is completed store that for later checks.
         """
         if not self.raceSpecificStructureCompletedIgnore(unit.type_id):
             self.loggerBase.info("Structure " + str(unit.type_id) + " completed!")
-            self.remainingBuildTasks[unit.type_id] -= 1
+            self.countCreatedUnit(unit)
 
     async def on_unit_created(self, unit: Unit):
         """When unit is created store that for later checks.
         """
+        self.producerIndex.add(unit.tag, unit.type_id)
         if not self.raceSpecificUnitCompletedIgnore(unit.type_id):
             self.loggerBase.info("Unit " + str(unit.type_id) + " completed!")
-            self.remainingBuildTasks[unit.type_id] -= 1
+            self.countCreatedUnit(unit)
+
+    async def on_unit_type_changed(self, unit: Unit, previous_type: UnitTypeId):
+        """When a morph is finished store that for later checks.
+
+        Morphs keep the tag of the unit so they are not reported as created.
+        """
+        self.producerIndex.add(unit.tag, unit.type_id)
+        if unit.type_id in MORPHED_UNITS and unit.type_id in self.remainingBuildTasks:
+            self.loggerBase.info("Morph to " + str(unit.type_id) + " completed!")
+            self.countCreatedUnit(unit)
 
     def raceSpecificStructureCompletedIgnore(self, unit: UnitTypeId):
         """Some structures need to be ignored by races."""
@@ -560,66 +703,19 @@ class BuildListProcessBotBase(sc2.BotAI):
         """Post buildlist completed check.
 
         This does not check if the list of build tasks is empty but it checks
-        if all buildings are ready and idle and if all remaining build tasks
-        have been completed
+        if all remaining build tasks have been completed. The creation hooks
+        keep track of that so this check does not depend on the number of units.
         """
-        
-        if self.done:
-
-            allStructuresReady = True
-            allStructuresIdle = True
-
-            for structure in self.structures:
-                allStructuresReady = allStructuresReady and structure.is_ready
-                if not structure.is_ready:
-                    self.loggerBase.debug(str(structure) + " is not ready")
-                allStructuresIdle = allStructuresIdle and structure.is_idle
-                if not structure.is_idle:
-                    self.loggerBase.debug(str(structure) + " is not idle")
-        
-            allUnitsReady = True
-            for unit in self.units:
-                allUnitsReady = allUnitsReady and unit.is_ready
-                if not unit.is_ready:
-                    self.loggerBase.debug(str(unit) + " is not ready!")
-            
-            if self.race == Race.Zerg:
-                allUnitsReady = self.units.filter(lambda unit: unit.type_id == UnitTypeId.EGG).empty
-
-
-            if not allStructuresReady:
-                self.loggerBase.debug("Buildlist is done but not all structures are ready!")
-
-            if not allStructuresIdle:
-                self.loggerBase.debug("Buildlist is done but not all structures are idle!")
-
-            if not allUnitsReady:
-                self.loggerBase.debug("Buildlist is done but not all units are ready!")
-
-            if allStructuresReady and allStructuresIdle and allUnitsReady:
-                # the final check of remainingBuildTasks if everything was built
-                for unitId, count in self.remainingBuildTasks.items():
-                    # safety net for terran (and protoss)
-                    if self.already_pending(unitId) > 0:
-                        return False # the building is pending --> worker walking to build etc.
-                    if unitId in BASE_BUILDINGS:
-                        self.loggerBase.info("All units: \n" + str(self.all_units))
-                    if count != 0:
-                        if unitId == race_worker[self.race]:
-                            self.loggerBase.warn("The bot did not produce the correct number of workers. Timings will not be correct but the army strength can still be compared!")
-                        else:
-                            if count > 0:
-                                raise Exception("Everything should be done but " + str(unitId) + " was not build as many times as it was supposed to!")
-                            else:
-                                raise Exception("Everything should be done but " + str(unitId) + " was build more than it was supposed to!")
-                return True
-            else:
-                return False
+        if not self.done or self.outstandingBuildTasks > 0:
+            return False
 
+        for unitId, count in self.remainingBuildTasks.items():
+            if count < 0 and unitId != race_worker[self.race]:
+                raise Exception("Everything should be done but " + str(unitId) + " was build more than it was supposed to!")
+        if self.remainingBuildTasks[race_worker[self.race]] != 0:
+            self.loggerBase.warn("The bot did not produce the correct number of workers. Timings will not be correct but the army strength can still be compared!")
+        return True
 
-        else:
-            return False
-        
     # Units
     # ----------------------------------------
     
@@ -634,21 +730,21 @@ class BuildListProcessBotBase(sc2.BotAI):
     def getProducerIdsForCurrentTask(self):
         """Get producer ids for current task.
         """
-        if self.currentTask in UNIT_TRAINED_FROM:
-            return UNIT_TRAINED_FROM[self.currentTask]
-        elif self.currentTask in BASE_BUILDINGS:
-            return BASE_BUILDINGS[self.currentTask]
-        else:
-            raise Exception("" + str(self.currentTask) + " is not available in UNIT_TRAINED_FROM and not in BASE_BUILDINGS (only terran)!")
+        return self.currentPlannedTask.producerIds
 
     # returns actual units of producers for the current task
     def getProducerUnitsForCurrentTask(self):
         """Get the units (actual units in the game) that could produce the current task.
 
-        Does not check if these units are busy.
+        Does not check if these units are busy. Looked up in the producer index.
+        """
+        return self.getOwnUnitsOfTypes(self.getProducerIdsForCurrentTask())
+
+    def getOwnUnitsOfTypes(self, typeIds: Set[UnitTypeId]):
+        """Get the own units and structures of the given types from the producer index.
         """
-        producerIds: Set[UnitTypeId] = self.getProducerIdsForCurrentTask()
-        return (self.units + self.structures).filter(lambda unit: unit.type_id in producerIds)
+        self.producerIndex.refresh(self.state.game_loop, self.all_own_units)
+        return Units(self.producerIndex.getUnits(typeIds), self)
 
     # returns true if the given unit id is a worker of the currently played race
     def isWorker(self, unitId: UnitTypeId):
@@ -659,6 +755,22 @@ class BuildListProcessBotBase(sc2.BotAI):
     # Building/Training Conditions
     # ----------------------------------------
 
+    def getReservedCosts(self):
+        """Minerals and vespene reserved for structures that were not started yet.
+
+        Drops reservations whose structure was never started. Reservations
+        of the current step are left out: the build command already
+        subtracted the costs from the minerals and vespene of this step.
+        """
+        gameLoop = self.state.game_loop
+        if self.costReservations and gameLoop - self.costReservations[0].orderedLoop > RESERVATION_TIMEOUT_LOOPS:
+            expired = [reservation for reservation in self.costReservations if gameLoop - reservation.orderedLoop > RESERVATION_TIMEOUT_LOOPS]
+            for reservation in expired:
+                self.loggerBase.warn("Dropping cost reservation of " + str(reservation.unitId) + " as it was never started!")
+            self.costReservations = [reservation for reservation in self.costReservations if reservation not in expired]
+        active = [reservation for reservation in self.costReservations if reservation.orderedLoop < gameLoop]
+        return (sum(reservation.minerals for reservation in active), sum(reservation.vespene for reservation in active))
+
     def checkIfProducerExists(self):
         """Check if a producer for the current task exists.
         
@@ -669,8 +781,8 @@ class BuildListProcessBotBase(sc2.BotAI):
         producersAvailable: Units = self.getProducerUnitsForCurrentTask()
         producersAvailable = producersAvailable.ready
         if not producersAvailable.empty:
-            # is any of these available producers idle
-            if any(producer.is_idle or producer.is_gathering for producer in producersAvailable):
+            # can any of these available producers start the task right now
+            if any(self.producerHasFreeSlot(producer) for producer in producersAvailable):
                 result = (True, True)
             else:
                 result = (False, True)
@@ -686,50 +798,112 @@ class BuildListProcessBotBase(sc2.BotAI):
 
         return result
 
+    def predictProducerLoop(self):
+        """Game loop at which a producer for the current task becomes free (None if unknown).
+
+        Race specific bots may know (e.g. zerg larva timers).
+        """
+        return None
+
+    def producerHasFreeSlot(self, producer: Unit):
+        """Check if a producer can start the current task right now.
+
+        A producer is free if it is idle (workers may be gathering) and did
+        not get an order in this step already. Race specific bots may know
+        better (e.g. terran reactors).
+        """
+        return (producer.is_idle or producer.is_gathering) and producer.tag not in self.unit_tags_received_action
+
     def checkCosts(self):
         """Check if the current task is affordable.
         
         returns a pair of bools stating if the task is currently affordable and
         if we can wait such that it becomes affordable.
         """
-        cost = self.calculate_cost(self.currentTask)
+        task: PlannedTask = self.currentPlannedTask
+        reservedMinerals, reservedVespene = self.getReservedCosts()
+        reservedMinerals += self.windowReservedMinerals
+        reservedVespene += self.windowReservedVespene
 
-        # TODO: the check here (self.workers.gathering > 0) does not work for terran and protoss
+        missingMinerals = task.minerals - (self.minerals - reservedMinerals)
+        missingVespene = task.vespene - (self.vespene - reservedVespene)
+        missingSupply = task.supply - (self.supply_left - self.windowReservedSupply) if task.supply else 0
+
+        # waiting helps if there is income (the estimate needs about a second at the start of the game)
+        warm = self.incomeEstimator.isWarm()
 
         minerals = (True, True)
-        if cost.minerals > self.minerals:
+        if missingMinerals > 0:
             # not enough right now but maybe later?
-            # at least some workers and
-            if len(self.workers.gathering) > 0 and len(self.townhalls) > 0:
+            if (warm and self.incomeEstimator.mineralRate() > 0) or (not warm and len(self.workers.gathering) > 0 and len(self.townhalls) > 0):
                 minerals = (False, True)
             else:
                 minerals = (False, False)
-                self.loggerBase.warn("There are not enough minerals to build " + str(self.currentTask) + " and waiting does not help!")
+                if not self.lookingAhead:
+                    self.loggerBase.warn("There are not enough minerals to build " + str(self.currentTask) + " and waiting does not help!")
         
         vespene = (True, True)
-        if cost.vespene > self.vespene:
+        if missingVespene > 0:
             # not enough right now but maybe later?
-            if len(self.workers.gathering) > 0 and len(self.gas_buildings.ready) + self.already_pending(race_gas[self.race]):
+            if (warm and self.incomeEstimator.vespeneRate() > 0) or (not warm and len(self.workers) > 0 and len(self.gas_buildings) + self.already_pending(race_gas[self.race])):
                 # waiting helps
                 vespene = (False, True)
             else:
                 vespene = (False, False)
-                self.loggerBase.warn("There are not enough vespene to build " + str(self.currentTask) + " and waiting does not help!")
+                if not self.lookingAhead:
+                    self.loggerBase.warn("There are not enough vespene to build " + str(self.currentTask) + " and waiting does not help!")
 
         supply = (True, True)
-        supply_cost = self.calculate_supply_cost(self.currentTask)
         # make sure this thing actually has supply cost
-        if isinstance(self.currentTask, UnitTypeId):
-            if supply_cost and supply_cost > self.supply_left:
-                # we dont have enough supply right now but maybe later?
-                supply = (False, True)
-                # check if supply building is being built
-                # already pending checks everything: check its documentation
-                if self.already_pending(race_supplyUnit[self.race]) == 0:
-                    supply = (False, False)
+        if missingSupply > 0:
+            # we dont have enough supply right now but maybe later?
+            supply = (False, True)
+            # check if supply building is being built
+            # already pending checks everything: check its documentation
+            if self.already_pending(race_supplyUnit[self.race]) == 0:
+                supply = (False, False)
+                if not self.lookingAhead:
                     self.loggerBase.warn("There is not enough supply to build " + str(self.currentTask) + " and waiting does not help!")
 
-        return (minerals[0] and vespene[0] and supply[0], minerals[1] and vespene[1] and supply[1])
+        affordable = minerals[0] and vespene[0] and supply[0]
+        if not affordable:
+            waitLoops = max(self.incomeEstimator.loopsToAfford(missingMinerals, missingVespene), self.loopsToSupply(missingSupply))
+            if waitLoops != math.inf:
+                self.currentTaskWakeLoop = self.state.game_loop + waitLoops
+
+        return (affordable, minerals[1] and vespene[1] and supply[1])
+
+    def loopsToSupply(self, supplyNeeded: float):
+        """Predicted game loops until the given supply is free.
+
+        Only counts supply providers that are already on their way
+        (structures in construction, eggs and structures a worker was sent
+        to build). Infinite if they do not provide enough supply.
+        """
+        if supplyNeeded <= 0:
+            return 0
+        # (remaining game loops, provided supply) of everything that is on its way
+        providers: List[Tuple[float, int]] = list()
+        for structure in self.structures.not_ready:
+            if structure.type_id in PRODUCTION_DATA and PRODUCTION_DATA[structure.type_id].supplyProvided > 0:
+                data = PRODUCTION_DATA[structure.type_id]
+                providers.append(((1.0 - structure.build_progress) * data.buildTime * GAME_LOOPS_PER_SECOND, data.supplyProvided))
+        if self.race == Race.Zerg:
+            overlordData = PRODUCTION_DATA[UnitTypeId.OVERLORD]
+            for egg in self.units(UnitTypeId.EGG):
+                if egg.orders and egg.orders[0].ability.id == AbilityId.LARVATRAIN_OVERLORD:
+                    providers.append(((1.0 - egg.orders[0].progress) * overlordData.buildTime * GAME_LOOPS_PER_SECOND, overlordData.supplyProvided))
+        for reservation in self.costReservations:
+            if reservation.unitId in PRODUCTION_DATA and PRODUCTION_DATA[reservation.unitId].supplyProvided > 0:
+                data = PRODUCTION_DATA[reservation.unitId]
+                providers.append((data.buildTime * GAME_LOOPS_PER_SECOND, data.supplyProvided))
+
+        providers.sort()
+        for remainingLoops, providedSupply in providers:
+            supplyNeeded -= providedSupply
+            if supplyNeeded <= 0:
+                return remainingLoops
+        return math.inf
 
     def checkIfTechRequirementFulfilled(self):
         """Check if the tech requirement for the current task is fulfilled.
@@ -738,22 +912,14 @@ class BuildListProcessBotBase(sc2.BotAI):
         if we can wait such that it becomes fulfilled.
         """
 
-        race_dict = {
-            Race.Protoss: PROTOSS_TECH_REQUIREMENT,
-            Race.Terran: TERRAN_TECH_REQUIREMENT,
-            Race.Zerg: ZERG_TECH_REQUIREMENT,
-        }
-        # this gets the requirement for the unit we are checking
-        requirement = race_dict[self.race][self.currentTask]
+        # the requirement and its equivalents are looked up once in the task plan
+        requirement = self.currentPlannedTask.requirement
         # if there is no requirement we can just skip the remaining stuff
         if UnitTypeId.NOTAUNIT == requirement:
             return (True, True)
-        # 
-        requirementEquivalents = {requirement}
-        for equiv_structure in EQUIVALENTS_FOR_TECH_PROGRESS.get(requirement, []):
-            requirementEquivalents.add(equiv_structure)
+        requirementEquivalents = self.currentPlannedTask.requirementEquivalents
 
-        correspondingStructures = self.structures.filter(lambda unit: unit.type_id in requirementEquivalents)
+        correspondingStructures = self.getOwnUnitsOfTypes(requirementEquivalents)
 
         # any of them already existing?
         fulfilled = bool(correspondingStructures.ready)
@@ -767,6 +933,16 @@ class BuildListProcessBotBase(sc2.BotAI):
 
         return (fulfilled, waitingHelps)
 
+    def preconditionFailed(self, message: str):
+        """Raise because waiting does not help the current task.
+
+        Tasks behind a waiting task (look-ahead) do not raise as the tasks in
+        front of them may still change that. They just wait.
+        """
+        if self.lookingAhead:
+            return False
+        raise Exception(message)
+
     def checkPreconditions(self):
         """Combine producer, cost and tech requirement check.
         
@@ -775,15 +951,25 @@ class BuildListProcessBotBase(sc2.BotAI):
         # check if the producer exists or is under construction and if the producer is idle
         producerExists, canWaitProducer = self.checkIfProducerExists()
         if not producerExists and not canWaitProducer:
-            raise Exception("There must be a producer for " + str(self.currentTask))
+            return self.preconditionFailed("There must be a producer for " + str(self.currentTask))
         # check if we can afford the unit/structure
         resourcesExist, canWaitResources = self.checkCosts() 
         if not resourcesExist and not canWaitResources:
-            raise Exception("There is not enough minerals, vespene or supply and waiting for it will not help!")
+            return self.preconditionFailed("There is not enough minerals, vespene or supply and waiting for it will not help!")
         # check if tech requirement is fullfilled only if the resources exist
         requirementFulfilled, canWaitRequirement = self.checkIfTechRequirementFulfilled()
         if not requirementFulfilled and not canWaitRequirement:
-            raise Exception("The requirement for " + str(self.currentTask) + " is not fullfilled!")
+            return self.preconditionFailed("The requirement for " + str(self.currentTask) + " is not fullfilled!")
+
+        # only tasks that wait for resources, supply or a predictable producer have a wake loop
+        if not requirementFulfilled:
+            self.currentTaskWakeLoop = None
+        elif not producerExists:
+            producerLoop = self.predictProducerLoop()
+            if producerLoop is None or (not resourcesExist and self.currentTaskWakeLoop is None):
+                self.currentTaskWakeLoop = None
+            else:
+                self.currentTaskWakeLoop = max(producerLoop, self.currentTaskWakeLoop or 0)
 
         # just return if we are able to build immediately --> if not that means we have to wait
         return producerExists and resourcesExist and requirementFulfilled
@@ -793,37 +979,61 @@ class BuildListProcessBotBase(sc2.BotAI):
     
     # Building
     # ----------------------------------------
+    def getStructureSize(self, unitId: UnitTypeId):
+        """Width and height of a structure in cells.
+        """
+        unitTypeData: UnitTypeData = self.game_data.units[unitId.value]
+        size = int(round(unitTypeData.footprint_radius * 2.0))
+        return (size, size)
+
     def getWorker(self, position: Union[Unit, Point2, Point3]):
         """Get a worker closest to a certain point on the map.
+
+        Prefers workers that did not get an order in this step already. If a
+        worker was sent ahead for the current task that one is used.
         """
+        if self.currentTask in self.prepositions:
+            preposition: WorkerPreposition = self.prepositions.pop(self.currentTask)
+            prepositionedWorker: Unit = self.workers.find_by_tag(preposition.workerTag)
+            if prepositionedWorker is not None:
+                savedLoops = min(preposition.travelLoops, self.state.game_loop - preposition.orderedLoop)
+                self.prepositionSavedLoops.append(savedLoops)
+                self.loggerBase.info("Pre-positioned worker saved " + str(round(savedLoops)) + " game loops for " + str(self.currentTask))
+                return prepositionedWorker
         workersGathering: Units = self.workers.gathering
+        if workersGathering.tags_not_in(self.unit_tags_received_action):
+            workersGathering = workersGathering.tags_not_in(self.unit_tags_received_action)
 
         if workersGathering:
             # select worker closest to pos or unit
             return workersGathering.closest_to(position)
         else:
-            raise Exception("There are no gathering workers which could be used to build " + self.currentTask)
+            raise Exception("There are no gathering workers which could be used to build " + str(self.currentTask))
 
     def buildGasBuildingAtTownhall(self, townhall: Unit):
         """Build gas building at a certain townhall.
         
-        Needs storage for occupied geysers as library function can_place does not
-        work in that case.
+        Uses the geyser occupancy of the resource index as library function
+        can_place does not work in that case.
         """
-        # all vespene geysers closer than distance ten to the current townhall
-        vespeneGeysers: Units  = self.vespene_geyser.closer_than(10, townhall)
-        self.loggerBase.info("Found " + str(len(vespeneGeysers)) + " vespene geyser locations!")
+        # free geysers that were ordered but will not get a gas building
+        if self.resourceIndex.geyserOrders:
+            buildGasAbility = self.game_data.units[race_gas[self.race].value].creation_ability.id
+            orderedWorkerTags = {worker.tag for worker in self.workers if any(order.ability.id == buildGasAbility for order in worker.orders)}
+            self.resourceIndex.releaseGeyserOrders(self.state.game_loop, orderedWorkerTags)
+        # all free vespene geysers of the base of the current townhall
+        vespeneGeysers: List[Unit] = self.resourceIndex.getFreeGeysers(townhall.position)
+        self.loggerBase.info("Found " + str(len(vespeneGeysers)) + " free vespene geyser locations!")
         # check all locations
         #  apparently can_place does not work in this situation. it will say that a second refinery can be placed on the occupied geyser
         for vespeneGeyser in vespeneGeysers:
-            if vespeneGeyser.position not in self.occupiedGeysers:
-                if self.can_place(self.currentTask, (vespeneGeyser.position)):
-                    worker: Unit = self.getWorker(vespeneGeyser)
-                    worker.build_gas(vespeneGeyser)
-                    self.occupiedGeysers.add(vespeneGeyser.position)
-                    return True
-                else:
-                    self.loggerBase.warn("Can place stated not possible to place even though according to self.occupiedGeysers it should be free!")
+            if self.can_place(self.currentTask, (vespeneGeyser.position)):
+                worker: Unit = self.getWorker(vespeneGeyser)
+                worker.build_gas(vespeneGeyser)
+                self.resourceIndex.setGeyserOrdered(vespeneGeyser, worker.tag, self.state.game_loop)
+                return True
+            else:
+                self.loggerBase.warn("Can place stated not possible to place even though according to the resource index it should be free!")
         
         # if we reach this we have not found a building location
         return False
@@ -848,7 +1058,7 @@ class BuildListProcessBotBase(sc2.BotAI):
         """
         if bool(self.expansionLocations):
             location: Point2 = self.expansionLocations.pop(0)
-            worker: Unit = self.workers.gathering.closest_to(location)
+            worker: Unit = self.getWorker(location)
             if self.can_place(self.currentTask, location):
                 worker.build(self.currentTask, location)
             else:
@@ -866,132 +1076,125 @@ class BuildListProcessBotBase(sc2.BotAI):
             - idle workers
             - surplus on townhalls/geysers
 
-        Taken from https://github.com/BurnySc2/python-sc2/blob/develop/examples/terran/mass_reaper.py and modified.
+        Originally taken from https://github.com/BurnySc2/python-sc2/blob/develop/examples/terran/mass_reaper.py.
+        All distances are computed once per step as a worker x site matrix and
+        the surplus workers are assigned to deficits in one min-cost assignment.
         """
-
-        mineralTags = [x.tag for x in self.mineral_field]
-        gas_buildingTags = [x.tag for x in self.gas_buildings]
-
-        workerPool = Units([], self)
-        workerPoolTags = set()
-
-        # # Find all gas_buildings that have surplus or deficit
-        deficit_gas_buildings = {}
-        surplusgas_buildings = {}
-        for g in self.gas_buildings.filter(lambda x: x.vespene_contents > 0):
-            # Only loop over gas_buildings that have still gas in them
-            deficit = g.ideal_harvesters - g.assigned_harvesters
-            if deficit > 0:
-                deficit_gas_buildings[g.tag] = {"unit": g, "deficit": deficit}
-            elif deficit < 0:
-                surplusWorkers = self.workers.closer_than(10, g).filter(
-                    lambda w: w not in workerPoolTags
-                    and len(w.orders) == 1
-                    and w.orders[0].ability.id in [AbilityId.HARVEST_GATHER]
-                    and w.orders[0].target in gas_buildingTags
-                )
-                for i in range(-deficit):
-                    if surplusWorkers.amount > 0:
-                        w = surplusWorkers.pop()
-                        workerPool.append(w)
-                        workerPoolTags.add(w.tag)
-                surplusgas_buildings[g.tag] = {"unit": g, "deficit": deficit}
-
-        # # Find all townhalls that have surplus or deficit
-        deficitTownhalls = {}
-        surplusTownhalls = {}
-        for th in self.townhalls:
-            deficit = th.ideal_harvesters - th.assigned_harvesters
-            if deficit > 0:
-                deficitTownhalls[th.tag] = {"unit": th, "deficit": deficit}
-            elif deficit < 0:
-                surplusWorkers = self.workers.closer_than(10, th).filter(
-                    lambda w: w.tag not in workerPoolTags
-                    and len(w.orders) == 1
-                    and w.orders[0].ability.id in [AbilityId.HARVEST_GATHER]
-                    and w.orders[0].target in mineralTags
-                )
-                # workerPool.extend(surplusWorkers)
-                for i in range(-deficit):
-                    if surplusWorkers.amount > 0:
-                        w = surplusWorkers.pop()
-                        workerPool.append(w)
-                        workerPoolTags.add(w.tag)
-                surplusTownhalls[th.tag] = {"unit": th, "deficit": deficit}
-        
-        # ---------------------------------------------
+        workers = list(self.workers)
+        townhalls = list(self.townhalls)
+        if not workers or not townhalls:
+            return
+
+        mineralFields = list(self.mineral_field)
+        gasBuildingTags = {gasBuilding.tag for gasBuilding in self.gas_buildings}
+        # only gas buildings that still have gas in them
+        gasBuildings = [gasBuilding for gasBuilding in self.gas_buildings if gasBuilding.vespene_contents > 0]
+
+        # sites are townhalls followed by gas buildings
+        sites = townhalls + gasBuildings
+        siteIsGas = np.arange(len(sites)) >= len(townhalls)
+        deficits = np.array([site.ideal_harvesters - site.assigned_harvesters for site in sites])
+
+        workerPositions = np.array([worker.position_tuple for worker in workers])
+        sitePositions = np.array([site.position_tuple for site in sites])
+        mineralPositions = np.array([mineralField.position_tuple for mineralField in mineralFields]).reshape(-1, 2)
+        workerSiteDistances = distanceMatrix(workerPositions, sitePositions)
+        # mineral fields that belong to a townhall (looked up in the resource index)
+        self.resourceIndex.updateDepletion(self.mineral_field)
+        mineralColumns = {mineralField.tag: column for column, mineralField in enumerate(mineralFields)}
+        townhallMinerals = np.zeros((len(townhalls), len(mineralFields)), dtype=bool)
+        for townhallIndex, townhall in enumerate(townhalls):
+            for tag in self.resourceIndex.getMineralTags(townhall.position):
+                if tag in mineralColumns:
+                    townhallMinerals[townhallIndex, mineralColumns[tag]] = True
+
+        # what every worker is doing
+        gatherTargets = [
+            worker.orders[0].target if len(worker.orders) == 1 and worker.orders[0].ability.id == AbilityId.HARVEST_GATHER else None
+            for worker in workers
+        ]
+        harvestingMinerals = np.array([target in mineralColumns for target in gatherTargets])
+        harvestingGas = np.array([target in gasBuildingTags for target in gatherTargets])
+        returning = np.array([len(worker.orders) == 1 and worker.orders[0].ability.id == AbilityId.HARVEST_RETURN for worker in workers])
+        # workers waiting at build locations are not idle
+        prepositionedTags = {preposition.workerTag for preposition in self.prepositions.values()}
+        idle = np.array([worker.is_idle and worker.tag not in prepositionedTags for worker in workers])
+
+        # pairs of worker index and site index (gas) or mineral field index (minerals)
+        gasOrders: List[Tuple[int, int]] = []
+        mineralOrders: List[Tuple[int, int]] = []
+
+        # workers at sites with a surplus form the worker pool
+        pooled = np.zeros(len(workers), dtype=bool)
+        for siteIndex in np.flatnonzero(deficits < 0):
+            harvestingHere = harvestingGas if siteIsGas[siteIndex] else harvestingMinerals
+            candidates = np.flatnonzero((workerSiteDistances[:, siteIndex] < SITE_RADIUS) & harvestingHere & ~pooled)
+            pooled[candidates[:-deficits[siteIndex]]] = True
 
         # We now know which building has a deficit and which one has a surplus. If a building has a surplus
         # the workers are added to the worker pool. Whenever we have anything in the worker pool we want to
         # distribute those first.
 
-        if bool(workerPool):
-
-            # iterate deficit townhalls
-            for townhallTag, info in deficitTownhalls.items():
-                # get the minerals close to the current townhall
-                mineralFields: Units = self.mineral_field.closer_than(10, info["unit"])
-                # if there are any
-                if mineralFields:
-                    # get the deficit (missing worker to optimal performance)
-                    deficit = info["deficit"]
-                    # check if the worker pool does contain anything
-                    workersLeft = bool(workerPool)
-                    # if there is a deficit move one worker to the townhall from the worker pool
-                    if deficit > 0 and workersLeft:
-                        worker: Unit = workerPool.pop()
-                        mineralField: Unit = mineralFields.closest_to(worker)
-                        self.loggerBase.info("Moving one worker to harvest minerals at " + str(info["unit"]))
-                        if len(worker.orders) == 1 and worker.orders[0].ability.id in [AbilityId.HARVEST_RETURN]:
-                            worker.gather(mineralField, queue=True)
-                        else:
-                            worker.gather(mineralField)
-            # iterate deficit gas buildings
-            for gasTag, info in deficit_gas_buildings.items():
-                # get the deficit (missing worker to optimal performance)
-                deficit = info["deficit"]
-                # check if the worker pool does contain anything
-                workersLeft = bool(workerPool)
-                # if there is a deficit move one worker to the townhall from the worker pool
-                if deficit > 0 and workersLeft:
-                    worker: Unit = workerPool.pop()
-                    self.loggerBase.info("Moving one worker to harvest gas at " + str(info["unit"]))
-                    if len(worker.orders) == 1 and worker.orders[0].ability.id in [AbilityId.HARVEST_RETURN]:
-                        worker.gather(info["unit"], queue=True)
-                    else:
-                        worker.gather(info["unit"])
+        if pooled.any():
+            poolIndices = np.flatnonzero(pooled)
+            deficitSites = np.flatnonzero(deficits > 0)
+            # townhalls without mineral fields can not take any workers
+            capacities = np.array([
+                deficits[siteIndex] if siteIsGas[siteIndex] or townhallMinerals[siteIndex].any() else 0
+                for siteIndex in deficitSites
+            ], dtype=int)
+            for row, column in minCostAssignment(workerSiteDistances[np.ix_(poolIndices, deficitSites)], capacities):
+                workerIndex = poolIndices[row]
+                siteIndex = deficitSites[column]
+                if siteIsGas[siteIndex]:
+                    gasOrders.append((workerIndex, siteIndex))
+                else:
+                    mineralOrders.append((workerIndex, siteIndex))
         else:
             # Whenever we do not have worker in the worker pool we want to move some workers to harvest gas but only if a certain ratio between
             # total vespene workers and total mineral workers is not exceeded.
 
-            totalMineralWorkers = 0
-            totalVespeneWorkers = 0
-
-            for townhall in self.townhalls.ready:
-                totalMineralWorkers += townhall.assigned_harvesters
-            for gasBuilding in self.gas_buildings.ready:
-                totalVespeneWorkers += gasBuilding.assigned_harvesters
-
-            # only if less than 33% workers are on vespene
-            if (totalVespeneWorkers / (totalMineralWorkers + totalVespeneWorkers)) < 0.34:
-                for gasTag, info in deficit_gas_buildings.items():
-                    worker: Unit = self.workers.gathering.closest_to(info["unit"].position)
-                    self.loggerBase.info("Moving one worker to " + str(info["unit"]))
-                    if len(worker.orders) == 1 and worker.orders[0].ability.id in [AbilityId.HARVEST_RETURN]:
-                        worker.gather(info["unit"], queue=True)
-                    else:
-                        worker.gather(info["unit"])
-        
-        # redistribute idle workers
-        if len(self.workers.idle) > 0:
-            if self.townhalls:
-                for worker in self.workers.idle:
-                    townhall: Unit = self.townhalls.closest_to(worker)
-                    mineralFields: Units = self.mineral_field.closer_than(10, townhall)
-                    if mineralFields:
-                        mineralField: Unit = mineralFields.closest_to(worker)
-                        self.loggerBase.info("Moving one worker to harvest minerals at " + str(mineralField))
-                        worker.gather(mineralField)
+            totalMineralWorkers = sum(townhall.assigned_harvesters for townhall in townhalls if townhall.is_ready)
+            totalVespeneWorkers = sum(gasBuilding.assigned_harvesters for gasBuilding in self.gas_buildings.ready)
+            totalWorkers = totalMineralWorkers + totalVespeneWorkers
+
+            if totalWorkers > 0 and (totalVespeneWorkers / totalWorkers) < MAX_VESPENE_WORKER_RATIO:
+                # one mineral worker for every gas building with a deficit, closest first
+                deficitGasSites = np.flatnonzero(siteIsGas & (deficits > 0))
+                available = harvestingMinerals.copy()
+                for siteIndex in deficitGasSites:
+                    candidates = np.flatnonzero(available)
+                    if len(candidates) == 0:
+                        break
+                    workerIndex = candidates[np.argmin(workerSiteDistances[candidates, siteIndex])]
+                    available[workerIndex] = False
+                    gasOrders.append((workerIndex, siteIndex))
+
+        # idle workers go to the closest townhall
+        idleIndices = np.flatnonzero(idle)
+        if len(idleIndices) > 0:
+            closestTownhalls = np.argmin(workerSiteDistances[idleIndices, :len(townhalls)], axis=1)
+            for workerIndex, townhallIndex in zip(idleIndices, closestTownhalls):
+                mineralOrders.append((workerIndex, townhallIndex))
+
+        # pick the closest mineral field of the townhall for every worker going to minerals
+        if mineralOrders:
+            orderWorkers = np.array([workerIndex for workerIndex, townhallIndex in mineralOrders])
+            orderTownhalls = np.array([townhallIndex for workerIndex, townhallIndex in mineralOrders])
+            closestMinerals = closestPerRow(distanceMatrix(workerPositions[orderWorkers], mineralPositions), townhallMinerals[orderTownhalls])
+        else:
+            closestMinerals = []
+
+        # issue all orders at once
+        for (workerIndex, townhallIndex), mineralIndex in zip(mineralOrders, closestMinerals):
+            if mineralIndex >= 0:
+                worker: Unit = workers[workerIndex]
+                self.loggerBase.info("Moving one worker to harvest minerals at " + str(townhalls[townhallIndex]))
+                worker.gather(mineralFields[mineralIndex], queue=bool(returning[workerIndex]))
+        for workerIndex, siteIndex in gasOrders:
+            worker: Unit = workers[workerIndex]
+            self.loggerBase.info("Moving one worker to harvest gas at " + str(sites[siteIndex]))
+            worker.gather(sites[siteIndex], queue=bool(returning[workerIndex]))
 
     # Attack
     # ----------------------------------------
@@ -1006,76 +1209,86 @@ class BuildListProcessBotBase(sc2.BotAI):
     # Run
     # ----------------------------------------
 
-    # finishes preprocessing:
-    #   - compute expansion locations
-    def onStepBase(self, iteration: int):
-        """ Neeeds to be called from race specific bot.
+    def registerSubsystems(self):
+        """Register the parts of the on_step pipeline with the scheduler.
 
-        Finishes the preprocessing that could not be done in on_start.
+        The completion check has to run before the build list advances
+        because orders will be processed after one step is finished. Worker
+        distribution is spread over more frames the more workers there are.
         """
-        if not self.expansionLocationsComputed:
-            # player one will compute for both
-            if self.player == Player.PLAYER_ONE:
-                if BuildListProcessBotBase.PLAYER_TWO_START_LOCATION != StartLocation.UNKNOWN:
-                    self.fillExpansionLocations()
-                    self.expansionLocationsComputed = True
-                    self.loggerBase.info("Expansion locations computed at iteration: " + str(iteration))
-                    self.expansionLocations = BuildListProcessBotBase.PLAYER_ONE_EXPANSION_LOCATIONS
-            else:
-                if BuildListProcessBotBase.PLAYER_TWO_EXPANSION_LOCATIONS:
-                    self.loggerBase.info("Expansion locations available at iteration: " + str(iteration))
-                    self.expansionLocations = BuildListProcessBotBase.PLAYER_TWO_EXPANSION_LOCATIONS
-                    self.expansionLocationsComputed = True
+        self.scheduler.register("incomeEstimation", self.incomeEstimationStep)
+        self.scheduler.register("completionCheck", self.completionCheckStep)
+        self.scheduler.register("buildListAdvancement", self.buildListAdvancementStep)
+        self.scheduler.register("workerDistribution", self.workerDistributionStep, workEstimate=lambda: self.workers.amount)
+        self.scheduler.register("taskProcessing", self.taskProcessingStep)
+        self.scheduler.register("armyStrength", self.armyStrengthStep)
+
+    def incomeEstimationStep(self, iteration: int):
+        """Feed the collected resources into the income estimator.
+        """
+        self.incomeEstimator.update(self.state.game_loop, self.state.score.collected_minerals, self.state.score.collected_vespene)
 
-        # it is important do to this b4 checking and advancing
-        # because orders will be processed after one step is finished
+    def completionCheckStep(self, iteration: int):
+        """Publish when the build list is completed.
+        """
         if (not self.attacking) and self.checkBuildListCompleted():
             self.loggerBase.info("All tasks in buildlist are finished and ready to fight!")
-            if self.player == Player.PLAYER_ONE:
-                BuildListProcessBotBase.PLAYER_ONE_READY_TO_ATTACK = True
-            else:
-                BuildListProcessBotBase.PLAYER_TWO_READY_TO_ATTACK = True
+            self.buildListCompletedIteration = iteration
+            self.coordinator.publishReadyToAttack(self.player)
             self.attacking = True
 
-        if BuildListProcessBotBase.PLAYER_TWO_READY_TO_ATTACK and BuildListProcessBotBase.PLAYER_ONE_READY_TO_ATTACK and not self.attackDone:
-            self.loggerBase.info("Attacking the map center with all available units!")
-            self.attackMapCenterWithArmy()
-            self.attackDone = True
-
-        if self.attackDone:
-            if self.player == Player.PLAYER_ONE:
-                BuildListProcessBotBase.PLAYER_ONE_ARMY_COUNT = self.army_count
-            else:
-                BuildListProcessBotBase.PLAYER_TWO_ARMY_COUNT = self.army_count
-        
-        if self.player == Player.PLAYER_ONE and (BuildListProcessBotBase.PLAYER_ONE_ARMY_COUNT == 0 or BuildListProcessBotBase.PLAYER_TWO_ARMY_COUNT == 0):
-            if BuildListProcessBotBase.PLAYER_ONE_ARMY_COUNT == 0 and BuildListProcessBotBase.PLAYER_TWO_ARMY_COUNT == 0:
-                self.loggerBase.info("Its a tie!")
-            elif BuildListProcessBotBase.PLAYER_ONE_ARMY_COUNT == 0:
-                self.loggerBase.info("Player two won the match!")
-                BuildListProcessBotBase.WINNER = Winner.PLAYER_TWO
-            else:
-                self.loggerBase.info("Player one won the match!")
-                BuildListProcessBotBase.WINNER = Winner.PLAYER_ONE
-
-        if BuildListProcessBotBase.WINNER != Winner.UNKNOWN:
-            if self.player == Player.PLAYER_ONE and BuildListProcessBotBase.WINNER == Winner.PLAYER_TWO:
-                self.loggerBase.info("Player one should surrender now!")
-                #self.client.leave()
-                raise Exception("Player one lost the game and surrendered!")
-            
-            if self.player == Player.PLAYER_TWO and BuildListProcessBotBase.WINNER == Winner.PLAYER_ONE:
-                self.loggerBase.info("Player two should surrender now!")
-                #self.client.leave()
-                raise Exception("Player two lost the game and surrendered!")
-            
-
-        
+    def buildListAdvancementStep(self, iteration: int):
+        """Take the next task of the build list if the current one is done.
+        """
         self.checkAndAdvance()
-        
-        # distribute workers
+
+    def workerDistributionStep(self, iteration: int):
+        """Distribute workers.
+        """
         self.myWorkerDistribution()
 
-        return self.expansionLocationsComputed and not self.done
+    def taskProcessingStep(self, iteration: int):
+        """Dispatch the tasks of the window that can be built.
+
+        Only once the expansion locations are known. Sleeps until the
+        predicted step if all waiting tasks only wait for resources.
+        """
+        if self.expansionLocationsComputed and not self.done:
+            wakeLoop = self.processTaskWindow()
+            # nothing can be built before the predicted loop so sleep until the step before it
+            if wakeLoop is not None and wakeLoop > self.state.game_loop:
+                self.scheduler.sleepUntil("taskProcessing", iteration + int((wakeLoop - self.state.game_loop) // self.client.game_step))
+
+    def armyStrengthStep(self, iteration: int):
+        """Publish the army strength during the attack if the match may be stopped early.
+        """
+        if self.attackDone and self.coordinator.earlyStopPolicy is not None:
+            self.coordinator.publishArmyStrength(self.player, self.computeArmyValue(), self.supply_army, self.state.game_loop)
+
+    def computeArmyValue(self):
+        """Resources spent on the army units that are still alive.
+        """
+        return sum(ARMY_UNIT_VALUES.get(unit.type_id, 0) for unit in self.units)
+
+    def raceSpecificOnStep(self):
+        """Check preconditions of the current task and build it if possible."""
+        raise Exception("Has to be implemented by race specific bot!")
+
+    async def onStepBase(self, iteration: int):
+        """ Neeeds to be awaited from race specific bot.
+
+        Runs the subsystems that are due in this frame (see registerSubsystems).
+        Everything that depends on the other bot happens in the match event
+        handlers. The loser of a match leaves the game, which ends it for
+        both bots.
+        """
+        if self.surrendering:
+            if not self.leftGame:
+                self.loggerBase.info(self.playerString + " lost the game and leaves it!")
+                self.leftGame = True
+                await self.client.leave()
+            return
+
+        self.scheduler.runFrame(iteration)
 
         
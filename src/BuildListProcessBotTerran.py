@@ -1,12 +1,14 @@
 from BuildListProcessBotBase import (
     BuildListProcessBotBase,
+    DEFAULT_LOOKAHEAD_DEPTH,
+    MatchCoordinator,
     Player,
     StartLocation,
+    TaskPlan,
     race_supplyUnit,
     raceBasicTownhall
 )
 import logging
-import math
 from sc2.data import race_worker
 from sc2.data import race_townhalls
 from sc2.position import Point2
@@ -19,9 +21,17 @@ from sc2.constants import (
 from sc2.ids.unit_typeid import UnitTypeId
 from sc2.game_data import UnitTypeData
 from BuildListProcessorDicts import BASE_BUILDINGS
+from PlacementGrid import PlacementGrid
 from sc2.dicts.unit_trained_from import UNIT_TRAINED_FROM
 
 terranAddonBuildings = {UnitTypeId.BARRACKS, UnitTypeId.FACTORY, UnitTypeId.STARPORT}
+terranReactors = {UnitTypeId.BARRACKSREACTOR, UnitTypeId.FACTORYREACTOR, UnitTypeId.STARPORTREACTOR, UnitTypeId.REACTOR}
+# units that can only be trained by a producer with a techlab
+terranTechlabUnits = {
+    UnitTypeId.MARAUDER, UnitTypeId.GHOST,
+    UnitTypeId.SIEGETANK, UnitTypeId.THOR,
+    UnitTypeId.RAVEN, UnitTypeId.BANSHEE, UnitTypeId.BATTLECRUISER
+}
 terranFullAddonBuildings = {UnitTypeId.BARRACKSREACTOR, UnitTypeId.BARRACKSTECHLAB, UnitTypeId.FACTORYREACTOR, UnitTypeId.FACTORYTECHLAB, UnitTypeId.STARPORTREACTOR, UnitTypeId.STARPORTTECHLAB}
 
 
@@ -34,30 +44,18 @@ class BuildListProcessBotTerran(BuildListProcessBotBase):
     # Init
     # ----------------------------------------
 
-    def __init__(self, inputBuildList, player: Player):
+    def __init__(self, inputBuildList, player: Player, coordinator: MatchCoordinator, profilePath: str = None, lookAheadDepth: int = DEFAULT_LOOKAHEAD_DEPTH, prepositionWorkers: bool = True, taskPlan: TaskPlan = None):
         """Initializes bot (see BuildListProcessBotBase).
         """
 
         # base class
-        BuildListProcessBotBase.__init__(self, inputBuildList, player)
+        BuildListProcessBotBase.__init__(self, inputBuildList, player, coordinator, profilePath, lookAheadDepth, prepositionWorkers, taskPlan)
         self.gridStart: Point2 = Point2()
         
         self.loggerChild = logging.getLogger("BuildListProcessBotTerran" + self.playerString)
 
-        # building grid
-        self.maxColLength = 32
-        # tells at which point the limit of a col in the grid is reached
-        self.colStop = Point2((0, 0))
-        self.plannedStructureSizes = dict()
-        # tells how many cols there are 
-        # also tells how many elements each of the following data structures has
-        self.numberOfCols = 0
-        # tells how wide each col is (double the building radius that can be placed in that col)
-        self.colsWidths = []
-        # tells where each col starts (Point2)
-        self.colsStarts = []
-        # tells the current build point within the cols (same as start point for now)
-        self.colsNextBuildPoint = []
+        # building grid (occupancy bitmap of the map, set up in on_start)
+        self.placementGrid: PlacementGrid = None
 
     # In theory not necessary because these could be replaced by methods from
     # from BuildListProcessBotBase but they are here because this is mostly
@@ -84,77 +82,80 @@ class BuildListProcessBotTerran(BuildListProcessBotBase):
     # Buildgrid
     # ----------------------------------------
 
-    def getNextBuildPositionAndAdvance(self, unitId):
-        """Build grid: Returns a build position and advances the grid.
+    def findBuildLocation(self, unitId: UnitTypeId):
+        """Build grid: Returns the free build location closest to the grid start.
 
-        Needs unit id to know the size of the building.
+        Buildings that can have an addon get room for it.
         """
-        unitTypeData: UnitTypeData = self.game_data.units[unitId.value]
-        radius = unitTypeData.footprint_radius
-        
-        if unitId in terranAddonBuildings:
-            radius += 1.0
-        
-        width = radius * 2.0
+        location: Point2 = self.placementGrid.findPosition(self.getStructureSize(unitId), self.gridStart, unitId in terranAddonBuildings)
+        if location is None:
+            raise Exception("No more build slots left!")
+        return location
 
-        for index in range(0, self.numberOfCols):
-            # dont care about row if it does not match the width of my building
-            if self.colsWidths[index] == width:
-                if self.colHasSpaceLeft(index):
-                    result = self.colsNextBuildPoint[index]
-                    self.advanceColsBuildPosition(index)
-                    return result
+    def getNextBuildLocationAndReserve(self, unitId: UnitTypeId):
+        """Build grid: Returns a build location and reserves it in the grid.
+        """
+        location: Point2 = self.findBuildLocation(unitId)
+        self.placementGrid.reserve(location, self.getStructureSize(unitId), unitId in terranAddonBuildings)
+        return location
 
-        raise Exception("No more build slots left!")
+    def peekBuildLocationForCurrentTask(self):
+        """Build grid: Returns where the current task would be built without reserving it.
 
-    def convertGridPositionToCenter(self, unitId: UnitTypeId, gridPosition: Point2):
-        """Build grid: Converts the grid position to the actual build position.
+        None for refineries (the geyser is chosen when building).
         """
+        if self.currentTask == UnitTypeId.REFINERY:
+            return None
+        if self.currentTask == UnitTypeId.COMMANDCENTER:
+            return self.expansionLocations[0] if self.expansionLocations else None
+        return self.findBuildLocation(self.currentTask)
 
+    # Production
+    # ----------------------------------------
 
-        # get radius
-        # important: only take actual size of building into account.
-        # for a factory we  will not use the adapted size with an addon attached
-        unitTypeData: UnitTypeData = self.game_data.units[unitId.value]
-        radius = unitTypeData.footprint_radius
-        result = gridPosition
-
-        if self.startLocation == StartLocation.BOTTOM_LEFT:
-            result = gridPosition.offset((radius, radius))
-        elif self.startLocation == StartLocation.BOTTOM_RIGHT:
-            result = gridPosition.offset((-radius, radius))
-        elif self.startLocation == StartLocation.TOP_LEFT:
-            result = gridPosition.offset((radius, -radius))
-        elif self.startLocation == StartLocation.TOP_RIGHT:
-            result = gridPosition.offset((-radius, -radius))
-        else:
-            raise Exception("Start location does not match one of four positions!")
-    
-        if unitId in terranAddonBuildings:
-            if self.startLocation == StartLocation.BOTTOM_LEFT:
-                result = result.offset((0.0, 2.0))
-            elif self.startLocation == StartLocation.BOTTOM_RIGHT:
-                result = result.offset((-2.0, 2.0))
-            elif self.startLocation == StartLocation.TOP_RIGHT:
-                result = result.offset((-2.0, 0.0))
-
-        return result
-
-    def colHasSpaceLeft(self, index):
-        """Build grid: Check if a column has space left to build another building.
+    def getProductionSlots(self, structure: Unit):
+        """Production: Number of units a structure can train at the same time.
+
+        Two with a finished reactor, otherwise one.
         """
-        width = self.colsWidths[index]
-        spaceLeft = abs(self.colStop.y - self.colsNextBuildPoint[index].y)
-        return spaceLeft >= width
-
-    def advanceColsBuildPosition(self, index):
-        """Build grid: Advances the build position within a column."""
-        if self.startLocation == StartLocation.TOP_LEFT or self.startLocation == StartLocation.TOP_RIGHT:
-            # from top to bottom: -
-            self.colsNextBuildPoint[index] = self.colsNextBuildPoint[index].offset((0, -self.colsWidths[index]))
-        else:
-            # from bottom to top: +
-            self.colsNextBuildPoint[index] = self.colsNextBuildPoint[index].offset((0, self.colsWidths[index]))
+        if structure.has_add_on:
+            addon: Unit = self.structures.find_by_tag(structure.add_on_tag)
+            if addon is not None and addon.is_ready and addon.type_id in terranReactors:
+                return 2
+        return 1
+
+    def getFreeProductionSlots(self, structure: Unit):
+        """Production: Number of slots of a structure that are neither training nor ordered in this step.
+        """
+        ordersGiven = sum(1 for action in self.actions if action.unit.tag == structure.tag)
+        return self.getProductionSlots(structure) - len(structure.orders) - ordersGiven
+
+    def producerHasFreeSlot(self, producer: Unit):
+        """Production: Structures with addons may train with a busy slot and need a techlab for some units.
+
+        An addon can only be built by an idle structure without an addon,
+        slots of a reactor do not count for it.
+        """
+        if self.currentTask in terranFullAddonBuildings:
+            return not producer.has_add_on and not producer.orders and producer.tag not in self.unit_tags_received_action
+        if producer.type_id not in terranAddonBuildings:
+            return BuildListProcessBotBase.producerHasFreeSlot(self, producer)
+        if self.currentTask in terranTechlabUnits and not producer.has_techlab:
+            return False
+        return self.getFreeProductionSlots(producer) > 0
+
+    def selectProducerWithFreeSlot(self):
+        """Production: Select the producer for the current task.
+
+        Every free slot starts the unit right away, so all of them finish at
+        the same time. Producers with a techlab are only used if the unit needs
+        one or nothing else is free, which keeps them free for those units.
+        The producer with the most free slots is preferred.
+        """
+        candidates = [producer for producer in self.getProducerUnitsForCurrentTask().ready if self.producerHasFreeSlot(producer)]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda producer: (producer.has_techlab and self.currentTask not in terranTechlabUnits, -self.getFreeProductionSlots(producer)))
 
     # Buidlist
     # ----------------------------------------   
@@ -176,17 +177,15 @@ class BuildListProcessBotTerran(BuildListProcessBotBase):
 
     async def on_step(self, iteration: int):
         """Called on each game step.
-        
-        Required by library. Slowed down as the fast steps caused errors. Requires
-        further evaluation to find a way of slowing down using library tools.
+
+        Required by library. The base schedules everything, including the
+        race specific step.
         """
+        await self.onStepBase(iteration)
 
-        # base does some more preparation -> only do something if base returns true
-        if BuildListProcessBotBase.onStepBase(self, iteration):
-            if iteration % 5 == 0:
-                # do business here
-                self.terranOnStep()
-            pass
+    def raceSpecificOnStep(self):
+        """Process the current task (see terranOnStep)."""
+        self.terranOnStep()
 
     def terranOnStep(self):
         """Called in on_step.
@@ -206,7 +205,7 @@ class BuildListProcessBotTerran(BuildListProcessBotBase):
         if ok:
             # if something is built by a worker we need to find a build position
             # this is handled in the then case of this if
-            if self.builtByWorker(self.currentTask):
+            if self.currentPlannedTask.builtByWorker:
 
                 # special cases: refinery and command centers:
                 if self.currentTask == UnitTypeId.REFINERY: 
@@ -220,9 +219,7 @@ class BuildListProcessBotTerran(BuildListProcessBotBase):
                     self.finishedCurrentTask()
                 else:
                     # all other buildings are handled here
-                    gridPosition: Point2 = self.getNextBuildPositionAndAdvance(self.currentTask)
-
-                    buildLocation: Point2 = self.convertGridPositionToCenter(self.currentTask,  gridPosition)
+                    buildLocation: Point2 = self.getNextBuildLocationAndReserve(self.currentTask)
 
                     worker: Unit = self.getWorker(buildLocation)
 
@@ -238,17 +235,14 @@ class BuildListProcessBotTerran(BuildListProcessBotBase):
                 
                 # somehow need to find out if its training or building
 
-                producers = self.getProducerIdsForCurrentTask()
-                taskInfo: UnitTypeData = self.game_data.units[self.currentTask.value]
-
                 # what to do next depends on whether the task is a structure or a unit
-                if IS_STRUCTURE in taskInfo.attributes:
+                if self.currentPlannedTask.isStructure:
                     # the task is a structure but one that is not built by an scv
 
                     self.loggerChild.info(str(self.currentTask) + " is a structure!")
                     success = False
-                    for structure in self.structures.idle:
-                        if structure.type_id in producers:
+                    for structure in self.getProducerUnitsForCurrentTask().ready:
+                        if self.producerHasFreeSlot(structure):
                             self.loggerChild.info("found the structure that can built it")
                             success = structure.build(self.currentTask)
                             if success:
@@ -260,15 +254,17 @@ class BuildListProcessBotTerran(BuildListProcessBotBase):
                         raise Exception("Check preconditions reported that it could be cast but could not be cast!")
                 else:
                     self.loggerChild.info(str(self.currentTask) + " is not a structure!")
+                    producer: Unit = self.selectProducerWithFreeSlot()
                     if self.producedInTownhall(self.currentTask):
-                        self.townhalls.idle[0].train(self.currentTask)
-                        self.finishedCurrentTask()
-                    else:
-                        unitsTrained = self.train(self.currentTask)
-                        if unitsTrained == 0:
+                        if producer is None:
                             self.loggerChild.info("could not train unit")
                         else:
+                            producer.train(self.currentTask)
                             self.finishedCurrentTask()
+                    elif producer is None or not producer.train(self.currentTask):
+                        self.loggerChild.info("could not train unit")
+                    else:
+                        self.finishedCurrentTask()
 
     # Startup Preparation
     # ----------------------------------------
@@ -282,98 +278,24 @@ class BuildListProcessBotTerran(BuildListProcessBotBase):
         # call base to handle enemy location
         BuildListProcessBotBase.onStartBase(self)
 
-        # left side of map
+        # the grid grows from a point between the main base and the map center
         if (self.startLocation == StartLocation.BOTTOM_LEFT):
             self.gridStart = self.game_info.player_start_location.offset((10, 10))
-            self.colStop = self.gridStart.offset((0, 32))
         if (self.startLocation == StartLocation.TOP_LEFT):
             self.gridStart = self.game_info.player_start_location.offset((10, -10))
-            self.colStop = self.gridStart.offset((0, -32))
-        # right side of map
         if (self.startLocation == StartLocation.BOTTOM_RIGHT):
             self.gridStart = self.game_info.player_start_location.offset((-10, 10))
-            self.colStop = self.gridStart.offset((0, 32))
         if (self.startLocation == StartLocation.TOP_RIGHT):
             self.gridStart = self.game_info.player_start_location.offset((-10, -10))
-            self.colStop = self.gridStart.offset((0, -32))
 
         self.loggerChild.info("Grid start: " + str(self.gridStart))
 
-        # fill self.plannedStructureSizes
-        for buildTask in self.buildList:
-            id = self.unitToId(buildTask)
-            self.loggerChild.info("id:" + str(id) +  " name: "+ str(buildTask))
-            if type(id) == UnitTypeId:
-                unitTypeData: UnitTypeData = self.game_data.units[id.value]
-                # if the building is a structure we store its footprint size
-                if self.builtByWorker(id):
-                    
-                    # make sure it is not a gas bulilding and not a base building
-                    if not id in ALL_GAS:
-                        if not id in race_townhalls[self.race]:
-                            radius = unitTypeData.footprint_radius
-                            # in case this is a building that might have an addon
-                            if id in terranAddonBuildings:
-                                # increase radius by 1 to safe space for possible addons
-                                radius += 1
-                            self.loggerChild.info("Adding " + str(id) + " to structure sizes with radius " + str(radius))
-                            if radius in self.plannedStructureSizes:
-                                self.plannedStructureSizes[radius] += 1
-                            else:
-                                self.plannedStructureSizes[radius] = 1
-
-        offsetBetweenCols = Point2((1, 0))
-        if self.startLocation == StartLocation.BOTTOM_RIGHT:
-            offsetBetweenCols = Point2((-1, 0))
-        if self.startLocation == StartLocation.TOP_LEFT:
-            offsetBetweenCols = Point2((1, 0))
-        if self.startLocation == StartLocation.TOP_RIGHT:
-            offsetBetweenCols = Point2((-1, 0))
-
-       
-
-        self.loggerChild.info("planned structure sizes:")
-        self.loggerChild.info(str(self.plannedStructureSizes))
-
-        # all the radiuses that need their own col
-        radiuses = []
-        for radius, count in self.plannedStructureSizes.items():
-            # compute how many cols are necessary
-            buildingsPerCol = self.maxColLength // (radius * 2) 
-            colsNecessary = math.ceil(count / buildingsPerCol)
-
-            self.numberOfCols += colsNecessary
-
-            for i in range(0, colsNecessary):
-                radiuses.append(radius)
-
-        # iteration variables
-        currentColStart = self.gridStart
-
-        for radius in radiuses:
-
-            self.colsWidths.append(radius * 2)
-
-            self.colsStarts.append(Point2(currentColStart))
-
-            # needs a copy
-            self.colsNextBuildPoint.append(Point2(currentColStart))
-            
-
-            # offset given by width of building
-            if self.startLocation == StartLocation.BOTTOM_LEFT or self.startLocation == StartLocation.TOP_LEFT:
-                currentColStart = currentColStart.offset((radius*2, 0))
-            else:
-                currentColStart = currentColStart.offset((radius * (-2), 0))
-            # extra offset to have some space in between cols
-            currentColStart = currentColStart.offset(offsetBetweenCols)
-
+        # buildable cells of the map
+        buildable = (self.game_info.placement_grid.data_numpy != 0) & (self.game_info.pathing_grid.data_numpy != 0)
+        self.placementGrid = PlacementGrid(buildable)
+        self.placementGrid.blockExpansions(self.expansion_locations_dict)
 
         self.loggerChild.info("Finished grid stuff!")
-        self.loggerChild.info("Number of cols: " + str(self.numberOfCols))
-        self.loggerChild.info("Cols widths: " + str(self.colsWidths))
-        self.loggerChild.info("colsStarts: " + str(self.colsStarts))
-        self.loggerChild.info("cols next build points: " + str(self.colsNextBuildPoint))
 
     # Attack
     # ----------------------------------------
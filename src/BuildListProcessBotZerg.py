@@ -1,10 +1,13 @@
 from BuildListProcessBotBase import (
     BuildListProcessBotBase,
+    DEFAULT_LOOKAHEAD_DEPTH,
+    MatchCoordinator,
     Player,
-    StartLocation,
+    TaskPlan,
     race_supplyUnit
 )
 import logging
+from typing import Dict, List, Tuple
 from sc2.position import Point2
 from sc2.units import Units
 from sc2.unit import Unit
@@ -13,7 +16,14 @@ from sc2.constants import (
 )
 from sc2.ids.unit_typeid import UnitTypeId
 from sc2.game_data import UnitTypeData
-from BuildListProcessorDicts import ZERG_BUILD_LOCATIONS
+from LarvaTracker import LarvaTracker
+from PlacementGrid import PlacementGrid
+
+# Definitions
+# ----------------------------------------
+
+# candidate build locations (closest to the main hatchery first) by structure size
+PlacementCandidates = Dict[Tuple[int, int], List[Point2]]
 
 
 # Class
@@ -21,24 +31,33 @@ from BuildListProcessorDicts import ZERG_BUILD_LOCATIONS
 
 """Zerg implementation.
 
-Zerg has static build location and certain forbidden 
-buildings (spine crawler etc.).
+Zerg places structures on the creep of the main hatchery and has certain
+forbidden buildings (spine crawler etc.).
 """
 class BuildListProcessBotZerg(BuildListProcessBotBase):
 
     # Constructor
     # ----------------------------------------
 
-    def __init__(self, inputBuildList, player: Player):
+    def __init__(self, inputBuildList, player: Player, coordinator: MatchCoordinator, profilePath: str = None, lookAheadDepth: int = DEFAULT_LOOKAHEAD_DEPTH, prepositionWorkers: bool = True, taskPlan: TaskPlan = None):
         """Initializes bot.
         """
 
         # base class
-        BuildListProcessBotBase.__init__(self, inputBuildList, player)
+        BuildListProcessBotBase.__init__(self, inputBuildList, player, coordinator, profilePath, lookAheadDepth, prepositionWorkers, taskPlan)
         # logger
         self.loggerChild = logging.getLogger("BuildListProcessBotZerg" + self.playerString)
-        # the place where the last building was placed
-        self.lastBuildLocation = Point2((0, 0))
+        # creep cells that are free for structures
+        self.placementGrid: PlacementGrid = None
+        # buildable cells ignoring creep (expansions and resources blocked)
+        self.buildableWithoutCreep = None
+        # creep cells that were free for structures at the start and their hash
+        self.startBuildable = None
+        self.startBuildableHash = ""
+        # candidate build locations of this map and start location
+        self.placementCandidates: PlacementCandidates = dict()
+        # larvae per hatchery and their spawn timers
+        self.larvaTracker = LarvaTracker()
 
     # Startup preparation
     # ----------------------------------------
@@ -51,15 +70,17 @@ class BuildListProcessBotZerg(BuildListProcessBotBase):
 
         # call base to handle enemy location
         BuildListProcessBotBase.onStartBase(self)
-        self.lastBuildLocation = self.game_info.player_start_location
-        if self.startLocation == StartLocation.BOTTOM_LEFT:
-            self.lastBuildLocation = self.lastBuildLocation.offset((2.0, 2.0))
-        if self.startLocation == StartLocation.BOTTOM_RIGHT:
-            self.lastBuildLocation = self.lastBuildLocation.offset((-2.0, 2.0))
-        if self.startLocation == StartLocation.TOP_LEFT:
-            self.lastBuildLocation = self.lastBuildLocation.offset((2.0, -2.0))
-        if self.startLocation == StartLocation.TOP_RIGHT:
-            self.lastBuildLocation = self.lastBuildLocation.offset((-2.0, -2.0)) 
+
+        # structures need creep on every cell, only the creep of the main hatchery exists now
+        buildable = (self.game_info.placement_grid.data_numpy != 0) & (self.game_info.pathing_grid.data_numpy != 0)
+        self.placementGrid = PlacementGrid(buildable)
+        self.placementGrid.blockExpansions(self.expansion_locations_dict)
+        self.buildableWithoutCreep = self.placementGrid.buildable.copy()
+        self.placementGrid.buildable &= self.state.creep.data_numpy != 0
+
+        self.startBuildable = self.placementGrid.buildable.copy()
+        self.startBuildableHash = self.mapAnalysisCache.gridHash(self.startBuildable)
+        self.loggerChild.info("Placement grid ready (" + str(int(self.placementGrid.buildable.sum())) + " buildable creep cells)")
         return
 
     def scanBuildList(self):
@@ -81,8 +102,6 @@ class BuildListProcessBotZerg(BuildListProcessBotBase):
             if unitId in forbiddenBuildings:
                 raise Exception(str(unitId) + " is not allowed for this bot!")
 
-        # TODO: scan build list for double buildings (structures of same type)
-
         self.loggerChild.info("BuildList has no errors.")
 
     def prepareBuildListCompletedCheck(self):
@@ -114,12 +133,59 @@ class BuildListProcessBotZerg(BuildListProcessBotBase):
     # Build Locations
     # ----------------------------------------
 
+    def getPlacementCandidates(self, size: Tuple[int, int]):
+        """Candidate build locations for a structure size (loaded or computed on first use).
+
+        Computed from the creep at the start of the game, so they are the same
+        for every match on this map and start location and are stored with
+        the map analysis (see MapAnalysis.py).
+        """
+        if size not in self.placementCandidates:
+            anchor = self.game_info.player_start_location
+            self.placementCandidates[size] = self.mapAnalysisCache.getPlacementCandidates(
+                self.game_info.map_name,
+                self.startBuildableHash,
+                anchor,
+                size,
+                lambda: PlacementGrid(self.startBuildable).candidatePositions(size, anchor)
+            )
+        return self.placementCandidates[size]
+
+    def findBuildLocation(self, unitId: UnitTypeId):
+        """The first candidate build location that is still free (None if there is none).
+
+        Searches the grid if all candidates are taken (the creep may have
+        spread since the start).
+        """
+        size = self.getStructureSize(unitId)
+        for location in self.getPlacementCandidates(size):
+            if self.placementGrid.fits(location, size):
+                return location
+        self.placementGrid.buildable = self.buildableWithoutCreep & (self.state.creep.data_numpy != 0)
+        return self.placementGrid.findPosition(size, self.game_info.player_start_location)
+
     def getBuildLocationForCurrentTask(self):
-        """ Lookup the build location for zerg buildings.
+        """ Get and reserve the build location for zerg buildings.
 
-        Build location is static as zerg needs creep to place buildings.
+        Zerg needs creep to place buildings, so they are placed around the
+        main hatchery.
         """
-        return ZERG_BUILD_LOCATIONS[self.currentTask][self.startLocation]
+        location: Point2 = self.findBuildLocation(self.currentTask)
+        if location is None:
+            raise Exception("No build location on creep left for " + str(self.currentTask) + "!")
+        self.placementGrid.reserve(location, self.getStructureSize(self.currentTask))
+        return location
+
+    def peekBuildLocationForCurrentTask(self):
+        """Returns where the current task will be built.
+
+        None for extractors (the geyser is chosen when building).
+        """
+        if self.currentTask == UnitTypeId.EXTRACTOR:
+            return None
+        if self.currentTask == UnitTypeId.HATCHERY:
+            return self.expansionLocations[0] if self.expansionLocations else None
+        return self.findBuildLocation(self.currentTask)
 
     # Building
     # ----------------------------------------
@@ -162,7 +228,8 @@ class BuildListProcessBotZerg(BuildListProcessBotBase):
                 else:
                     self.loggerChild.info("Even though all preconditions were fulfilled " + str(self.currentTask) + " could not be built!")
         else:
-            producer: Unit = producers.random
+            # producers that already got an order in this step are busy
+            producer: Unit = producers.tags_not_in(self.unit_tags_received_action).random
             # produce!
             result = producer.train(self.currentTask, queue=False, can_afford_check=True)
             if result:
@@ -176,8 +243,11 @@ class BuildListProcessBotZerg(BuildListProcessBotBase):
         need no building location just produce a unit from the producer
         get the producers
         """
+        if UnitTypeId.LARVA in self.getProducerIdsForCurrentTask():
+            self.trainBatchFromLarvae()
+            return
         possibleProducers: Units = self.getProducerUnitsForCurrentTask()
-        producers: Units = possibleProducers.idle + possibleProducers.gathering
+        producers: Units = (possibleProducers.idle + possibleProducers.gathering).tags_not_in(self.unit_tags_received_action)
         if producers:
             # select one of them randomly 
             # TODO: is there a better way to do this?
@@ -189,6 +259,57 @@ class BuildListProcessBotZerg(BuildListProcessBotBase):
             else:
                 self.loggerChild.info("Even though all preconditions were fulfilled " + str(self.currentTask) + " could not be trained!")
 
+    # Larvae
+    # ----------------------------------------
+
+    def updateLarvaTracker(self):
+        """Update larvae per hatchery (once per step).
+        """
+        self.larvaTracker.update(self.state.game_loop, self.townhalls, self.larva)
+
+    def predictProducerLoop(self):
+        """Next larva spawn if the current task is trained from larvae.
+        """
+        if UnitTypeId.LARVA not in self.getProducerIdsForCurrentTask():
+            return None
+        self.updateLarvaTracker()
+        return self.larvaTracker.nextSpawnLoop()
+
+    def trainBatchFromLarvae(self):
+        """Train the current task and the identical tasks behind it at once.
+
+        As many as there are free larvae, resources and supply for (after
+        everything that is reserved). Larvae of the hatchery closest to the
+        rally point (the map center where the army gathers) are used first.
+        """
+        self.updateLarvaTracker()
+        task = self.currentPlannedTask
+        larvae = [
+            larva for larva in self.larvaTracker.getLarvaeByPreference(self.townhalls, self.game_info.map_center)
+            if larva.tag not in self.unit_tags_received_action
+        ]
+        reservedMinerals, reservedVespene = self.getReservedCosts()
+        limits = [len(larvae), 1 + self.countFollowingIdenticalTasks()]
+        if task.minerals > 0:
+            limits.append(int((self.minerals - reservedMinerals - self.windowReservedMinerals) // task.minerals))
+        if task.vespene > 0:
+            limits.append(int((self.vespene - reservedVespene - self.windowReservedVespene) // task.vespene))
+        if task.supply > 0:
+            limits.append(int((self.supply_left - self.windowReservedSupply) // task.supply))
+        batchSize = min(limits)
+        if batchSize < 1:
+            self.loggerChild.info("Even though all preconditions were fulfilled " + str(self.currentTask) + " could not be trained!")
+            return
+
+        batchSize = sum(1 for larva in larvae[:batchSize] if larva.train(self.currentTask))
+        if batchSize < 1:
+            self.loggerChild.info("Even though all preconditions were fulfilled " + str(self.currentTask) + " could not be trained!")
+            return
+        if batchSize > 1:
+            self.loggerChild.info("Training " + str(batchSize) + " times " + str(self.currentTask) + " in one step")
+        self.finishedCurrentTask()
+        self.batchedTasks = batchSize - 1
+
     # Run
     # ----------------------------------------
 
@@ -218,9 +339,7 @@ class BuildListProcessBotZerg(BuildListProcessBotBase):
 
         if ok:
             # next check if the result is a structure or a unit
-            taskInfo: UnitTypeData = self.game_data.units[self.currentTask.value]
-
-            if IS_STRUCTURE in taskInfo.attributes:
+            if self.currentPlannedTask.isStructure:
                 
                 self.buildStructure()
 
@@ -230,13 +349,12 @@ class BuildListProcessBotZerg(BuildListProcessBotBase):
 
     async def on_step(self, iteration: int):
         """Called on each game step.
-        
-        Required by library. Slowed down as the fast steps caused errors. Requires
-        further evaluation to find a way of slowing down using library tools.
-        """
-        # base does some more preparation -> only do something if base returns true
-        if BuildListProcessBotBase.onStepBase(self, iteration):
-            if iteration % 5 == 0:
-                # do business here
-                self.zergOnStep()
-            pass
\ No newline at end of file
+
+        Required by library. The base schedules everything, including the
+        race specific step.
+        """
+        await self.onStepBase(iteration)
+
+    def raceSpecificOnStep(self):
+        """Process the current task (see zergOnStep)."""
+        self.zergOnStep()
@@ -1,9 +1,11 @@
+import json
+import os
+
 from sc2.ids.ability_id import AbilityId
 from sc2.ids.unit_typeid import UnitTypeId
-from sc2.position import Point2
 
 from enum import Enum
-from typing import Union, Dict, Set
+from typing import Union, Dict, Set, NamedTuple
 
 TERRAN_STRUCTURE_UPGRADES: Dict[AbilityId, Set[UnitTypeId]] = {
 
@@ -97,6 +99,21 @@ CONVERT_TO_ID = {
     "Hatchery": UnitTypeId.HATCHERY
 }
 
+# units and structures that are morphed from an existing one instead of being
+# built or trained (the unit keeps its tag and only changes its type)
+MORPHED_UNITS: Set[UnitTypeId] = {
+    UnitTypeId.LAIR,
+    UnitTypeId.HIVE,
+    UnitTypeId.GREATERSPIRE,
+    UnitTypeId.ORBITALCOMMAND,
+    UnitTypeId.PLANETARYFORTRESS,
+    UnitTypeId.BANELING,
+    UnitTypeId.RAVAGER,
+    UnitTypeId.OVERSEER,
+    UnitTypeId.BROODLORD,
+    UnitTypeId.LURKERMP
+}
+
 BASE_BUILDINGS = {
     UnitTypeId.BARRACKSREACTOR: {UnitTypeId.BARRACKS},
     UnitTypeId.BARRACKSTECHLAB: {UnitTypeId.BARRACKS},
@@ -106,60 +123,93 @@ BASE_BUILDINGS = {
     UnitTypeId.STARPORTTECHLAB: {UnitTypeId.STARPORT}
 }
 
-ZERG_BUILD_LOCATIONS: Dict[UnitTypeId, Dict[StartLocation, Point2]] = {
-    UnitTypeId.SPAWNINGPOOL: {
-        StartLocation.BOTTOM_LEFT: Point2((28.5, 19.5)),
-        StartLocation.BOTTOM_RIGHT: Point2((123.5, 19.5)),
-        StartLocation.TOP_LEFT: Point2((28.5, 128.5)),
-        StartLocation.TOP_RIGHT: Point2((123.5, 128.5))
-    },
-    UnitTypeId.EVOLUTIONCHAMBER: {
-        StartLocation.BOTTOM_LEFT: Point2((28.5, 22.5)),
-        StartLocation.BOTTOM_RIGHT: Point2((123.5, 22.5)),
-        StartLocation.TOP_LEFT: Point2((28.5, 125.5)),
-        StartLocation.TOP_RIGHT: Point2((123.5, 125.5))
-    },
-    UnitTypeId.ROACHWARREN: {
-        StartLocation.BOTTOM_LEFT: Point2((28.5, 25.5)),
-        StartLocation.BOTTOM_RIGHT: Point2((123.5, 25.5)),
-        StartLocation.TOP_LEFT: Point2((28.5, 122.5)),
-        StartLocation.TOP_RIGHT: Point2((123.5, 122.5))
-    },
-    UnitTypeId.BANELINGNEST: {
-        StartLocation.BOTTOM_LEFT: Point2((28.5, 28.5)),
-        StartLocation.BOTTOM_RIGHT: Point2((123.5, 29.5)),
-        StartLocation.TOP_LEFT: Point2((28.5, 119.5)),
-        StartLocation.TOP_RIGHT: Point2((123.5, 119.5))
-    },
-    UnitTypeId.HYDRALISKDEN: {
-        StartLocation.BOTTOM_LEFT: Point2((25.5, 28.5)),
-        StartLocation.BOTTOM_RIGHT: Point2((126.5, 29.5)),
-        StartLocation.TOP_LEFT: Point2((25.5, 119.5)),
-        StartLocation.TOP_RIGHT: Point2((126.5, 119.5))
-    },
-    UnitTypeId.INFESTATIONPIT: {
-        StartLocation.BOTTOM_LEFT: Point2((22.5, 28.5)),
-        StartLocation.BOTTOM_RIGHT: Point2((129.5, 29.5)),
-        StartLocation.TOP_LEFT: Point2((22.5, 119.5)),
-        StartLocation.TOP_RIGHT: Point2((129.5, 119.5))
-    },
-    UnitTypeId.LURKERDENMP: {
-        StartLocation.BOTTOM_LEFT: Point2((19.5, 28.5)),
-        StartLocation.BOTTOM_RIGHT: Point2((132.5, 29.5)),
-        StartLocation.TOP_LEFT: Point2((19.5, 119.5)),
-        StartLocation.TOP_RIGHT: Point2((132.5, 119.5))
-    },
-    UnitTypeId.SPIRE: {
-        StartLocation.BOTTOM_LEFT: Point2((31.5, 19.5)),
-        StartLocation.BOTTOM_RIGHT: Point2((120.5, 19.5)),
-        StartLocation.TOP_LEFT: Point2((31.5, 128.5)),
-        StartLocation.TOP_RIGHT: Point2((120.5, 128.5))
-    },
-    UnitTypeId.ULTRALISKCAVERN: {
-        StartLocation.BOTTOM_LEFT: Point2((31.5, 22.5)),
-        StartLocation.BOTTOM_RIGHT: Point2((120.5, 22.5)),
-        StartLocation.TOP_LEFT: Point2((31.5, 125.5)),
-        StartLocation.TOP_RIGHT: Point2((120.5, 125.5))
-    },
-    
+
+class ProductionData(NamedTuple):
+    """Static production data of a unit or structure.
+
+    Build time is given in seconds (game speed faster). Morphs (e.g. Lair,
+    Baneling) only list the additional cost and supply on top of the unit
+    they are morphed from. A zergling is listed as the pair a task produces.
+    """
+    minerals: int
+    vespene: int
+    supply: float
+    buildTime: float
+    supplyProvided: int = 0
+    isStructure: bool = False
+
+
+# generated from the game data by UnitDataTable.py whenever the data version of
+# the game changes (a table without data version was entered by hand)
+UNIT_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "UnitData.json")
+
+
+def productionDataFromTable(table: dict) -> Dict[UnitTypeId, ProductionData]:
+    """Production data of every unit of a unit data table.
+    """
+    return {UnitTypeId[name]: ProductionData(**fields) for name, fields in table["units"].items()}
+
+
+def loadProductionData(path: str = UNIT_DATA_PATH) -> Dict[UnitTypeId, ProductionData]:
+    """Read the production data from a unit data table.
+    """
+    with open(path, "r") as file:
+        return productionDataFromTable(json.load(file))
+
+
+PRODUCTION_DATA: Dict[UnitTypeId, ProductionData] = loadProductionData()
+
+
+class CombatData(NamedTuple):
+    """Static combat data of an army unit.
+
+    Damage is per attack without bonus damage, cooldown is given in seconds
+    (game speed faster). Units without a weapon have zero attacks.
+    """
+    hitPoints: int
+    armor: int
+    isAir: bool
+    groundDamage: float
+    groundAttacks: int
+    airDamage: float
+    airAttacks: int
+    cooldown: float
+
+
+COMBAT_DATA: Dict[UnitTypeId, CombatData] = {
+    # TERRAN:
+    UnitTypeId.MARINE: CombatData(45, 0, False, 6, 1, 6, 1, 0.61),
+    UnitTypeId.MARAUDER: CombatData(125, 1, False, 10, 1, 0, 0, 1.07),
+    UnitTypeId.REAPER: CombatData(60, 0, False, 4, 2, 0, 0, 0.79),
+    UnitTypeId.GHOST: CombatData(100, 0, False, 10, 1, 10, 1, 1.07),
+    UnitTypeId.HELLION: CombatData(90, 0, False, 8, 1, 0, 0, 1.79),
+    UnitTypeId.HELLIONTANK: CombatData(135, 0, False, 18, 1, 0, 0, 1.43),
+    # one mine shot every 29 seconds
+    UnitTypeId.WIDOWMINE: CombatData(90, 0, False, 125, 1, 125, 1, 29.0),
+    UnitTypeId.SIEGETANK: CombatData(175, 1, False, 15, 1, 0, 0, 0.74),
+    UnitTypeId.CYCLONE: CombatData(120, 1, False, 11, 1, 11, 1, 0.71),
+    UnitTypeId.THOR: CombatData(400, 1, False, 30, 2, 6, 4, 0.91),
+    UnitTypeId.VIKINGFIGHTER: CombatData(135, 0, True, 0, 0, 10, 2, 1.43),
+    UnitTypeId.MEDIVAC: CombatData(150, 1, True, 0, 0, 0, 0, 1.0),
+    UnitTypeId.LIBERATOR: CombatData(180, 0, True, 0, 0, 5, 2, 1.29),
+    UnitTypeId.RAVEN: CombatData(140, 1, True, 0, 0, 0, 0, 1.0),
+    UnitTypeId.BANSHEE: CombatData(140, 0, True, 12, 2, 0, 0, 0.89),
+    UnitTypeId.BATTLECRUISER: CombatData(550, 3, True, 8, 1, 5, 1, 0.16),
+
+    # ZERG:
+    UnitTypeId.QUEEN: CombatData(175, 1, False, 4, 2, 9, 1, 0.71),
+    UnitTypeId.ZERGLING: CombatData(35, 0, False, 5, 1, 0, 0, 0.497),
+    # explodes once, counted as one attack per second
+    UnitTypeId.BANELING: CombatData(30, 0, False, 16, 1, 0, 0, 1.0),
+    UnitTypeId.ROACH: CombatData(145, 1, False, 16, 1, 0, 0, 1.43),
+    UnitTypeId.RAVAGER: CombatData(120, 1, False, 16, 1, 0, 0, 1.14),
+    UnitTypeId.HYDRALISK: CombatData(90, 0, False, 12, 1, 12, 1, 0.59),
+    UnitTypeId.LURKERMP: CombatData(200, 1, False, 20, 1, 0, 0, 1.43),
+    UnitTypeId.INFESTOR: CombatData(90, 0, False, 0, 0, 0, 0, 1.0),
+    UnitTypeId.MUTALISK: CombatData(120, 0, True, 9, 1, 9, 1, 1.09),
+    UnitTypeId.CORRUPTOR: CombatData(200, 2, True, 0, 0, 14, 1, 1.36),
+    UnitTypeId.ULTRALISK: CombatData(500, 2, False, 35, 1, 0, 0, 0.61),
+    UnitTypeId.BROODLORD: CombatData(225, 1, True, 20, 1, 0, 0, 1.79),
+    UnitTypeId.VIPER: CombatData(150, 1, True, 0, 0, 0, 0, 1.0),
+    UnitTypeId.OVERSEER: CombatData(200, 1, True, 0, 0, 0, 0, 1.0)
 }
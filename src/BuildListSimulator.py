@@ -0,0 +1,640 @@
+import heapq
+import itertools
+import math
+from typing import Dict, FrozenSet, List, NamedTuple, Set, Tuple
+
+from sc2.data import Race, race_worker, race_townhalls, race_gas
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.constants import EQUIVALENTS_FOR_TECH_PROGRESS
+from BuildListProcessorDicts import (
+    CONVERT_TO_ID,
+    MORPHED_UNITS,
+    PRODUCTION_DATA
+)
+from GameDefinitions import (
+    DEFAULT_LOOKAHEAD_DEPTH,
+    GAME_LOOPS_PER_SECOND,
+    MAX_VESPENE_WORKER_RATIO,
+    SUPPLY_LIMIT,
+    getTaskProducerIds,
+    race_startUnits,
+    race_supplyUnit,
+    race_techRequirement
+)
+
+# Definitions
+# ----------------------------------------
+
+# the library runs 8 game loops per step and the bots act in every step (see FrameScheduler)
+STEP_LOOPS = 8
+
+# income per gathering worker and second
+MINERALS_PER_WORKER_SECOND = 0.94
+# workers beyond two per mineral patch only add a bit
+MINERALS_PER_EXTRA_WORKER_SECOND = 0.6
+VESPENE_PER_WORKER_SECOND = 0.94
+
+MINERAL_WORKERS_PER_BASE = 16
+EXTRA_MINERAL_WORKERS_PER_BASE = 8
+WORKERS_PER_GAS_BUILDING = 3
+
+# a worker needs some time to walk to the build location
+WORKER_TRAVEL_LOOPS = 90
+
+LARVA_PER_TOWNHALL = 3
+LARVA_SPAWN_LOOPS = 246
+
+# results of the precondition check of a task
+TASK_STARTABLE = 0
+TASK_WAITS_FOR_RESOURCES = 1
+TASK_WAITS_FOR_TASK = 2
+TASK_WAITS = 3
+
+# kinds of events
+EVENT_READY = 0
+EVENT_MORPHED = 1
+EVENT_WORKER_FREE = 2
+EVENT_LARVA = 3
+
+# the simulation keys everything by the value of the UnitTypeId, hashing the enum is slow
+SUPPLY_PROVIDED: Dict[int, int] = {unitId.value: data.supplyProvided for unitId, data in PRODUCTION_DATA.items()}
+
+
+class TaskTiming(NamedTuple):
+    """Predicted start and finish of one build list task in game loops.
+    """
+    name: str
+    unitId: UnitTypeId
+    startLoop: int
+    finishLoop: int
+
+
+class SimulationResult(NamedTuple):
+    """Predicted timings of a whole build list.
+
+    completionLoop is the game loop at which the last task finishes.
+    """
+    tasks: List[TaskTiming]
+    completionLoop: int
+
+
+class SimulatedTask(NamedTuple):
+    """Everything the simulation needs to know about one build list task (see PlannedTask).
+
+    Unit types are given as values of the UnitTypeId (0 if the task has no
+    tech requirement).
+    """
+    name: str
+    unitId: UnitTypeId
+    typeId: int
+    minerals: int
+    vespene: int
+    supply: float
+    buildLoops: int
+    producerIds: FrozenSet[int]
+    requirement: int
+    requirementEquivalents: FrozenSet[int]
+    isMorph: bool
+    usesLarva: bool
+
+
+# Class
+# ----------------------------------------
+
+class SimulatedUnit:
+    """A ready unit or structure in the simulation (or one that is about to be ready).
+
+    Only tracks what the simulation needs: its type, until when it is busy,
+    what it turns into (morphs) and its larva (zerg townhalls).
+    """
+
+    __slots__ = ("typeId", "busyUntil", "morphInto", "larva", "nextLarvaLoop")
+
+    def __init__(self, typeId: int, readyLoop: int):
+        self.typeId = typeId
+        self.busyUntil = readyLoop
+        self.morphInto = 0
+        # only used by zerg townhalls
+        self.larva = 0
+        self.nextLarvaLoop = -1
+
+
+class BuildListSimulator:
+    """Forward simulation of a build list without launching SC2.
+
+    Processes the build list like BuildListProcessBotBase: the bot acts in
+    every step, keeps a window of lookAheadDepth tasks and dispatches every
+    task of the window whose producer, costs (with the costs of the waiting
+    tasks in front of it reserved) and tech requirement are fulfilled and
+    which does not depend on a waiting task (see processTaskWindow). Zerg
+    units of identical tasks are trained from larvae in one step.
+
+    The simulation jumps from event to event (something finishes, a larva
+    spawns or a waiting task becomes affordable) instead of going through
+    every step. Income is modelled per gathering worker with saturation per
+    base. Timings are estimates, they ignore travel distances, mining
+    fluctuations and reactors.
+    """
+
+    # Constructor
+    # ----------------------------------------
+
+    def __init__(self, race: Race, lookAheadDepth: int = DEFAULT_LOOKAHEAD_DEPTH):
+        """Initialize the simulator for one race.
+
+        The simulator can be reused for any number of build lists of that race.
+        """
+        if race not in race_startUnits:
+            raise Exception("The simulator does not support " + str(race) + "!")
+        if lookAheadDepth < 1:
+            raise Exception("Look-ahead depth must be at least one! Have: " + str(lookAheadDepth))
+        self.race = race
+        self.lookAheadDepth = lookAheadDepth
+        self.worker = race_worker[race].value
+        self.townhallIds = tuple(townhall.value for townhall in race_townhalls[race])
+        self.gasBuilding = race_gas[race].value
+        self.supplyUnit = race_supplyUnit[race].value
+        self.techRequirement = race_techRequirement[race]
+        # compiled tasks by name, shared by all build lists of this simulator
+        self.compiledTasks: Dict[str, SimulatedTask] = dict()
+
+    # Running
+    # ----------------------------------------
+
+    def simulate(self, buildList: List[str]) -> SimulationResult:
+        """Predict start and finish loops for every task in the build list.
+
+        Raises an exception in the same situations in which the bot would
+        (unknown task, missing producer, missing tech requirement, ...).
+        """
+        plan = [self.getTask(taskName) for taskName in buildList]
+        self.reset()
+        startLoops = [0] * len(plan)
+        finishLoops = [0] * len(plan)
+
+        # indices of the tasks in the window
+        window: List[int] = list()
+        nextIndex = 0
+        while True:
+            # the window is filled at the start of every step
+            while len(window) < self.lookAheadDepth and nextIndex < len(plan):
+                window.append(nextIndex)
+                nextIndex += 1
+            if not window:
+                break
+            window, nextIndex = self.processWindow(plan, window, nextIndex, startLoops, finishLoops)
+            if window or nextIndex < len(plan):
+                self.advanceToNextDecision(plan, window, nextIndex)
+
+        tasks = [TaskTiming(task.name, task.unitId, startLoops[index], finishLoops[index]) for index, task in enumerate(plan)]
+        return SimulationResult(tasks, max(finishLoops, default=0))
+
+    def processWindow(self, plan: List[SimulatedTask], window: List[int], nextIndex: int, startLoops: List[int], finishLoops: List[int]) -> Tuple[List[int], int]:
+        """Dispatch every task of the window that can be started at the current loop.
+
+        Returns the waiting tasks and the index of the next task of the plan.
+        Remembers the waiting tasks that only wait for minerals or vespene
+        (see advanceToNextDecision).
+        """
+        waiting: List[int] = list()
+        waitingTasks: List[SimulatedTask] = list()
+        self.resourceWaits = list()
+        self.onlyResourceWaits = True
+        reservedMinerals = 0
+        reservedVespene = 0
+        reservedSupply = 0
+        # identical tasks that were trained together with a task in front of them
+        skippedTasks = 0
+        for position, index in enumerate(window):
+            if skippedTasks > 0:
+                skippedTasks -= 1
+                continue
+            task = plan[index]
+            if waitingTasks and self.dependsOnWaitingTasks(task, waitingTasks):
+                status = TASK_WAITS_FOR_TASK
+            else:
+                status = self.checkPreconditions(task, reservedMinerals, reservedVespene, reservedSupply, bool(waitingTasks))
+            if status != TASK_STARTABLE:
+                if status == TASK_WAITS_FOR_RESOURCES:
+                    self.resourceWaits.append((task, reservedMinerals, reservedVespene))
+                elif status == TASK_WAITS:
+                    self.onlyResourceWaits = False
+                waiting.append(index)
+                waitingTasks.append(task)
+                reservedMinerals += task.minerals
+                reservedVespene += task.vespene
+                reservedSupply += task.supply
+                continue
+            startLoops[index] = self.loop
+            finishLoops[index] = self.startTask(task)
+
+            if not task.usesLarva:
+                continue
+            # the identical tasks behind it are trained from larvae in the same step (see trainBatchFromLarvae)
+            for followingIndex in itertools.chain(window[position + 1:], range(nextIndex, len(plan))):
+                if plan[followingIndex] is not task or self.checkPreconditions(task, reservedMinerals, reservedVespene, reservedSupply, True) != TASK_STARTABLE:
+                    break
+                startLoops[followingIndex] = self.loop
+                finishLoops[followingIndex] = self.startTask(task)
+                if followingIndex < nextIndex:
+                    skippedTasks += 1
+                else:
+                    nextIndex += 1
+        return (waiting, nextIndex)
+
+    def reset(self):
+        """Set up the state at the start of a game.
+        """
+        self.loop = 0
+        self.minerals = 50.0
+        self.vespene = 0.0
+        self.supplyUsed = 0.0
+        self.supplyCap = 0
+        # ready units by type and counts of ready units, units in construction and morph targets
+        self.units: Dict[int, List[SimulatedUnit]] = dict()
+        self.readyCounts: Dict[int, int] = dict()
+        self.constructingCounts: Dict[int, int] = dict()
+        self.morphingCounts: Dict[int, int] = dict()
+        # workers that are on their way to build something
+        self.busyWorkers = 0
+        # (loop, sequence number, kind, unit) ordered by loop
+        self.events: List[Tuple[int, int, int, SimulatedUnit]] = list()
+        self.eventCount = 0
+        # waiting tasks that only wait for minerals or vespene with the costs reserved in front of them
+        self.resourceWaits: List[Tuple[SimulatedTask, int, int]] = list()
+        self.onlyResourceWaits = False
+        # income only changes when something starts or finishes
+        self.economyChanged = True
+        self.income = (0.0, 0.0)
+
+        for unitId, count in race_startUnits[self.race].items():
+            for i in range(0, count):
+                unit = SimulatedUnit(unitId.value, 0)
+                self.addReadyUnit(unit)
+                self.supplyUsed += PRODUCTION_DATA[unitId].supply
+                if unit.typeId in self.townhallIds and self.race == Race.Zerg:
+                    unit.larva = LARVA_PER_TOWNHALL
+
+    def getTask(self, taskName: str) -> SimulatedTask:
+        """Compile a task once per simulator.
+        """
+        task = self.compiledTasks.get(taskName)
+        if task is not None:
+            return task
+        if taskName not in CONVERT_TO_ID:
+            raise Exception(taskName + " is not available in CONVERT_TO_ID!")
+        unitId: UnitTypeId = CONVERT_TO_ID[taskName]
+        data = PRODUCTION_DATA[unitId]
+        producerIds = getTaskProducerIds(unitId)
+        requirement = self.techRequirement.get(unitId, UnitTypeId.NOTAUNIT)
+        requirementEquivalents = {requirement} | set(EQUIVALENTS_FOR_TECH_PROGRESS.get(requirement, []))
+        task = SimulatedTask(
+            taskName,
+            unitId,
+            unitId.value,
+            data.minerals,
+            data.vespene,
+            data.supply,
+            round(data.buildTime * GAME_LOOPS_PER_SECOND),
+            frozenset(producerId.value for producerId in producerIds),
+            requirement.value,
+            frozenset(equivalent.value for equivalent in requirementEquivalents),
+            unitId in MORPHED_UNITS,
+            UnitTypeId.LARVA in producerIds
+        )
+        self.compiledTasks[taskName] = task
+        return task
+
+    # Time
+    # ----------------------------------------
+
+    def pushEvent(self, loop: int, kind: int, unit: SimulatedUnit):
+        """Schedule an event.
+        """
+        self.eventCount += 1
+        heapq.heappush(self.events, (loop, self.eventCount, kind, unit))
+
+    def advanceToNextDecision(self, plan: List[SimulatedTask], window: List[int], nextIndex: int):
+        """Advance to the next loop at which the bot could dispatch a task.
+
+        If every waiting task only waits for minerals or vespene (or for a
+        task in front of it) the events on the way only change the income.
+        They are processed without going through the window again, except
+        for morphs which change the producers.
+        """
+        events = self.events
+        while self.onlyResourceWaits and events:
+            eventLoop, _, kind, unit = events[0]
+            if kind == EVENT_MORPHED or eventLoop > self.nextDecisionLoop(plan, window, nextIndex, False):
+                break
+            heapq.heappop(events)
+            self.gatherUntil(eventLoop)
+            self.processEvent(kind, unit)
+        self.advanceTo(self.nextDecisionLoop(plan, window, nextIndex, True))
+
+    def nextDecisionLoop(self, plan: List[SimulatedTask], window: List[int], nextIndex: int, includeEvents: bool):
+        """The next loop at which the bot could dispatch a task.
+
+        Either something finishes (if includeEvents is set), a task that only
+        waits for minerals or vespene becomes affordable or the window can
+        take the next task of the plan. Everything else only changes when
+        something finishes. Rounded up to the next step.
+        """
+        result = self.events[0][0] if includeEvents and self.events else math.inf
+        if len(window) < self.lookAheadDepth and nextIndex < len(plan):
+            result = self.loop + 1
+
+        mineralRate, vespeneRate = self.incomePerLoop()
+        for task, reservedMinerals, reservedVespene in self.resourceWaits:
+            missingMinerals = task.minerals + reservedMinerals - self.minerals
+            missingVespene = task.vespene + reservedVespene - self.vespene
+            affordLoop = self.loop
+            if missingMinerals > 0 and mineralRate > 0:
+                affordLoop = max(affordLoop, self.loop + math.ceil(missingMinerals / mineralRate))
+            if missingVespene > 0 and vespeneRate > 0:
+                affordLoop = max(affordLoop, self.loop + math.ceil(missingVespene / vespeneRate))
+            if affordLoop > self.loop:
+                result = min(result, affordLoop)
+
+        if result == math.inf:
+            if not includeEvents:
+                return result
+            raise Exception("Simulation of " + str(plan[window[0]].unitId) + " is stuck at loop " + str(self.loop) + "!")
+
+        return math.ceil(result / STEP_LOOPS) * STEP_LOOPS
+
+    def advanceTo(self, targetLoop: int):
+        """Gather resources and process every event up to the target loop.
+
+        Income only changes at events so it is constant between two of them.
+        """
+        events = self.events
+        while events and events[0][0] <= targetLoop:
+            eventLoop, _, kind, unit = heapq.heappop(events)
+            self.gatherUntil(eventLoop)
+            self.processEvent(kind, unit)
+        self.gatherUntil(targetLoop)
+
+    def gatherUntil(self, loop: int):
+        """Gather resources up to a loop.
+        """
+        if loop > self.loop:
+            mineralRate, vespeneRate = self.incomePerLoop()
+            self.minerals += mineralRate * (loop - self.loop)
+            self.vespene += vespeneRate * (loop - self.loop)
+            self.loop = loop
+
+    def processEvent(self, kind: int, unit: SimulatedUnit):
+        """Finish a unit or morph, free a worker or spawn a larva.
+        """
+        self.economyChanged = True
+        if kind == EVENT_READY:
+            self.constructingCounts[unit.typeId] -= 1
+            self.addReadyUnit(unit)
+            self.scheduleLarva(unit)
+        elif kind == EVENT_MORPHED:
+            self.removeReadyUnit(unit)
+            self.morphingCounts[unit.morphInto] -= 1
+            unit.typeId = unit.morphInto
+            unit.morphInto = 0
+            self.addReadyUnit(unit)
+        elif kind == EVENT_WORKER_FREE:
+            self.busyWorkers -= 1
+        else:
+            unit.larva += 1
+            unit.nextLarvaLoop = -1
+            self.scheduleLarva(unit)
+
+    def addReadyUnit(self, unit: SimulatedUnit):
+        """Add a unit to the ready units.
+        """
+        self.units.setdefault(unit.typeId, []).append(unit)
+        self.readyCounts[unit.typeId] = self.readyCounts.get(unit.typeId, 0) + 1
+        self.supplyCap += SUPPLY_PROVIDED[unit.typeId]
+
+    def removeReadyUnit(self, unit: SimulatedUnit):
+        """Remove a unit from the ready units.
+        """
+        self.units[unit.typeId].remove(unit)
+        self.readyCounts[unit.typeId] -= 1
+        self.supplyCap -= SUPPLY_PROVIDED[unit.typeId]
+
+    def scheduleLarva(self, unit: SimulatedUnit):
+        """Start the larva timer of a zerg townhall if it has less than three.
+        """
+        if self.race == Race.Zerg and unit.typeId in self.townhallIds:
+            if unit.larva < LARVA_PER_TOWNHALL and unit.nextLarvaLoop == -1:
+                unit.nextLarvaLoop = self.loop + LARVA_SPAWN_LOOPS
+                self.pushEvent(unit.nextLarvaLoop, EVENT_LARVA, unit)
+
+    # Economy
+    # ----------------------------------------
+
+    def incomePerLoop(self):
+        """Minerals and vespene gathered per game loop right now.
+        """
+        if self.economyChanged:
+            self.economyChanged = False
+            readyCounts = self.readyCounts
+            gatheringWorkers = readyCounts.get(self.worker, 0) - self.busyWorkers
+            townhalls = sum(readyCounts.get(townhall, 0) for townhall in self.townhallIds)
+            self.income = self.computeIncome(gatheringWorkers, townhalls, readyCounts.get(self.gasBuilding, 0))
+        return self.income
+
+    def computeIncome(self, gatheringWorkers: int, townhalls: int, gasBuildings: int):
+        """Minerals and vespene gathered per game loop by the given workers.
+
+        Workers are distributed like myWorkerDistribution does: gas buildings
+        are filled until about a third of the workers harvest vespene.
+        """
+        if townhalls == 0:
+            return (0.0, 0.0)
+
+        vespeneWorkers = min(gasBuildings * WORKERS_PER_GAS_BUILDING, math.ceil(gatheringWorkers * MAX_VESPENE_WORKER_RATIO))
+        mineralWorkers = gatheringWorkers - vespeneWorkers
+        saturatedWorkers = min(mineralWorkers, townhalls * MINERAL_WORKERS_PER_BASE)
+        extraWorkers = min(mineralWorkers - saturatedWorkers, townhalls * EXTRA_MINERAL_WORKERS_PER_BASE)
+
+        minerals = saturatedWorkers * MINERALS_PER_WORKER_SECOND + extraWorkers * MINERALS_PER_EXTRA_WORKER_SECOND
+        vespene = vespeneWorkers * VESPENE_PER_WORKER_SECOND
+        return (minerals / GAME_LOOPS_PER_SECOND, vespene / GAME_LOOPS_PER_SECOND)
+
+    def supplyLeft(self):
+        """Supply cap of all ready units and structures minus supply used.
+        """
+        return min(self.supplyCap, SUPPLY_LIMIT) - self.supplyUsed
+
+    # Conditions
+    # ----------------------------------------
+
+    def isPending(self, unitIds: Set[int]):
+        """Check if any of the unit ids is under construction or being morphed into.
+        """
+        return any(self.constructingCounts.get(unitId, 0) > 0 or self.morphingCounts.get(unitId, 0) > 0 for unitId in unitIds)
+
+    def countOwnUnits(self, unitIds: Set[int]):
+        """Number of ready units and units in construction of the given types (see getOwnUnitsOfTypes).
+        """
+        return sum(self.readyCounts.get(unitId, 0) + self.constructingCounts.get(unitId, 0) for unitId in unitIds)
+
+    def dependsOnWaitingTasks(self, task: SimulatedTask, waitingTasks: List[SimulatedTask]):
+        """Check if a task has to wait for tasks in front of it (see dependsOnWaitingTasks).
+        """
+        for waitingTask in waitingTasks:
+            if not task.producerIds.isdisjoint(waitingTask.producerIds):
+                return True
+            if waitingTask.typeId in task.producerIds and not self.countOwnUnits(task.producerIds):
+                return True
+            if waitingTask.typeId in task.requirementEquivalents and not self.countOwnUnits(task.requirementEquivalents):
+                return True
+        return False
+
+    def getIdleProducer(self, task: SimulatedTask):
+        """Get a ready and idle producer for a task (None if there is none).
+        """
+        if task.usesLarva:
+            for townhallId in self.townhallIds:
+                for unit in self.units.get(townhallId, ()):
+                    if unit.larva > 0:
+                        return unit
+            return None
+
+        loop = self.loop
+        for producerId in task.producerIds:
+            for unit in self.units.get(producerId, ()):
+                if unit.busyUntil <= loop:
+                    return unit
+        return None
+
+    def checkPreconditions(self, task: SimulatedTask, reservedMinerals: int, reservedVespene: int, reservedSupply: float, lookingAhead: bool):
+        """Combine producer, cost and tech requirement check (see checkPreconditions).
+
+        Returns TASK_STARTABLE, TASK_WAITS_FOR_RESOURCES if only minerals or
+        vespene are missing or TASK_WAITS otherwise. Raises if waiting does
+        not help, unless the task is behind a waiting task.
+        """
+        readyCounts = self.readyCounts
+        resourcesExist = task.minerals <= self.minerals - reservedMinerals and task.vespene <= self.vespene - reservedVespene
+        supplyExists = not task.supply or task.supply <= min(self.supplyCap, SUPPLY_LIMIT) - self.supplyUsed - reservedSupply
+        requirementFulfilled = not task.requirement
+        if not requirementFulfilled:
+            for unitId in task.requirementEquivalents:
+                if readyCounts.get(unitId, 0) > 0:
+                    requirementFulfilled = True
+                    break
+        producerExists = self.getIdleProducer(task) is not None
+        if supplyExists and requirementFulfilled and producerExists:
+            return TASK_STARTABLE if resourcesExist else TASK_WAITS_FOR_RESOURCES
+        if not lookingAhead:
+            self.checkIfWaitingHelps(task, producerExists, resourcesExist and supplyExists, requirementFulfilled)
+        return TASK_WAITS
+
+    def checkIfWaitingHelps(self, task: SimulatedTask, producerExists: bool, resourcesExist: bool, requirementFulfilled: bool):
+        """Raise like the bot does if a task that can not be started now never can.
+        """
+        readyCounts = self.readyCounts
+        if not producerExists:
+            if task.usesLarva:
+                canWait = any(readyCounts.get(townhallId, 0) > 0 for townhallId in self.townhallIds)
+            else:
+                canWait = any(readyCounts.get(producerId, 0) > 0 for producerId in task.producerIds) or self.isPending(task.producerIds)
+            if not canWait:
+                raise Exception("There must be a producer for " + str(task.unitId))
+        if not resourcesExist:
+            mineralRate, vespeneRate = self.incomePerLoop()
+            canWait = True
+            if task.minerals > self.minerals:
+                canWait = mineralRate > 0
+            if task.vespene > self.vespene:
+                canWait = canWait and (vespeneRate > 0 or self.isPending({self.gasBuilding}))
+            if task.supply and task.supply > self.supplyLeft():
+                canWait = canWait and self.isPending({self.supplyUnit})
+            if not canWait:
+                raise Exception("There is not enough minerals, vespene or supply for " + str(task.unitId) + " and waiting for it will not help!")
+        if not requirementFulfilled and not self.isPending({task.requirement}):
+            raise Exception("The requirement for " + str(task.unitId) + " is not fullfilled!")
+
+    # Production
+    # ----------------------------------------
+
+    def startTask(self, task: SimulatedTask):
+        """Pay for the task and occupy its producer.
+
+        Returns the loop at which the task finishes.
+        """
+        producer = self.getIdleProducer(task)
+        self.economyChanged = True
+        self.minerals -= task.minerals
+        self.vespene -= task.vespene
+        self.supplyUsed += task.supply
+        finishLoop = self.loop + task.buildLoops
+
+        if task.isMorph:
+            # the producer turns into the task once it finishes
+            producer.busyUntil = finishLoop
+            producer.morphInto = task.typeId
+            self.morphingCounts[task.typeId] = self.morphingCounts.get(task.typeId, 0) + 1
+            self.pushEvent(finishLoop, EVENT_MORPHED, producer)
+            return finishLoop
+
+        if producer.typeId == self.worker:
+            finishLoop += WORKER_TRAVEL_LOOPS
+            if self.race == Race.Zerg:
+                # the drone becomes the building
+                self.removeReadyUnit(producer)
+                self.supplyUsed -= PRODUCTION_DATA[UnitTypeId(self.worker)].supply
+            else:
+                producer.busyUntil = finishLoop
+                self.busyWorkers += 1
+                self.pushEvent(finishLoop, EVENT_WORKER_FREE, producer)
+        elif task.usesLarva:
+            producer.larva -= 1
+            self.scheduleLarva(producer)
+        else:
+            producer.busyUntil = finishLoop
+
+        for i in range(0, 2 if task.unitId == UnitTypeId.ZERGLING else 1):
+            self.constructingCounts[task.typeId] = self.constructingCounts.get(task.typeId, 0) + 1
+            self.pushEvent(finishLoop, EVENT_READY, SimulatedUnit(task.typeId, finishLoop))
+
+        return finishLoop
+
+
+def simulateBuildList(buildList: List[str], race: Race, lookAheadDepth: int = DEFAULT_LOOKAHEAD_DEPTH) -> SimulationResult:
+    """Convenience wrapper to simulate a single build list.
+    """
+    return BuildListSimulator(race, lookAheadDepth).simulate(buildList)
+
+
+def _simulateChunk(job: Tuple[List[List[str]], Race, int]) -> List[SimulationResult]:
+    buildLists, race, lookAheadDepth = job
+    simulator = BuildListSimulator(race, lookAheadDepth)
+    return [simulator.simulate(buildList) for buildList in buildLists]
+
+
+def simulateBuildLists(buildLists: List[List[str]], race: Race, lookAheadDepth: int = DEFAULT_LOOKAHEAD_DEPTH, processes: int = 1) -> List[SimulationResult]:
+    """Simulate many build lists, e.g. to screen candidates before playing them.
+
+    Build lists that occur more than once are simulated once. With more than
+    one process the build lists are split into chunks for a pool of worker
+    processes. The results are in the order of buildLists.
+    """
+    if processes < 1:
+        raise Exception("At least one worker process is required! Have: " + str(processes))
+    uniqueIndices: Dict[Tuple[str, ...], int] = dict()
+    uniqueLists: List[List[str]] = list()
+    for buildList in buildLists:
+        if tuple(buildList) not in uniqueIndices:
+            uniqueIndices[tuple(buildList)] = len(uniqueLists)
+            uniqueLists.append(buildList)
+
+    if processes == 1 or len(uniqueLists) < 2:
+        uniqueResults = _simulateChunk((uniqueLists, race, lookAheadDepth))
+    else:
+        import multiprocessing
+        chunkSize = math.ceil(len(uniqueLists) / processes)
+        jobs = [(uniqueLists[i:i + chunkSize], race, lookAheadDepth) for i in range(0, len(uniqueLists), chunkSize)]
+        with multiprocessing.Pool(processes=processes) as pool:
+            uniqueResults = [result for chunk in pool.map(_simulateChunk, jobs) for result in chunk]
+
+    return [uniqueResults[uniqueIndices[tuple(buildList)]] for buildList in buildLists]
@@ -0,0 +1,196 @@
+import sys
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set
+
+from sc2.data import Race, race_worker, race_townhalls, race_gas
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.constants import EQUIVALENTS_FOR_TECH_PROGRESS
+from BuildListProcessorDicts import (
+    CONVERT_TO_ID,
+    MORPHED_UNITS,
+    PRODUCTION_DATA
+)
+from GameDefinitions import (
+    SUPPLY_LIMIT,
+    getProducerIds,
+    race_startUnits,
+    race_supplyUnit,
+    race_techRequirement
+)
+from BuildListFile import NamedBuildList, readCorpus
+
+# Definitions
+# ----------------------------------------
+
+# limits checked by scanBuildList of the bots
+MAX_EXPANSIONS = 7
+GAS_BUILDINGS_PER_BASE = 2
+
+# structures the zerg bot refuses to build
+ZERG_FORBIDDEN = {UnitTypeId.NYDUSNETWORK, UnitTypeId.SPORECRAWLER, UnitTypeId.SPINECRAWLER}
+
+race_basicTownhall = {
+    Race.Terran: UnitTypeId.COMMANDCENTER,
+    Race.Zerg: UnitTypeId.HATCHERY,
+}
+
+
+class ValidationIssue(NamedTuple):
+    """A task that would stop the bot (index into the build list).
+    """
+    index: int
+    taskName: str
+    message: str
+
+
+class ValidationReport(NamedTuple):
+    """All issues of one build list (valid if there are none).
+    """
+    name: str
+    race: Optional[Race]
+    issues: List[ValidationIssue]
+
+
+def computeRaceUnits(race: Race) -> Set[UnitTypeId]:
+    """All tasks of CONVERT_TO_ID that can be traced back to the start units of a race.
+    """
+    result: Set[UnitTypeId] = set(race_startUnits[race])
+    if race == Race.Zerg:
+        result.add(UnitTypeId.LARVA)
+    changed = True
+    while changed:
+        changed = False
+        for unitId in CONVERT_TO_ID.values():
+            if unitId not in result and getProducerIds(unitId) & result:
+                result.add(unitId)
+                changed = True
+    return result
+
+
+race_units: Dict[Race, Set[UnitTypeId]] = {race: computeRaceUnits(race) for race in race_startUnits}
+
+# Validation
+# ----------------------------------------
+
+def inferRace(buildList: List[str]) -> Optional[Race]:
+    """The race all known tasks of a build list belong to (None if there is none).
+    """
+    for race, units in race_units.items():
+        if all(CONVERT_TO_ID[taskName] in units for taskName in buildList if taskName in CONVERT_TO_ID):
+            return race
+    return None
+
+
+def validateBuildList(buildList: List[str], race: Optional[Race] = None) -> List[ValidationIssue]:
+    """Find every task the bot could not process without playing a game.
+
+    Goes through the list once and assumes that every earlier task is done.
+    That is exactly what the bot can wait for, so a task fails here if the
+    bot would raise for it: unknown task, no producer, missing tech
+    requirement, not enough supply, vespene without a gas building or too
+    many expansions or gas buildings.
+    """
+    issues: List[ValidationIssue] = list()
+    if race is None:
+        race = inferRace(buildList)
+        if race is None:
+            return [ValidationIssue(-1, "", "Tasks of more than one race (or no supported race)!")]
+    worker = race_worker[race]
+    townhalls = race_townhalls[race]
+    techRequirement = race_techRequirement[race]
+
+    # units and structures that exist once all earlier tasks are done
+    owned: Dict[UnitTypeId, int] = dict(race_startUnits[race])
+    supplyUsed = sum(PRODUCTION_DATA[unitId].supply * count for unitId, count in owned.items())
+    supplyCap = sum(PRODUCTION_DATA[unitId].supplyProvided * count for unitId, count in owned.items())
+    expansionCount = 0
+    gasBuildingCount = 0
+
+    for index, taskName in enumerate(buildList):
+        if taskName not in CONVERT_TO_ID:
+            issues.append(ValidationIssue(index, taskName, taskName + " is not available in CONVERT_TO_ID!"))
+            continue
+        unitId: UnitTypeId = CONVERT_TO_ID[taskName]
+        if unitId not in race_units[race] or unitId not in PRODUCTION_DATA:
+            issues.append(ValidationIssue(index, taskName, str(unitId) + " can not be produced by " + str(race) + "!"))
+            continue
+        if race == Race.Zerg and unitId in ZERG_FORBIDDEN:
+            issues.append(ValidationIssue(index, taskName, str(unitId) + " is not allowed for this bot!"))
+            continue
+        data = PRODUCTION_DATA[unitId]
+
+        # producer
+        producerIds = getProducerIds(unitId)
+        if UnitTypeId.LARVA in producerIds:
+            producer = next((townhall for townhall in townhalls if owned.get(townhall, 0) > 0), None)
+        else:
+            producer = next((producerId for producerId in producerIds if owned.get(producerId, 0) > 0), None)
+        if producer is None:
+            issues.append(ValidationIssue(index, taskName, "There must be a producer for " + str(unitId)))
+            continue
+
+        # tech requirement
+        requirement = techRequirement.get(unitId, UnitTypeId.NOTAUNIT)
+        if requirement != UnitTypeId.NOTAUNIT:
+            requirementEquivalents = {requirement} | set(EQUIVALENTS_FOR_TECH_PROGRESS.get(requirement, []))
+            if not any(owned.get(equivalent, 0) > 0 for equivalent in requirementEquivalents):
+                issues.append(ValidationIssue(index, taskName, "The requirement " + str(requirement) + " for " + str(unitId) + " is not fullfilled!"))
+                continue
+
+        # costs and supply
+        if data.vespene > 0 and owned.get(race_gas[race], 0) == 0:
+            issues.append(ValidationIssue(index, taskName, str(unitId) + " needs vespene but there is no " + str(race_gas[race]) + " before it!"))
+        if data.supply > 0 and supplyUsed + data.supply > min(supplyCap, SUPPLY_LIMIT):
+            issues.append(ValidationIssue(
+                index, taskName,
+                "Not enough supply for " + str(unitId) + " (" + str(supplyUsed) + "/" + str(min(supplyCap, SUPPLY_LIMIT)) + "), a " + str(race_supplyUnit[race]) + " is missing!"
+            ))
+
+        # caps
+        if unitId == race_basicTownhall[race]:
+            expansionCount += 1
+            if expansionCount > MAX_EXPANSIONS:
+                issues.append(ValidationIssue(index, taskName, "To many expansions. Max: " + str(MAX_EXPANSIONS)))
+        elif unitId == race_gas[race]:
+            gasBuildingCount += 1
+            maxGasBuildings = GAS_BUILDINGS_PER_BASE * (expansionCount + 1)
+            if gasBuildingCount > maxGasBuildings:
+                issues.append(ValidationIssue(index, taskName, "To many gas buildings. Max: " + str(maxGasBuildings)))
+
+        # the task is done
+        supplyUsed += data.supply
+        supplyCap += data.supplyProvided
+        if unitId in MORPHED_UNITS:
+            owned[producer] -= 1
+            supplyCap -= PRODUCTION_DATA[producer].supplyProvided if producer in PRODUCTION_DATA else 0
+        elif producer == worker and race == Race.Zerg:
+            # the drone becomes the structure
+            owned[worker] -= 1
+            supplyUsed -= PRODUCTION_DATA[worker].supply
+        owned[unitId] = owned.get(unitId, 0) + (2 if unitId == UnitTypeId.ZERGLING else 1)
+
+    return issues
+
+
+def validateCorpus(buildLists: Iterable[NamedBuildList]) -> Iterator[ValidationReport]:
+    """Validate many build lists, one report per list.
+
+    The race is taken from the race metadata of a list if it has one.
+    """
+    for entry in buildLists:
+        race = Race.__members__.get(entry.metadata.get("race", ""))
+        yield ValidationReport(entry.name, race, validateBuildList(entry.buildList, race))
+
+
+if __name__ == "__main__":
+    # usage: python BuildListValidator.py <build list files or directories>
+    invalidCount = 0
+    totalCount = 0
+    for report in validateCorpus(readCorpus(sys.argv[1:], skipInvalid=True)):
+        totalCount += 1
+        if report.issues:
+            invalidCount += 1
+            print(report.name + ":")
+            for issue in report.issues:
+                print("  task " + str(issue.index) + " (" + issue.taskName + "): " + issue.message)
+    print(str(invalidCount) + " of " + str(totalCount) + " build lists are invalid")
+    sys.exit(1 if invalidCount else 0)
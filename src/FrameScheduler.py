@@ -0,0 +1,98 @@
+import logging
+from typing import Callable, List
+
+# Definitions
+# ----------------------------------------
+
+# work (in the units of the work estimates, e.g. workers) done per frame (one on_step call)
+DEFAULT_FRAME_WORK_BUDGET = 40
+
+# a deferred subsystem runs anyway once it is this many frames late
+DEFAULT_MAX_DELAY = 8
+
+loggerScheduler = logging.getLogger("FrameScheduler")
+
+# Class
+# ----------------------------------------
+
+class ScheduledSubsystem:
+    """A part of the on_step pipeline with its cadence and work estimate.
+    """
+
+    def __init__(self, name: str, callback: Callable[[int], None], cadence: int, workEstimate: Callable[[], int], maxDelay: int):
+        self.name = name
+        self.callback = callback
+        # run every cadence frames
+        self.cadence = cadence
+        # subsystems with a work estimate may be deferred if the frame is full
+        self.workEstimate = workEstimate
+        self.deferrable = workEstimate is not None
+        self.maxDelay = maxDelay
+        # first iteration at which the subsystem is due again
+        self.dueIteration = 0
+        self.deferredCount = 0
+
+
+class FrameScheduler:
+    """Runs the subsystems of a bot that fit into a frame.
+
+    Subsystems run in registration order. A subsystem without a work
+    estimate runs on every frame it is due. A subsystem with a work estimate
+    is deferred to a later frame if its work does not fit into what is left
+    of the frame budget. Every frame it is late adds one frame budget, so a
+    subsystem with twice the budget of work runs every second frame, but it
+    is never more than maxDelay frames late.
+
+    Deferral only depends on the game state (no wall clock time), so the
+    same game plays out the same on any machine. Time is measured by the
+    step profiler.
+    """
+
+    def __init__(self, frameWorkBudget: int = DEFAULT_FRAME_WORK_BUDGET):
+        self.frameWorkBudget = frameWorkBudget
+        self.subsystems: List[ScheduledSubsystem] = list()
+
+    def register(self, name: str, callback: Callable[[int], None], cadence: int = 1, workEstimate: Callable[[], int] = None, maxDelay: int = DEFAULT_MAX_DELAY):
+        """Register a subsystem. The callback gets the iteration.
+
+        workEstimate returns the work the subsystem would do in the current frame.
+        """
+        if cadence < 1:
+            raise Exception("Cadence of " + name + " must be at least one frame! Have: " + str(cadence))
+        if any(subsystem.name == name for subsystem in self.subsystems):
+            raise Exception("Subsystem " + name + " is already registered!")
+        self.subsystems.append(ScheduledSubsystem(name, callback, cadence, workEstimate, maxDelay))
+
+    def runFrame(self, iteration: int):
+        """Run every subsystem that is due and fits into the frame.
+        """
+        frameWork = 0
+        for subsystem in self.subsystems:
+            if iteration < subsystem.dueIteration:
+                continue
+            if subsystem.deferrable:
+                work = subsystem.workEstimate()
+                delay = iteration - subsystem.dueIteration
+                if delay < subsystem.maxDelay and frameWork + work > self.frameWorkBudget * (delay + 1):
+                    subsystem.deferredCount += 1
+                    continue
+                frameWork += work
+            subsystem.callback(iteration)
+            # the callback may have put the subsystem to sleep
+            subsystem.dueIteration = max(subsystem.dueIteration, iteration + subsystem.cadence)
+
+    def sleepUntil(self, name: str, iteration: int):
+        """Do not run a subsystem before the given iteration.
+        """
+        for subsystem in self.subsystems:
+            if subsystem.name == name:
+                subsystem.dueIteration = max(subsystem.dueIteration, iteration)
+                return
+        raise Exception("Subsystem " + name + " is not registered!")
+
+    def logDeferrals(self):
+        """Log how often every deferrable subsystem was deferred.
+        """
+        for subsystem in self.subsystems:
+            if subsystem.deferrable:
+                loggerScheduler.info(subsystem.name + " was deferred " + str(subsystem.deferredCount) + " times")
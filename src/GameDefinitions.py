@@ -0,0 +1,59 @@
+from typing import Dict, Set
+
+from sc2.data import Race
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.dicts.unit_trained_from import UNIT_TRAINED_FROM
+from sc2.constants import (
+    TERRAN_TECH_REQUIREMENT,
+    PROTOSS_TECH_REQUIREMENT,
+    ZERG_TECH_REQUIREMENT
+)
+from BuildListProcessorDicts import BASE_BUILDINGS
+
+# Definitions
+# ----------------------------------------
+
+# shared by the bots, the simulator and the validator so they agree on the rules of the game
+
+GAME_LOOPS_PER_SECOND = 22.4
+
+# number of build list tasks that are considered at once (1 processes the list strictly in order)
+DEFAULT_LOOKAHEAD_DEPTH = 4
+
+SUPPLY_LIMIT = 200
+
+# the bot stops moving workers to gas at this ratio (see myWorkerDistribution)
+MAX_VESPENE_WORKER_RATIO = 0.34
+
+race_techRequirement = {
+    Race.Protoss: PROTOSS_TECH_REQUIREMENT,
+    Race.Terran: TERRAN_TECH_REQUIREMENT,
+    Race.Zerg: ZERG_TECH_REQUIREMENT,
+}
+
+race_supplyUnit: Dict[Race, UnitTypeId] = {
+    Race.Protoss: UnitTypeId.PYLON,
+    Race.Terran: UnitTypeId.SUPPLYDEPOT,
+    Race.Zerg: UnitTypeId.OVERLORD,
+}
+
+# units every game starts with
+race_startUnits: Dict[Race, Dict[UnitTypeId, int]] = {
+    Race.Terran: {UnitTypeId.COMMANDCENTER: 1, UnitTypeId.SCV: 12},
+    Race.Zerg: {UnitTypeId.HATCHERY: 1, UnitTypeId.DRONE: 12, UnitTypeId.OVERLORD: 1},
+}
+
+
+def getProducerIds(unitId: UnitTypeId) -> Set[UnitTypeId]:
+    """Producers of a task (empty if it cannot be produced).
+    """
+    return UNIT_TRAINED_FROM.get(unitId, BASE_BUILDINGS.get(unitId, set()))
+
+
+def getTaskProducerIds(unitId: UnitTypeId) -> Set[UnitTypeId]:
+    """Producers of a task that has to be produced (raises if there are none).
+    """
+    producerIds = getProducerIds(unitId)
+    if not producerIds:
+        raise Exception("" + str(unitId) + " is not available in UNIT_TRAINED_FROM and not in BASE_BUILDINGS (only terran)!")
+    return producerIds
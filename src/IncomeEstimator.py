@@ -0,0 +1,70 @@
+import math
+from collections import deque
+from typing import Deque, Tuple
+
+# Definitions
+# ----------------------------------------
+
+# income is averaged over this many game loops (10 seconds)
+INCOME_WINDOW_LOOPS = 224
+
+# the estimate is not trusted before it covers this many game loops (1 second)
+MIN_WINDOW_LOOPS = 22
+
+# Class
+# ----------------------------------------
+
+class IncomeEstimator:
+    """Sliding window estimate of mineral and vespene income.
+
+    Fed with the collected minerals and vespene from the score, which only
+    ever grow, so spending does not disturb the estimate.
+    """
+
+    def __init__(self, windowLoops: int = INCOME_WINDOW_LOOPS):
+        self.windowLoops = windowLoops
+        # (game loop, collected minerals, collected vespene) oldest first
+        self.samples: Deque[Tuple[int, float, float]] = deque()
+
+    def update(self, gameLoop: int, collectedMinerals: float, collectedVespene: float):
+        """Add an observation. Call at most once per step.
+        """
+        if self.samples and self.samples[-1][0] >= gameLoop:
+            return
+        self.samples.append((gameLoop, collectedMinerals, collectedVespene))
+        # keep one sample that is at least a full window old
+        while len(self.samples) > 2 and gameLoop - self.samples[1][0] >= self.windowLoops:
+            self.samples.popleft()
+
+    def isWarm(self):
+        """Check if the window is long enough to trust the estimate.
+        """
+        return len(self.samples) >= 2 and self.samples[-1][0] - self.samples[0][0] >= MIN_WINDOW_LOOPS
+
+    def mineralRate(self):
+        """Minerals per game loop (0 if unknown).
+        """
+        if len(self.samples) < 2:
+            return 0.0
+        return (self.samples[-1][1] - self.samples[0][1]) / (self.samples[-1][0] - self.samples[0][0])
+
+    def vespeneRate(self):
+        """Vespene per game loop (0 if unknown).
+        """
+        if len(self.samples) < 2:
+            return 0.0
+        return (self.samples[-1][2] - self.samples[0][2]) / (self.samples[-1][0] - self.samples[0][0])
+
+    def loopsToAfford(self, missingMinerals: float, missingVespene: float):
+        """Game loops until the missing resources are collected.
+
+        Returns 0 if nothing is missing and infinity if there is no income of
+        a missing resource.
+        """
+        loops = 0.0
+        for missing, rate in ((missingMinerals, self.mineralRate()), (missingVespene, self.vespeneRate())):
+            if missing > 0:
+                if rate <= 0:
+                    return math.inf
+                loops = max(loops, missing / rate)
+        return loops
@@ -0,0 +1,66 @@
+from typing import Dict, List
+
+from sc2.position import Point2
+from sc2.units import Units
+from sc2.unit import Unit
+
+from BuildListSimulator import LARVA_PER_TOWNHALL, LARVA_SPAWN_LOOPS
+
+# Class
+# ----------------------------------------
+
+class LarvaTracker:
+    """Larvae per zerg townhall including the spawn timers.
+
+    A townhall spawns a larva every LARVA_SPAWN_LOOPS game loops while it
+    has less than LARVA_PER_TOWNHALL. The game does not report the timer so
+    it is restarted whenever the number of larvae of a townhall grows or
+    drops below the maximum.
+    """
+
+    def __init__(self):
+        # larvae of every townhall by townhall tag (updated once per game loop)
+        self.larvaeByTownhall: Dict[int, List[Unit]] = dict()
+        # game loop at which the spawn timer of a townhall was (re)started
+        self.timerStartLoops: Dict[int, int] = dict()
+        self.updateLoop = -1
+
+    def update(self, gameLoop: int, townhalls: Units, larvae: Units):
+        """Assign every larva to its closest townhall and update the timers.
+        """
+        if gameLoop == self.updateLoop:
+            return
+        self.updateLoop = gameLoop
+        larvaeByTownhall: Dict[int, List[Unit]] = {townhall.tag: list() for townhall in townhalls}
+        if townhalls:
+            for larva in larvae:
+                larvaeByTownhall[townhalls.closest_to(larva).tag].append(larva)
+
+        timerStartLoops: Dict[int, int] = dict()
+        for tag, townhallLarvae in larvaeByTownhall.items():
+            count = len(townhallLarvae)
+            previous = self.larvaeByTownhall.get(tag)
+            if previous is None or count > len(previous) or (len(previous) >= LARVA_PER_TOWNHALL and count < LARVA_PER_TOWNHALL):
+                timerStartLoops[tag] = gameLoop
+            else:
+                timerStartLoops[tag] = self.timerStartLoops[tag]
+        self.larvaeByTownhall = larvaeByTownhall
+        self.timerStartLoops = timerStartLoops
+
+    def nextSpawnLoop(self):
+        """Game loop of the next predicted larva spawn (None if all townhalls are full).
+        """
+        spawnLoops = [
+            self.timerStartLoops[tag] + LARVA_SPAWN_LOOPS
+            for tag, townhallLarvae in self.larvaeByTownhall.items()
+            if len(townhallLarvae) < LARVA_PER_TOWNHALL
+        ]
+        return min(spawnLoops) if spawnLoops else None
+
+    def getLarvaeByPreference(self, townhalls: Units, rallyPoint: Point2) -> List[Unit]:
+        """All larvae, those of the townhall closest to the rally point first.
+        """
+        result: List[Unit] = list()
+        for townhall in sorted(townhalls, key=lambda townhall: townhall.distance_to(rallyPoint)):
+            result.extend(self.larvaeByTownhall.get(townhall.tag, ()))
+        return result
@@ -0,0 +1,239 @@
+import hashlib
+import heapq
+import json
+import logging
+import math
+import os
+from collections import deque
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from sc2.position import Point2
+from BuildListProcessorDicts import StartLocation
+
+# Definitions
+# ----------------------------------------
+
+# bump when the analysis changes so old cache files are not used anymore
+MAP_ANALYSIS_VERSION = 2
+
+# analysis results are stored here, one file per map
+DEFAULT_CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "BuildListProcessBot", "maps")
+
+loggerMapAnalysis = logging.getLogger("MapAnalysis")
+
+
+def classifyStartLocation(point: Point2, mapCenter: Point2):
+    """Map quadrant of a start location.
+    """
+    if point.x < mapCenter.x:
+        return StartLocation.BOTTOM_LEFT if point.y < mapCenter.y else StartLocation.TOP_LEFT
+    return StartLocation.BOTTOM_RIGHT if point.y < mapCenter.y else StartLocation.TOP_RIGHT
+
+
+def groundDistances(pathable: np.ndarray, source: Point2) -> np.ndarray:
+    """Walking distance from a location to every cell of a grid of pathable cells (indexed [y, x]).
+
+    Dijkstra over the cells with straight and diagonal steps. Starts at the
+    pathable cell closest to the location because the location itself may be
+    covered by a structure. Cells that cannot be reached are inf.
+    """
+    height, width = pathable.shape
+    cellsY, cellsX = np.nonzero(pathable)
+    if len(cellsX) == 0:
+        raise Exception("The map has no pathable cells!")
+    closest = np.argmin((cellsX + 0.5 - source.x) ** 2 + (cellsY + 0.5 - source.y) ** 2)
+
+    distances = np.full(pathable.shape, np.inf)
+    passable = pathable.tolist()
+    settled = [[False] * width for _ in range(height)]
+    steps = [(dx, dy, math.hypot(dx, dy)) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+    queue = [(0.0, int(cellsY[closest]), int(cellsX[closest]))]
+    while queue:
+        distance, y, x = heapq.heappop(queue)
+        if settled[y][x]:
+            continue
+        settled[y][x] = True
+        distances[y, x] = distance
+        for dx, dy, length in steps:
+            nextX, nextY = x + dx, y + dy
+            if 0 <= nextX < width and 0 <= nextY < height and passable[nextY][nextX] and not settled[nextY][nextX]:
+                # diagonal steps must not cut corners of unpathable cells
+                if dx and dy and not (passable[y][nextX] and passable[nextY][x]):
+                    continue
+                heapq.heappush(queue, (distance + length, nextY, nextX))
+    return distances
+
+
+def distanceAt(distances: np.ndarray, location: Point2, radius: int = 3):
+    """Walking distance to a location, the closest reached cell within radius cells counts.
+    """
+    x, y = int(location.x), int(location.y)
+    window = distances[max(y - radius, 0):y + radius + 1, max(x - radius, 0):x + radius + 1]
+    return float(window.min()) if window.size else math.inf
+
+
+def computeExpansionOrders(expansionLocations: Sequence[Point2], playerOneStart: Point2, playerTwoStart: Point2, pathable: np.ndarray) -> Tuple[List[Point2], List[Point2]]:
+    """Order in which both players take the expansions.
+
+    Every player wants the expansions with the shortest walking distance
+    from its start location first. The players pick in turns (player one
+    first), so both get expansions equally close to their start location on
+    any map layout. Expansions that cannot be reached by ground are taken
+    last. The expansions of the start locations are not part of the orders.
+    """
+    expansions = list(expansionLocations)
+    playerOneIndex = expansions.index(playerOneStart.closest(expansions))
+    playerTwoIndex = expansions.index(playerTwoStart.closest(expansions))
+    available = set(range(len(expansions))) - {playerOneIndex, playerTwoIndex}
+
+    preferences = []
+    for start in (playerOneStart, playerTwoStart):
+        distances = groundDistances(pathable, start)
+        walking = [distanceAt(distances, location) for location in expansions]
+        # the straight line distance breaks ties and orders unreachable expansions
+        preferences.append(deque(sorted(available, key=lambda index: (walking[index], start.distance_to(expansions[index])))))
+
+    orders: Tuple[List[Point2], List[Point2]] = (list(), list())
+    while available:
+        for player in (0, 1):
+            preference = preferences[player]
+            while preference and preference[0] not in available:
+                preference.popleft()
+            if preference:
+                index = preference.popleft()
+                available.remove(index)
+                orders[player].append(expansions[index])
+    return orders
+
+# Class
+# ----------------------------------------
+
+class MapAnalysisCache:
+    """Expansion orders and structure placement candidates of maps, stored on disk.
+
+    A file is keyed by the map name and a hash of the expansion locations,
+    so a changed map gets analysed again. The orders of every pair of start
+    locations are added to the file of the map as they are needed.
+    Placement candidates have their own file keyed by a hash of the grid
+    they were computed from.
+
+    Matches in other processes may add to the same file at the same time,
+    so adding reads the file again and writes it under a lock (not on
+    systems without fcntl, where entries of concurrent matches may be lost
+    and are computed again).
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIRECTORY):
+        self.directory = directory
+        # loaded files by path
+        self.entries: Dict[str, dict] = dict()
+
+    def mapHash(self, expansionLocations: Sequence[Point2], pathable: np.ndarray):
+        """Hash of everything the analysis depends on.
+        """
+        content = hashlib.sha1(json.dumps([MAP_ANALYSIS_VERSION, sorted([location.x, location.y] for location in expansionLocations)]).encode("utf-8"))
+        content.update(self.gridHash(pathable).encode("utf-8"))
+        return content.hexdigest()[:16]
+
+    def getPath(self, mapName: str, mapHash: str):
+        """File of a map.
+        """
+        safeName = "".join(character if character.isalnum() else "_" for character in mapName)
+        return os.path.join(self.directory, safeName + "_" + mapHash + ".json")
+
+    def getExpansionOrders(self, mapName: str, expansionLocations: Sequence[Point2], pathable: np.ndarray, playerOneStart: Point2, playerTwoStart: Point2):
+        """Expansion orders of both players (computed and stored if they are not cached yet).
+
+        pathable tells which cells can be walked on (indexed [y, x]).
+        """
+        path = self.getPath(mapName, self.mapHash(expansionLocations, pathable))
+        entry = self.entries.get(path)
+        if entry is None:
+            entry = self.load(path)
+            if entry is None:
+                entry = {"map": mapName, "orders": dict()}
+            self.entries[path] = entry
+
+        startsKey = ",".join(str(value) for value in (playerOneStart.x, playerOneStart.y, playerTwoStart.x, playerTwoStart.y))
+        if startsKey in entry["orders"]:
+            loggerMapAnalysis.info("Expansion orders of " + mapName + " loaded from " + path)
+        else:
+            playerOneOrder, playerTwoOrder = computeExpansionOrders(expansionLocations, playerOneStart, playerTwoStart, pathable)
+            self.entries[path] = entry = self.add(path, entry, "orders", startsKey, [[[location.x, location.y] for location in order] for order in (playerOneOrder, playerTwoOrder)])
+        playerOneOrder, playerTwoOrder = entry["orders"][startsKey]
+        return ([Point2(location) for location in playerOneOrder], [Point2(location) for location in playerTwoOrder])
+
+    def gridHash(self, grid: np.ndarray):
+        """Hash of a boolean grid (e.g. the cells that are buildable at the start).
+        """
+        content = hashlib.sha1(json.dumps([MAP_ANALYSIS_VERSION, list(grid.shape)]).encode("utf-8"))
+        content.update(np.packbits(grid.astype(bool)).tobytes())
+        return content.hexdigest()[:16]
+
+    def getPlacementCandidates(self, mapName: str, gridHash: str, anchor: Point2, size: Tuple[int, int], computeCandidates: Callable[[], List[Point2]]):
+        """Candidate build locations of a structure size around an anchor (computed and stored if they are not cached yet).
+        """
+        path = self.getPath(mapName, "placement_" + gridHash)
+        entry = self.entries.get(path)
+        if entry is None:
+            entry = self.load(path)
+            if entry is None:
+                entry = {"map": mapName, "candidates": dict()}
+            self.entries[path] = entry
+
+        candidatesKey = ",".join(str(value) for value in (anchor.x, anchor.y, size[0], size[1]))
+        if candidatesKey not in entry["candidates"]:
+            self.entries[path] = entry = self.add(path, entry, "candidates", candidatesKey, [[location.x, location.y] for location in computeCandidates()])
+        return [Point2(location) for location in entry["candidates"][candidatesKey]]
+
+    def load(self, path: str):
+        """Read a file (None if it does not exist or cannot be read).
+        """
+        try:
+            with open(path, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def add(self, path: str, entry: dict, section: str, key: str, value):
+        """Add a value to a section of a file and return the file as stored.
+
+        What other processes stored since the file was loaded is kept.
+        """
+        lockFile = None
+        try:
+            if fcntl is not None:
+                os.makedirs(self.directory, exist_ok=True)
+                lockFile = open(path + ".lock", "w")
+                fcntl.flock(lockFile, fcntl.LOCK_EX)
+            stored = self.load(path)
+            if stored is None:
+                stored = entry
+            stored[section].setdefault(key, value)
+            self.store(path, stored)
+            return stored
+        except OSError as error:
+            loggerMapAnalysis.warning("Could not lock the map analysis in " + path + ": " + str(error))
+            entry[section][key] = value
+            return entry
+        finally:
+            if lockFile is not None:
+                lockFile.close()
+
+    def store(self, path: str, entry: dict):
+        """Write a file. Matches in other processes may read it at the same time, so it is replaced at once.
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            temporaryPath = path + "." + str(os.getpid()) + ".tmp"
+            with open(temporaryPath, "w") as file:
+                json.dump(entry, file)
+            os.replace(temporaryPath, path)
+        except OSError as error:
+            loggerMapAnalysis.warning("Could not store the map analysis in " + path + ": " + str(error))
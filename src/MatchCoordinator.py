@@ -0,0 +1,207 @@
+import asyncio
+import logging
+from enum import Enum
+from typing import List, NamedTuple, Tuple
+
+from sc2.position import Point2
+from BuildListProcessorDicts import StartLocation
+
+# Definitions
+# ----------------------------------------
+
+class Player(Enum):
+    """A way of differentiating players.
+    """
+    PLAYER_ONE = 1,
+    PLAYER_TWO = 2,
+
+class Winner(Enum):
+    """A way of differentiating winners.
+    """
+    PLAYER_ONE = 1,
+    PLAYER_TWO = 2,
+    UNKNOWN = 3
+
+class EarlyStopMetric(Enum):
+    """What the armies are compared by to decide a fight early.
+    """
+    ARMY_VALUE = 1,
+    ARMY_SUPPLY = 2
+
+class EarlyStopPolicy(NamedTuple):
+    """When a fight counts as decided before an army is eliminated.
+
+    Steps are only counted once the armies met, that is once the metric of
+    either army dropped below its value at the start of its attack. From
+    then on the fight is decided once the weaker army has at most
+    decidedRatio of the metric of the stronger army for holdSteps steps in
+    a row.
+    """
+    metric: EarlyStopMetric = EarlyStopMetric.ARMY_VALUE
+    decidedRatio: float = 0.2
+    holdSteps: int = 20
+
+# policy of launchSc2Match
+DEFAULT_EARLY_STOP_POLICY = EarlyStopPolicy()
+
+# Class
+# ----------------------------------------
+
+class MatchCoordinator:
+    """State shared by the two bots of one match.
+
+    Create one coordinator per match and hand it to both bots. Nothing is
+    stored on the bot classes so any number of matches can run in the same
+    process without interfering with each other.
+
+    Bots publish what they know through the publish methods and await the
+    events instead of checking the shared state on every step.
+    """
+
+    def __init__(self, earlyStopPolicy: EarlyStopPolicy = None):
+        """Initialize the state at the start of a match.
+
+        Without an early stop policy a match only ends once an army is
+        eliminated.
+        """
+        if earlyStopPolicy is not None and (earlyStopPolicy.holdSteps < 1 or not 0.0 <= earlyStopPolicy.decidedRatio < 1.0):
+            raise Exception("Invalid early stop policy! Have: " + str(earlyStopPolicy))
+        self.logger = logging.getLogger("MatchCoordinator")
+        # start locations of both players
+        self.playerOneStartLocation: StartLocation = StartLocation.UNKNOWN
+        self.playerTwoStartLocation: StartLocation = StartLocation.UNKNOWN
+        # expansion locations (computed by player one for both players)
+        self.playerOneExpansionLocations: List[Point2] = list()
+        self.playerTwoExpansionLocations: List[Point2] = list()
+        # attacking
+        self.playerOneReadyToAttack = False
+        self.playerTwoReadyToAttack = False
+        # army counts are -1 until the attack started
+        self.playerOneArmyCount = -1
+        self.playerTwoArmyCount = -1
+        self.winner: Winner = Winner.UNKNOWN
+        # early stop: army value and supply with the game loop they were published at (None until the attack started)
+        self.earlyStopPolicy = earlyStopPolicy
+        self.playerOneArmyStrength: Tuple[float, float, int] = None
+        self.playerTwoArmyStrength: Tuple[float, float, int] = None
+        # army strength of both players when they started their attack
+        self.playerOneAttackStrength: Tuple[float, float, int] = None
+        self.playerTwoAttackStrength: Tuple[float, float, int] = None
+        # set once the first army losses were published
+        self.fightStarted = False
+        self.lastEvaluatedLoop = -1
+        self.decidedSteps = 0
+        self.stoppedEarly = False
+
+        # events
+        # set when both players have published their start location
+        self.startLocationsPublished = asyncio.Event()
+        # set when the expansion locations of both players are known
+        self.expansionLocationsPublished = asyncio.Event()
+        # set when both players finished their build list
+        self.bothReadyToAttack = asyncio.Event()
+        # set when one of the armies was eliminated or the fight is decided (see EarlyStopPolicy)
+        self.armyEliminated = asyncio.Event()
+
+    # Publishing
+    # ----------------------------------------
+
+    def publishStartLocation(self, player: Player, startLocation: StartLocation):
+        """Store the start location of a player.
+        """
+        if player == Player.PLAYER_ONE:
+            self.playerOneStartLocation = startLocation
+        else:
+            self.playerTwoStartLocation = startLocation
+
+        if self.playerOneStartLocation != StartLocation.UNKNOWN and self.playerTwoStartLocation != StartLocation.UNKNOWN:
+            self.startLocationsPublished.set()
+
+    def publishExpansionLocations(self, playerOneExpansionLocations: List[Point2], playerTwoExpansionLocations: List[Point2]):
+        """Store the expansion locations of both players.
+        """
+        self.playerOneExpansionLocations = playerOneExpansionLocations
+        self.playerTwoExpansionLocations = playerTwoExpansionLocations
+        self.expansionLocationsPublished.set()
+
+    def publishReadyToAttack(self, player: Player):
+        """Store that a player finished its build list.
+        """
+        if player == Player.PLAYER_ONE:
+            self.playerOneReadyToAttack = True
+        else:
+            self.playerTwoReadyToAttack = True
+
+        if self.playerOneReadyToAttack and self.playerTwoReadyToAttack:
+            self.bothReadyToAttack.set()
+
+    def publishArmyCount(self, player: Player, armyCount: int):
+        """Store the army count of a player and decide the winner once an army is gone.
+        """
+        if player == Player.PLAYER_ONE:
+            self.playerOneArmyCount = armyCount
+        else:
+            self.playerTwoArmyCount = armyCount
+
+        if armyCount != 0 or self.armyEliminated.is_set():
+            return
+
+        if self.playerOneArmyCount == 0 and self.playerTwoArmyCount == 0:
+            self.logger.info("Its a tie!")
+        elif self.playerOneArmyCount == 0:
+            self.logger.info("Player two won the match!")
+            self.winner = Winner.PLAYER_TWO
+        else:
+            self.logger.info("Player one won the match!")
+            self.winner = Winner.PLAYER_ONE
+        self.armyEliminated.set()
+
+    def publishArmyStrength(self, player: Player, armyValue: float, armySupply: float, gameLoop: int):
+        """Store the army strength of a player and decide the fight if it is lopsided long enough.
+
+        The first strength a player publishes is the one at the start of its
+        attack. Evaluated once per game loop as soon as both players
+        published it.
+        """
+        if player == Player.PLAYER_ONE:
+            self.playerOneArmyStrength = (armyValue, armySupply, gameLoop)
+            if self.playerOneAttackStrength is None:
+                self.playerOneAttackStrength = self.playerOneArmyStrength
+        else:
+            self.playerTwoArmyStrength = (armyValue, armySupply, gameLoop)
+            if self.playerTwoAttackStrength is None:
+                self.playerTwoAttackStrength = self.playerTwoArmyStrength
+
+        if self.earlyStopPolicy is None or self.armyEliminated.is_set():
+            return
+        if self.playerOneArmyStrength is None or self.playerTwoArmyStrength is None:
+            return
+        if self.playerOneArmyStrength[2] != self.playerTwoArmyStrength[2] or gameLoop == self.lastEvaluatedLoop:
+            return
+        self.lastEvaluatedLoop = gameLoop
+
+        index = 0 if self.earlyStopPolicy.metric == EarlyStopMetric.ARMY_VALUE else 1
+        playerOne = self.playerOneArmyStrength[index]
+        playerTwo = self.playerTwoArmyStrength[index]
+        if not self.fightStarted:
+            # an army that is still on its way is not losing, even if it is smaller
+            if playerOne >= self.playerOneAttackStrength[index] and playerTwo >= self.playerTwoAttackStrength[index]:
+                return
+            self.logger.info("The armies met (first losses at game loop " + str(gameLoop) + ")!")
+            self.fightStarted = True
+        stronger = max(playerOne, playerTwo)
+        if stronger > 0 and min(playerOne, playerTwo) <= self.earlyStopPolicy.decidedRatio * stronger:
+            self.decidedSteps += 1
+        else:
+            self.decidedSteps = 0
+        if self.decidedSteps < self.earlyStopPolicy.holdSteps:
+            return
+
+        if playerOne > playerTwo:
+            self.logger.info("Player one won the match (decided at game loop " + str(gameLoop) + ")!")
+            self.winner = Winner.PLAYER_ONE
+        else:
+            self.logger.info("Player two won the match (decided at game loop " + str(gameLoop) + ")!")
+            self.winner = Winner.PLAYER_TWO
+        self.stoppedEarly = True
+        self.armyEliminated.set()
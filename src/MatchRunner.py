@@ -0,0 +1,233 @@
+import logging
+import multiprocessing
+import os
+import time
+from typing import Callable, Dict, Iterator, List, NamedTuple, Tuple
+
+# the bots, the validator and the result cache are imported where they are
+# used so that stub launchers and the worker processes only load what they need
+from MatchCoordinator import DEFAULT_EARLY_STOP_POLICY, EarlyStopPolicy, Winner
+
+# Definitions
+# ----------------------------------------
+
+DEFAULT_MAP = "Flat128"
+
+# launcher arguments that are left out of the cache key: task plans follow
+# from the build lists and the code, which are part of the key already
+ARGUMENTS_NOT_IN_KEY = {"taskPlans"}
+
+loggerRunner = logging.getLogger("MatchRunner")
+
+
+class Matchup(NamedTuple):
+    """A zerg build list playing against a terran build list.
+
+    Zerg is always player one and terran is always player two. The seed of
+    the game is random if none is given.
+    """
+    zergBuildList: List[str]
+    terranBuildList: List[str]
+    seed: int = None
+
+
+class MatchResult(NamedTuple):
+    """Outcome of a single match.
+
+    Army counts and completion iterations are -1 if they were never reached.
+    stoppedEarly is set if the early stop policy decided the fight.
+    """
+    winner: Winner
+    playerOneArmyCount: int
+    playerTwoArmyCount: int
+    playerOneCompletedIteration: int
+    playerTwoCompletedIteration: int
+    stoppedEarly: bool = False
+
+
+# Launchers
+# ----------------------------------------
+
+def launchSc2Match(matchup: Matchup, mapName: str, profileDirectory: str = None, earlyStopPolicy: EarlyStopPolicy = DEFAULT_EARLY_STOP_POLICY, taskPlans: Dict[Tuple[str, ...], "TaskPlan"] = None) -> MatchResult:
+    """Play a matchup in a real (non realtime) SC2 game and collect the result.
+
+    This is the default launcher. Any other launcher (e.g. a stub for testing
+    without the SC2 binary) must have the same signature and must be defined
+    at module level so that it can be sent to the worker processes.
+
+    If a profile directory is given both bots write their step profiles there
+    (bind it with functools.partial to use it in runMatchups).
+
+    Task plans (see compileTaskPlans) are looked up by build list, the bots
+    compile the build lists they find none for at on_start.
+
+    The game ends once the early stop policy decides the fight, None plays
+    until an army is eliminated. The loser leaves the game so it ends right
+    away, but every game still starts its own SC2 instance: run_game of the
+    library launches and kills one per call.
+    """
+    # imported here so that stub launchers do not load the bots and the game client
+    from sc2.player import Bot
+    from sc2 import run_game, maps, Race
+    from MatchCoordinator import MatchCoordinator, Player
+    from BuildListProcessBotZerg import BuildListProcessBotZerg
+    from BuildListProcessBotTerran import BuildListProcessBotTerran
+
+    # process id and start time name the profiles, a process may play more than one game
+    profilePathOne = None
+    profilePathTwo = None
+    if profileDirectory is not None:
+        profileName = "profile_" + str(os.getpid()) + "_" + str(time.time_ns())
+        profilePathOne = os.path.join(profileDirectory, profileName + "_ZergOne.json")
+        profilePathTwo = os.path.join(profileDirectory, profileName + "_TerranTwo.json")
+
+    taskPlans = taskPlans or dict()
+    coordinator = MatchCoordinator(earlyStopPolicy)
+    playerOne = BuildListProcessBotZerg(list(matchup.zergBuildList), Player.PLAYER_ONE, coordinator, profilePathOne, taskPlan=taskPlans.get(tuple(matchup.zergBuildList)))
+    playerTwo = BuildListProcessBotTerran(list(matchup.terranBuildList), Player.PLAYER_TWO, coordinator, profilePathTwo, taskPlan=taskPlans.get(tuple(matchup.terranBuildList)))
+
+    run_game(maps.get(mapName), [
+        Bot(Race.Zerg, playerOne, name="ZergOne"),
+        Bot(Race.Terran, playerTwo, name="TerranTwo")
+    ], realtime=False, random_seed=matchup.seed)
+
+    return MatchResult(
+        coordinator.winner,
+        coordinator.playerOneArmyCount,
+        coordinator.playerTwoArmyCount,
+        playerOne.buildListCompletedIteration,
+        playerTwo.buildListCompletedIteration,
+        coordinator.stoppedEarly
+    )
+
+
+# Result cache
+# ----------------------------------------
+
+def resultToDict(result: MatchResult) -> Dict:
+    """Fields of a result as stored in the result cache.
+    """
+    fields = result._asdict()
+    fields["winner"] = result.winner.name
+    return fields
+
+
+def resultFromDict(fields: Dict) -> MatchResult:
+    """Counterpart to resultToDict().
+    """
+    return MatchResult(**dict(fields, winner=Winner[fields["winner"]]))
+
+
+def getLauncherName(launcher: Callable):
+    """Name of a launcher, part of the cache key.
+
+    The arguments bound by a functools.partial (e.g. the early stop policy)
+    are part of the name.
+    """
+    function = getattr(launcher, "func", launcher)
+    name = getattr(function, "__module__", "") + "." + getattr(function, "__name__", type(function).__name__)
+    arguments = [repr(argument) for argument in getattr(launcher, "args", ())]
+    arguments += [key + "=" + repr(value) for key, value in sorted(getattr(launcher, "keywords", {}).items()) if key not in ARGUMENTS_NOT_IN_KEY]
+    if arguments:
+        name += "(" + ", ".join(arguments) + ")"
+    return name
+
+def compileTaskPlans(matchups: List[Matchup]) -> Dict[Tuple[str, ...], "TaskPlan"]:
+    """Compile every build list of a batch once (see compileTaskPlanFromData).
+
+    Bind the result to launchSc2Match with functools.partial so that the
+    worker processes reuse the plans instead of compiling them per match.
+    """
+    from sc2.data import Race
+    from TaskPlan import compileTaskPlanFromData
+
+    taskPlans = dict()
+    for matchup in matchups:
+        for race, buildList in ((Race.Zerg, matchup.zergBuildList), (Race.Terran, matchup.terranBuildList)):
+            if tuple(buildList) not in taskPlans:
+                taskPlans[tuple(buildList)] = compileTaskPlanFromData(race, buildList)
+    return taskPlans
+
+# Running
+# ----------------------------------------
+
+def _runIndexedMatchup(job: Tuple[int, Matchup, Callable[[Matchup, str], MatchResult], str]):
+    """Worker process entry point. Runs one matchup and tags it with its index.
+    """
+    index, matchup, launcher, mapName = job
+    loggerRunner.info("Starting matchup " + str(index))
+    return (index, launcher(matchup, mapName))
+
+
+def validateMatchups(matchups: List[Matchup]):
+    """Check the build lists of all matchups before any game is launched.
+
+    Raises one exception listing every invalid build list.
+    """
+    from sc2.data import Race
+    from BuildListValidator import validateBuildList
+
+    errors: List[str] = list()
+    for index, matchup in enumerate(matchups):
+        for race, buildList in ((Race.Zerg, matchup.zergBuildList), (Race.Terran, matchup.terranBuildList)):
+            for issue in validateBuildList(buildList, race):
+                errors.append("Matchup " + str(index) + " " + race.name + " task " + str(issue.index) + " (" + issue.taskName + "): " + issue.message)
+    if errors:
+        raise Exception("Invalid build lists:\n" + "\n".join(errors))
+
+
+def runMatchups(matchups: List[Matchup], processes: int = 1, launcher: Callable[[Matchup, str], MatchResult] = launchSc2Match, mapName: str = DEFAULT_MAP, validate: bool = True, cache: "ResultCache" = None) -> Iterator[Tuple[int, MatchResult]]:
+    """Run a batch of matchups on a pool of worker processes.
+
+    Every worker process plays one game at a time. Results are yielded as
+    (index into matchups, MatchResult) in the order in which the games finish.
+    All build lists are validated first unless validate is False.
+
+    With a cache, matchups that were played before (same build lists, map,
+    seed, launcher and bot code) are answered from it right away and
+    matchups that occur more than once in the batch are played once.
+    Matchups without a seed are not repeatable and are always played.
+    """
+    if processes < 1:
+        raise Exception("At least one worker process is required! Have: " + str(processes))
+    if validate:
+        validateMatchups(matchups)
+
+    # indices of all matchups by cache key, only the first one of a key is played
+    indicesByKey: Dict[str, List[int]] = dict()
+    keyByIndex: Dict[int, str] = dict()
+    jobs = list()
+    if cache is not None:
+        from ResultCache import computeCodeVersion, computeMatchupKey
+        codeVersion = computeCodeVersion() + "/" + getLauncherName(launcher)
+    for index, matchup in enumerate(matchups):
+        if cache is None or matchup.seed is None:
+            jobs.append((index, matchup, launcher, mapName))
+            continue
+        key = computeMatchupKey(matchup.zergBuildList, matchup.terranBuildList, mapName, codeVersion, matchup.seed)
+        if key in indicesByKey:
+            indicesByKey[key].append(index)
+            continue
+        fields = cache.get(key)
+        if fields is not None:
+            result = resultFromDict(fields)
+            loggerRunner.info("Matchup " + str(index) + " answered from the result cache: " + str(result))
+            yield (index, result)
+            continue
+        indicesByKey[key] = [index]
+        keyByIndex[index] = key
+        jobs.append((index, matchup, launcher, mapName))
+
+    if not jobs:
+        return
+
+    # a fresh process per game: the library keeps state on module level
+    with multiprocessing.Pool(processes=processes, maxtasksperchild=1) as pool:
+        for index, result in pool.imap_unordered(_runIndexedMatchup, jobs):
+            loggerRunner.info("Finished matchup " + str(index) + ": " + str(result))
+            if index not in keyByIndex:
+                yield (index, result)
+                continue
+            cache.put(keyByIndex[index], resultToDict(result))
+            for sameIndex in indicesByKey[keyByIndex[index]]:
+                yield (sameIndex, result)
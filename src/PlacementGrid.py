@@ -0,0 +1,167 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from sc2.position import Point2
+
+# Definitions
+# ----------------------------------------
+
+# free cells kept between structures so that units can always walk around them
+STRUCTURE_SPACING = 1
+
+# structures are searched within this many cells around the anchor before searching the whole map
+SEARCH_RADIUS = 24
+
+# size (width, height) of an addon, it is attached to the right (+x) of its building
+ADDON_SIZE = (2, 2)
+
+# cells kept free around expansion locations and resources when placing structures
+EXPANSION_MARGIN = 3
+RESOURCE_MARGIN = 2
+
+
+def windowSums(grid: np.ndarray, height: int, width: int) -> np.ndarray:
+    """Sum of every height x width window of a 2D array (indexed by its bottom left cell).
+
+    Uses a summed-area table so the cost does not depend on the window size.
+    """
+    table = np.zeros((grid.shape[0] + 1, grid.shape[1] + 1), dtype=np.int32)
+    table[1:, 1:] = grid.astype(np.int32).cumsum(axis=0).cumsum(axis=1)
+    return table[height:, width:] - table[:-height, width:] - table[height:, :-width] + table[:-height, :-width]
+
+# Class
+# ----------------------------------------
+
+class PlacementGrid:
+    """Occupancy bitmap of the map for placing structures.
+
+    Cells are indexed [y, x] like the grids of the library. A structure fits
+    where all cells of its footprint (including the addon footprint for
+    buildings that can have one) are buildable and where no other reserved
+    structure is closer than STRUCTURE_SPACING cells.
+    """
+
+    def __init__(self, buildable: np.ndarray):
+        """Create the grid from a boolean map of buildable cells.
+        """
+        self.buildable = buildable.astype(bool)
+        self.occupied = np.zeros(self.buildable.shape, dtype=bool)
+
+    # Setup
+    # ----------------------------------------
+
+    def block(self, center: Point2, width: float, height: float):
+        """Make a rectangle unbuildable (resources, expansion locations).
+        """
+        left, bottom = self.clip(int(round(center.x - width / 2.0)), int(round(center.y - height / 2.0)))
+        right, top = self.clip(int(round(center.x + width / 2.0)), int(round(center.y + height / 2.0)))
+        self.buildable[bottom:top, left:right] = False
+
+    def blockExpansions(self, expansionLocations: Dict[Point2, List]):
+        """Keep townhall spots and mining paths free.
+
+        expansionLocations maps every expansion location to its resources
+        (like expansion_locations_dict of the bot).
+        """
+        for location, resources in expansionLocations.items():
+            self.block(location, 5 + 2 * EXPANSION_MARGIN, 5 + 2 * EXPANSION_MARGIN)
+            for resource in resources:
+                size = 2 if resource.is_mineral_field else 3
+                height = 1 if resource.is_mineral_field else 3
+                self.block(resource.position, size + 2 * RESOURCE_MARGIN, height + 2 * RESOURCE_MARGIN)
+
+    def clip(self, x: int, y: int):
+        """Clip cell coordinates to the grid (end coordinates may equal the size).
+        """
+        return (min(max(x, 0), self.buildable.shape[1]), min(max(y, 0), self.buildable.shape[0]))
+
+    # Placement
+    # ----------------------------------------
+
+    def footprint(self, size: Tuple[int, int], addon: bool):
+        """Width and height of everything a structure occupies.
+        """
+        width, height = size
+        if addon:
+            width += ADDON_SIZE[0]
+            height = max(height, ADDON_SIZE[1])
+        return (width, height)
+
+    def findPosition(self, size: Tuple[int, int], anchor: Point2, addon: bool = False):
+        """Center of the valid position for a structure that is closest to the anchor.
+
+        size is the (width, height) of the structure itself in cells. Searches
+        the cells around the anchor first and the whole map if nothing fits
+        there. Returns None if the structure does not fit anywhere.
+        """
+        left, bottom = self.clip(int(anchor.x) - SEARCH_RADIUS, int(anchor.y) - SEARCH_RADIUS)
+        right, top = self.clip(int(anchor.x) + SEARCH_RADIUS, int(anchor.y) + SEARCH_RADIUS)
+        position = self.findPositionIn(size, anchor, addon, left, bottom, right, top)
+        if position is None:
+            position = self.findPositionIn(size, anchor, addon, 0, 0, self.buildable.shape[1], self.buildable.shape[0])
+        return position
+
+    def findPositionIn(self, size: Tuple[int, int], anchor: Point2, addon: bool, left: int, bottom: int, right: int, top: int):
+        """findPosition restricted to the cells [bottom:top, left:right].
+        """
+        centersX, centersY = self.validCenters(size, addon, left, bottom, right, top)
+        if len(centersX) == 0:
+            return None
+        closest = np.argmin((centersX - anchor.x) ** 2 + (centersY - anchor.y) ** 2)
+        return Point2((float(centersX[closest]), float(centersY[closest])))
+
+    def candidatePositions(self, size: Tuple[int, int], anchor: Point2, addon: bool = False) -> List[Point2]:
+        """Centers of all valid positions around the anchor, closest first.
+
+        Positions overlap each other, so after reserving one the next one has
+        to be checked with fits.
+        """
+        left, bottom = self.clip(int(anchor.x) - SEARCH_RADIUS, int(anchor.y) - SEARCH_RADIUS)
+        right, top = self.clip(int(anchor.x) + SEARCH_RADIUS, int(anchor.y) + SEARCH_RADIUS)
+        centersX, centersY = self.validCenters(size, addon, left, bottom, right, top)
+        order = np.argsort((centersX - anchor.x) ** 2 + (centersY - anchor.y) ** 2, kind="stable")
+        return [Point2((float(centersX[index]), float(centersY[index]))) for index in order]
+
+    def fits(self, center: Point2, size: Tuple[int, int], addon: bool = False):
+        """Check if a structure centered at center is valid right now.
+        """
+        width, height = self.footprint(size, addon)
+        spacing = STRUCTURE_SPACING
+        left = int(round(center.x - size[0] / 2.0))
+        bottom = int(round(center.y - size[1] / 2.0))
+        if left < 0 or bottom < 0 or left + width > self.buildable.shape[1] or bottom + height > self.buildable.shape[0]:
+            return False
+        if not self.buildable[bottom:bottom + height, left:left + width].all():
+            return False
+        spacingLeft, spacingBottom = self.clip(left - spacing, bottom - spacing)
+        spacingRight, spacingTop = self.clip(left + width + spacing, bottom + height + spacing)
+        return not self.occupied[spacingBottom:spacingTop, spacingLeft:spacingRight].any()
+
+    def validCenters(self, size: Tuple[int, int], addon: bool, left: int, bottom: int, right: int, top: int):
+        """Centers (x and y arrays) of all valid positions within the cells [bottom:top, left:right].
+        """
+        width, height = self.footprint(size, addon)
+        spacing = STRUCTURE_SPACING
+        buildable = self.buildable[bottom:top, left:right]
+        occupied = self.occupied[bottom:top, left:right]
+        gridHeight, gridWidth = buildable.shape
+        if width + 2 * spacing > gridWidth or height + 2 * spacing > gridHeight:
+            return (np.zeros(0), np.zeros(0))
+
+        # the footprint must be buildable and free, the spacing around it only free
+        footprintFree = windowSums(~buildable | occupied, height, width) == 0
+        spacingFree = windowSums(occupied, height + 2 * spacing, width + 2 * spacing) == 0
+        valid = footprintFree[spacing:gridHeight - height - spacing + 1, spacing:gridWidth - width - spacing + 1] & spacingFree
+
+        rows, cols = np.nonzero(valid)
+        # centers of the structure itself (not the addon)
+        return (cols + left + spacing + size[0] / 2.0, rows + bottom + spacing + size[1] / 2.0)
+
+    def reserve(self, center: Point2, size: Tuple[int, int], addon: bool = False):
+        """Mark the footprint of a structure centered at center as occupied.
+        """
+        width, height = self.footprint(size, addon)
+        left, bottom = self.clip(int(round(center.x - size[0] / 2.0)), int(round(center.y - size[1] / 2.0)))
+        right, top = self.clip(left + width, bottom + height)
+        self.occupied[bottom:top, left:right] = True
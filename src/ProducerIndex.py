@@ -0,0 +1,62 @@
+from typing import Dict, Iterable, List, Set
+
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.unit import Unit
+
+# Class
+# ----------------------------------------
+
+class ProducerIndex:
+    """Tags of all own units and structures by type.
+
+    Kept up to date by the unit events of the bot, so finding the producers
+    of a task costs as much as there are units of the producer types instead
+    of a pass over all units. Unit objects change every step, so they are
+    looked up by tag in the map of the current step.
+
+    Only which units exist is tracked, not whether they are busy. Busy
+    state comes from the orders of the current unit objects and the
+    actions of this step (see producerHasFreeSlot).
+    """
+
+    def __init__(self):
+        self.tagsByType: Dict[UnitTypeId, Set[int]] = dict()
+        self.typeByTag: Dict[int, UnitTypeId] = dict()
+        # own units of the current step by tag
+        self.unitsByTag: Dict[int, Unit] = dict()
+        self.unitsByTagLoop = -1
+
+    # Updates
+    # ----------------------------------------
+
+    def add(self, tag: int, typeId: UnitTypeId):
+        """Add a unit or structure (moves it if it is already known with another type).
+        """
+        self.remove(tag)
+        self.typeByTag[tag] = typeId
+        self.tagsByType.setdefault(typeId, set()).add(tag)
+
+    def remove(self, tag: int):
+        """Remove a unit or structure (nothing happens if it is unknown).
+        """
+        if tag in self.typeByTag:
+            self.tagsByType[self.typeByTag.pop(tag)].discard(tag)
+
+    # Lookups
+    # ----------------------------------------
+
+    def refresh(self, gameLoop: int, ownUnits: Iterable[Unit]):
+        """Provide the own units of the current step (only done once per step).
+        """
+        if gameLoop != self.unitsByTagLoop:
+            self.unitsByTag = {unit.tag: unit for unit in ownUnits}
+            self.unitsByTagLoop = gameLoop
+
+    def getUnits(self, typeIds: Iterable[UnitTypeId]) -> List[Unit]:
+        """Current unit objects of all units and structures of the given types.
+
+        Units that are not visible in this step (e.g. workers inside a gas
+        building) are skipped but stay in the index.
+        """
+        unitsByTag = self.unitsByTag
+        return [unitsByTag[tag] for typeId in typeIds for tag in self.tagsByType.get(typeId, ()) if tag in unitsByTag]
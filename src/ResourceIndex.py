@@ -0,0 +1,163 @@
+from enum import Enum
+from typing import Dict, List, NamedTuple, Set
+
+from sc2.position import Point2
+from sc2.units import Units
+from sc2.unit import Unit
+
+# Definitions
+# ----------------------------------------
+
+# a townhall further away than this from every base does not belong to a base
+MAX_TOWNHALL_OFFSET = 6.0
+
+# a geyser ordered longer ago than this is free again (the worker got lost on the way)
+GEYSER_ORDER_TIMEOUT_LOOPS = 1000
+
+class GeyserState(Enum):
+    """Occupancy of a vespene geyser.
+    """
+    FREE = 1,
+    # a worker was sent to build a gas building on it
+    ORDERED = 2,
+    # a gas building exists on it
+    OCCUPIED = 3
+
+
+class GeyserOrder(NamedTuple):
+    """Worker that was sent to build a gas building on a geyser.
+    """
+    workerTag: int
+    orderedLoop: int
+
+# Class
+# ----------------------------------------
+
+class BaseResources:
+    """Mineral fields and vespene geysers of one base.
+    """
+
+    def __init__(self, location: Point2):
+        self.location = location
+        # remaining (not depleted) mineral fields
+        self.mineralTags: Set[int] = set()
+        # geysers by position (geysers are stored as units because build_gas needs one)
+        self.geysers: Dict[Point2, Unit] = dict()
+        self.geyserStates: Dict[Point2, GeyserState] = dict()
+
+
+class ResourceIndex:
+    """Static index of the resources of every base.
+
+    Resources never move so the index is built once at the start from the
+    expansion locations. Lookups by townhall are dictionary hits afterwards.
+    Depletion and geyser occupancy are tracked on top.
+    """
+
+    def __init__(self, expansionResources: Dict[Point2, Units]):
+        """Build the index from expansion_locations_dict.
+        """
+        self.bases: Dict[Point2, BaseResources] = dict()
+        # geyser position -> base
+        self.basesByGeyser: Dict[Point2, BaseResources] = dict()
+        for location, resources in expansionResources.items():
+            base = BaseResources(location)
+            for resource in resources:
+                if resource.is_mineral_field:
+                    base.mineralTags.add(resource.tag)
+                else:
+                    base.geysers[resource.position] = resource
+                    base.geyserStates[resource.position] = GeyserState.FREE
+                    self.basesByGeyser[resource.position] = base
+            self.bases[location] = base
+        # townhall position -> base (filled on first lookup)
+        self.basesByTownhall: Dict[Point2, BaseResources] = dict()
+        # gas building tag -> geyser position
+        self.gasBuildingGeysers: Dict[int, Point2] = dict()
+        # geyser position -> order of the geysers in state ORDERED
+        self.geyserOrders: Dict[Point2, GeyserOrder] = dict()
+        self.mineralFieldCount = sum(len(base.mineralTags) for base in self.bases.values())
+
+    # Lookups
+    # ----------------------------------------
+
+    def getBase(self, townhallPosition: Point2):
+        """Get the base a townhall belongs to (None if it is not at a base).
+        """
+        if townhallPosition not in self.basesByTownhall:
+            closest: BaseResources = None
+            for base in self.bases.values():
+                if closest is None or townhallPosition.distance_to(base.location) < townhallPosition.distance_to(closest.location):
+                    closest = base
+            if closest is not None and townhallPosition.distance_to(closest.location) > MAX_TOWNHALL_OFFSET:
+                closest = None
+            self.basesByTownhall[townhallPosition] = closest
+        return self.basesByTownhall[townhallPosition]
+
+    def getMineralTags(self, townhallPosition: Point2) -> Set[int]:
+        """Tags of the remaining mineral fields at a townhall.
+        """
+        base = self.getBase(townhallPosition)
+        if base is None:
+            return set()
+        return base.mineralTags
+
+    def getFreeGeysers(self, townhallPosition: Point2) -> List[Unit]:
+        """Geysers at a townhall that have no gas building (ordered or built).
+        """
+        base = self.getBase(townhallPosition)
+        if base is None:
+            return []
+        return [geyser for position, geyser in base.geysers.items() if base.geyserStates[position] == GeyserState.FREE]
+
+    # Updates
+    # ----------------------------------------
+
+    def updateDepletion(self, mineralFields: Units):
+        """Remove depleted mineral fields.
+
+        Depleted fields disappear from the mineral field list so nothing needs
+        to be done as long as the number of fields does not change.
+        """
+        if len(mineralFields) == self.mineralFieldCount:
+            return
+        remainingTags = mineralFields.tags
+        for base in self.bases.values():
+            base.mineralTags &= remainingTags
+        self.mineralFieldCount = len(mineralFields)
+
+    def setGeyserOrdered(self, geyser: Unit, workerTag: int, gameLoop: int):
+        """A worker was sent to build a gas building on the geyser.
+        """
+        if geyser.position in self.basesByGeyser:
+            self.basesByGeyser[geyser.position].geyserStates[geyser.position] = GeyserState.ORDERED
+            self.geyserOrders[geyser.position] = GeyserOrder(workerTag, gameLoop)
+
+    def setGeyserOccupied(self, gasBuilding: Unit):
+        """A gas building was started on a geyser.
+        """
+        if gasBuilding.position in self.basesByGeyser:
+            self.basesByGeyser[gasBuilding.position].geyserStates[gasBuilding.position] = GeyserState.OCCUPIED
+            self.gasBuildingGeysers[gasBuilding.tag] = gasBuilding.position
+            self.geyserOrders.pop(gasBuilding.position, None)
+
+    def releaseGeyserOrders(self, gameLoop: int, orderedWorkerTags: Set[int]):
+        """Free ordered geysers on which no gas building will be started.
+
+        That is the case once the order timed out or from the step after the
+        order on if the worker no longer has the order to build a gas building
+        (it died or the order failed). orderedWorkerTags are the workers that
+        have that order.
+        """
+        for position, order in list(self.geyserOrders.items()):
+            timedOut = gameLoop - order.orderedLoop > GEYSER_ORDER_TIMEOUT_LOOPS
+            if timedOut or (gameLoop > order.orderedLoop and order.workerTag not in orderedWorkerTags):
+                del self.geyserOrders[position]
+                self.basesByGeyser[position].geyserStates[position] = GeyserState.FREE
+
+    def gasBuildingDestroyed(self, tag: int):
+        """Free the geyser of a destroyed gas building.
+        """
+        if tag in self.gasBuildingGeysers:
+            position = self.gasBuildingGeysers.pop(tag)
+            self.basesByGeyser[position].geyserStates[position] = GeyserState.FREE
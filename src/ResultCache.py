@@ -0,0 +1,112 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional
+
+from sc2.data import Race
+
+# Definitions
+# ----------------------------------------
+
+# results are stored here, shared by all processes of the user
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "BuildListProcessBot", "results.sqlite")
+
+# results kept before the least recently used ones are evicted
+DEFAULT_MAX_ENTRIES = 100000
+
+# a process waits this long for another process that writes to the cache
+DATABASE_TIMEOUT_SECONDS = 30.0
+
+loggerResultCache = logging.getLogger("ResultCache")
+
+# Keys
+# ----------------------------------------
+
+def computeCodeVersion():
+    """Hash of the bot sources and data files, results of older code are not reused.
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for fileName in sorted(os.listdir(directory)):
+        if fileName.endswith(".py") or fileName.endswith(".json"):
+            with open(os.path.join(directory, fileName), "rb") as file:
+                digest.update(fileName.encode("utf-8"))
+                digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+
+def computeMatchupKey(zergBuildList: List[str], terranBuildList: List[str], mapName: str, codeVersion: str, seed: int):
+    """Content address of a match.
+
+    The build lists are used as they are: the order of the tasks decides
+    which task gets its costs reserved first, so reordered lists are
+    different matches.
+    """
+    if seed is None:
+        raise Exception("Only matches with a seed are repeatable and can be cached!")
+    content = {
+        "races": [Race.Zerg.name, Race.Terran.name],
+        "zerg": list(zergBuildList),
+        "terran": list(terranBuildList),
+        "map": mapName,
+        "code": codeVersion,
+        "seed": seed
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+# Class
+# ----------------------------------------
+
+class ResultCache:
+    """Match results by content address, stored in an SQLite file.
+
+    Any number of processes can use the same file. Once there are more than
+    maxEntries results the least recently used ones are evicted.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, maxEntries: int = DEFAULT_MAX_ENTRIES):
+        if maxEntries < 1:
+            raise Exception("The cache must hold at least one result! Have: " + str(maxEntries))
+        self.path = path
+        self.maxEntries = maxEntries
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=DATABASE_TIMEOUT_SECONDS)
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result TEXT NOT NULL, lastUsed REAL NOT NULL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS resultsLastUsed ON results (lastUsed)")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Stored result fields of a key (None if the key is unknown).
+        """
+        row = self.connection.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        with self.connection:
+            self.connection.execute("UPDATE results SET lastUsed = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key: str, result: Dict):
+        """Store the result fields of a key and evict the least recently used results.
+        """
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO results (key, result, lastUsed) VALUES (?, ?, ?)", (key, json.dumps(result), time.time()))
+            self.connection.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY lastUsed DESC LIMIT -1 OFFSET ?)",
+                (self.maxEntries,)
+            )
+
+    def close(self):
+        """Close the database and log how often the cache helped.
+        """
+        loggerResultCache.info("Result cache hits: " + str(self.hits) + ", misses: " + str(self.misses))
+        self.connection.close()
+
@@ -0,0 +1,153 @@
+import functools
+import inspect
+import json
+import logging
+import math
+import time
+from collections import Counter
+from typing import Dict, List
+
+# Definitions
+# ----------------------------------------
+
+# neighbouring histogram buckets differ by this factor (about 2.5% precision)
+BUCKET_GROWTH = 1.05
+LOG_BUCKET_GROWTH = math.log(BUCKET_GROWTH)
+
+loggerProfiler = logging.getLogger("StepProfiler")
+
+# Class
+# ----------------------------------------
+
+class SectionHistogram:
+    """Latency histogram of one section with logarithmic buckets.
+
+    Memory does not grow with the number of samples. Percentiles are exact
+    up to the bucket width, the maximum is exact.
+    """
+
+    def __init__(self):
+        self.buckets: Counter = Counter()
+        self.count = 0
+        self.totalNs = 0
+        self.maxNs = 0
+
+    def add(self, durationNs: int):
+        """Add one sample in nanoseconds.
+        """
+        self.buckets[int(math.log(durationNs) / LOG_BUCKET_GROWTH) if durationNs > 0 else 0] += 1
+        self.count += 1
+        self.totalNs += durationNs
+        if durationNs > self.maxNs:
+            self.maxNs = durationNs
+
+    def bucketUpperBoundNs(self, bucket: int):
+        """Largest duration that falls into a bucket.
+        """
+        return BUCKET_GROWTH ** (bucket + 1)
+
+    def percentileNs(self, percentile: float):
+        """Duration below which the given percentage of samples lies.
+        """
+        if self.count == 0:
+            return 0
+        threshold = self.count * percentile / 100.0
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= threshold:
+                return min(self.bucketUpperBoundNs(bucket), self.maxNs)
+        return self.maxNs
+
+    def summary(self):
+        """Summary in microseconds, ready for JSON.
+        """
+        return {
+            "count": self.count,
+            "p50_us": self.percentileNs(50) / 1000.0,
+            "p95_us": self.percentileNs(95) / 1000.0,
+            "max_us": self.maxNs / 1000.0,
+            "total_ms": self.totalNs / 1000000.0,
+            "histogram_us": {
+                str(round(self.bucketUpperBoundNs(bucket) / 1000.0, 3)): self.buckets[bucket]
+                for bucket in sorted(self.buckets)
+            }
+        }
+
+
+class StepProfiler:
+    """Times sections of a bot's on_step pipeline.
+
+    Sections are methods of the bot. instrument() replaces them on the bot
+    instance with timing wrappers, so a bot that is never instrumented runs
+    the original methods and pays nothing.
+
+    A section may be called many times in one step (e.g. checkPreconditions
+    once per task). Its calls are summed until the outermost timed call
+    (on_step) returns and then recorded as one sample per step.
+    """
+
+    def __init__(self):
+        self.sections: Dict[str, SectionHistogram] = dict()
+        # time spent in every section during the current step
+        self.stepTotals: Dict[str, int] = dict()
+        # number of timed calls that are running (0 between steps)
+        self.depth = 0
+
+    def instrument(self, bot, sectionNames: List[str]):
+        """Wrap the given methods of the bot (missing ones are skipped).
+        """
+        for sectionName in sectionNames:
+            method = getattr(bot, sectionName, None)
+            if method is None:
+                continue
+            self.sections.setdefault(sectionName, SectionHistogram())
+            setattr(bot, sectionName, self.wrap(method, sectionName))
+
+    def wrap(self, method, sectionName: str):
+        """Create a timing wrapper for a bound method (sync or async).
+        """
+        clock = time.perf_counter_ns
+
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def timedCoroutine(*args, **kwargs):
+                self.depth += 1
+                start = clock()
+                try:
+                    return await method(*args, **kwargs)
+                finally:
+                    self.addCall(sectionName, clock() - start)
+            return timedCoroutine
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            self.depth += 1
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.addCall(sectionName, clock() - start)
+        return timed
+
+    def addCall(self, sectionName: str, durationNs: int):
+        """Add the duration of one call to the current step, record the step once the outermost call is done.
+        """
+        self.stepTotals[sectionName] = self.stepTotals.get(sectionName, 0) + durationNs
+        self.depth -= 1
+        if self.depth == 0:
+            for stepSection, totalNs in self.stepTotals.items():
+                self.sections[stepSection].add(totalNs)
+            self.stepTotals.clear()
+
+    def summary(self):
+        """Summaries of all sections.
+        """
+        return {sectionName: histogram.summary() for sectionName, histogram in self.sections.items()}
+
+    def dump(self, path: str):
+        """Write the summaries of all sections to a JSON file.
+        """
+        with open(path, "w") as profileFile:
+            json.dump({"sections": self.summary()}, profileFile, indent=2)
+        loggerProfiler.info("Wrote step profile to " + path)
@@ -0,0 +1,126 @@
+import logging
+from typing import FrozenSet, List, NamedTuple, Tuple
+
+import sc2
+from sc2.data import Race, race_worker
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.constants import (
+    IS_STRUCTURE,
+    EQUIVALENTS_FOR_TECH_PROGRESS
+)
+from BuildListProcessorDicts import (
+    CONVERT_TO_ID,
+    PRODUCTION_DATA
+)
+from GameDefinitions import (
+    DEFAULT_LOOKAHEAD_DEPTH,
+    getTaskProducerIds,
+    race_techRequirement
+)
+
+# Definitions
+# ----------------------------------------
+
+loggerPlan = logging.getLogger("TaskPlan")
+
+
+class PlannedTask(NamedTuple):
+    """Everything the precondition checks need to know about one build list task.
+
+    requirement is NOTAUNIT if the task has no tech requirement.
+    """
+    name: str
+    unitId: UnitTypeId
+    minerals: int
+    vespene: int
+    supply: float
+    producerIds: FrozenSet[UnitTypeId]
+    requirement: UnitTypeId
+    requirementEquivalents: FrozenSet[UnitTypeId]
+    isStructure: bool
+    builtByWorker: bool
+
+
+# an immutable sequence of tasks in build list order
+TaskPlan = Tuple[PlannedTask, ...]
+
+
+# Compiling
+# ----------------------------------------
+
+def compileTask(bot: sc2.BotAI, taskName: str) -> PlannedTask:
+    """Look up costs, producers and tech requirement of a single task.
+
+    Needs a bot that is already in a game because costs come from the game data.
+    """
+    if taskName not in CONVERT_TO_ID:
+        raise Exception(taskName + " is not available in CONVERT_TO_ID!")
+    unitId: UnitTypeId = CONVERT_TO_ID[taskName]
+
+    cost = bot.calculate_cost(unitId)
+    producerIds = frozenset(getTaskProducerIds(unitId))
+
+    requirement = race_techRequirement[bot.race][unitId]
+    requirementEquivalents = {requirement}
+    for equiv_structure in EQUIVALENTS_FOR_TECH_PROGRESS.get(requirement, []):
+        requirementEquivalents.add(equiv_structure)
+
+    return PlannedTask(
+        taskName,
+        unitId,
+        cost.minerals,
+        cost.vespene,
+        bot.calculate_supply_cost(unitId),
+        producerIds,
+        requirement,
+        frozenset(requirementEquivalents),
+        IS_STRUCTURE in bot.game_data.units[unitId.value].attributes,
+        race_worker[bot.race] in producerIds
+    )
+
+
+def compileTaskPlan(bot: sc2.BotAI, buildList: List[str]) -> TaskPlan:
+    """Compile a build list into a task plan (once per match at on_start).
+    """
+    plan = tuple(compileTask(bot, taskName) for taskName in buildList)
+    loggerPlan.info("Compiled task plan with " + str(len(buildList)) + " tasks for " + str(bot.race))
+    return plan
+
+
+def compileTaskFromData(race: Race, taskName: str) -> PlannedTask:
+    """Like compileTask, but with costs from PRODUCTION_DATA instead of the game data.
+    """
+    if taskName not in CONVERT_TO_ID:
+        raise Exception(taskName + " is not available in CONVERT_TO_ID!")
+    unitId: UnitTypeId = CONVERT_TO_ID[taskName]
+    if unitId not in PRODUCTION_DATA:
+        raise Exception(taskName + " is not available in PRODUCTION_DATA!")
+    data = PRODUCTION_DATA[unitId]
+    producerIds = frozenset(getTaskProducerIds(unitId))
+
+    requirement = race_techRequirement[race][unitId]
+    requirementEquivalents = {requirement}
+    for equiv_structure in EQUIVALENTS_FOR_TECH_PROGRESS.get(requirement, []):
+        requirementEquivalents.add(equiv_structure)
+
+    return PlannedTask(
+        taskName,
+        unitId,
+        data.minerals,
+        data.vespene,
+        data.supply,
+        producerIds,
+        requirement,
+        frozenset(requirementEquivalents),
+        data.isStructure,
+        race_worker[race] in producerIds
+    )
+
+
+def compileTaskPlanFromData(race: Race, buildList: List[str]) -> TaskPlan:
+    """Compile a build list without a game, e.g. once per batch of matches.
+
+    The plan is a tuple of named tuples and can be sent to worker processes
+    and given to any number of bots (see the taskPlan of the bots).
+    """
+    return tuple(compileTaskFromData(race, taskName) for taskName in buildList)
@@ -0,0 +1,94 @@
+import json
+import logging
+import os
+
+import sc2
+from sc2.constants import IS_STRUCTURE
+from BuildListProcessorDicts import (
+    CONVERT_TO_ID,
+    PRODUCTION_DATA,
+    UNIT_DATA_PATH,
+    productionDataFromTable
+)
+from GameDefinitions import GAME_LOOPS_PER_SECOND
+
+# Definitions
+# ----------------------------------------
+
+# bump when the fields of a unit change, tables with another layout are generated again
+UNIT_DATA_LAYOUT = 1
+
+loggerUnitData = logging.getLogger("UnitDataTable")
+
+# Generating
+# ----------------------------------------
+
+def generateUnitDataTable(bot: sc2.BotAI, dataVersion: str) -> dict:
+    """Pull the production data of every build list unit from the game data of a bot in a game.
+
+    Costs and supply are the ones needed to start the unit, like
+    calculate_cost and calculate_supply_cost of the bot (morphs only cost
+    the difference, zerglings come in pairs).
+    """
+    units = dict()
+    for unitId in set(CONVERT_TO_ID.values()):
+        unitTypeData = bot.game_data.units.get(unitId.value)
+        if unitTypeData is None or unitTypeData.creation_ability is None:
+            continue
+        cost = bot.calculate_cost(unitId)
+        units[unitId.name] = {
+            "minerals": cost.minerals,
+            "vespene": cost.vespene,
+            "supply": bot.calculate_supply_cost(unitId),
+            "buildTime": round(unitTypeData.cost.time / GAME_LOOPS_PER_SECOND, 2),
+            "supplyProvided": int(unitTypeData._proto.food_provided),
+            "isStructure": IS_STRUCTURE in unitTypeData.attributes
+        }
+    return {"layout": UNIT_DATA_LAYOUT, "dataVersion": dataVersion, "units": units}
+
+
+def writeUnitDataTable(table: dict, path: str = UNIT_DATA_PATH):
+    """Write a table. Other processes may read it at the same time, so it is replaced at once.
+    """
+    temporaryPath = path + "." + str(os.getpid()) + ".tmp"
+    with open(temporaryPath, "w") as file:
+        json.dump(table, file, indent=1, sort_keys=True)
+        file.write("\n")
+    os.replace(temporaryPath, path)
+    loggerUnitData.info("Wrote unit data table with " + str(len(table["units"])) + " units to " + path)
+
+# Loading
+# ----------------------------------------
+
+def loadUnitDataTable(path: str = UNIT_DATA_PATH):
+    """Read a table (None if there is none or it has another layout).
+    """
+    try:
+        with open(path, "r") as file:
+            table = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if table.get("layout") != UNIT_DATA_LAYOUT:
+        return None
+    return table
+
+
+async def ensureUnitDataTable(bot: sc2.BotAI, path: str = UNIT_DATA_PATH):
+    """Generate the table again if it was not generated from the data version of the running game.
+
+    PRODUCTION_DATA is updated in place, so the bots of this process use
+    the new values right away. Other processes read the table on their
+    next start.
+    """
+    dataVersion = (await bot.client.ping()).ping.data_version
+    table = loadUnitDataTable(path)
+    if table is not None and table["dataVersion"] == dataVersion:
+        return
+    loggerUnitData.info("Unit data table is not from data version " + dataVersion + ", generating it again")
+    table = generateUnitDataTable(bot, dataVersion)
+    try:
+        writeUnitDataTable(table, path)
+    except OSError as error:
+        loggerUnitData.warning("Could not store the unit data table in " + path + ": " + str(error))
+    PRODUCTION_DATA.clear()
+    PRODUCTION_DATA.update(productionDataFromTable(table))
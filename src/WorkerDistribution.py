@@ -0,0 +1,80 @@
+from typing import List, Tuple
+
+import numpy as np
+
+# scipy is optional, without it workers are assigned greedily
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+# Definitions
+# ----------------------------------------
+
+# workers and mineral fields closer than this belong to a townhall/gas building
+SITE_RADIUS = 10.0
+
+
+# Functions
+# ----------------------------------------
+
+def distanceMatrix(points: np.ndarray, sites: np.ndarray) -> np.ndarray:
+    """Euclidean distances between every point (rows) and every site (columns).
+
+    Both arguments are arrays of shape (n, 2).
+    """
+    if len(points) == 0 or len(sites) == 0:
+        return np.zeros((len(points), len(sites)))
+    difference = points[:, np.newaxis, :] - sites[np.newaxis, :, :]
+    return np.sqrt(np.einsum("ijk,ijk->ij", difference, difference))
+
+
+def minCostAssignment(distances: np.ndarray, capacities: np.ndarray) -> List[Tuple[int, int]]:
+    """Assign rows (workers) to columns (sites) minimizing the total distance.
+
+    Every column can take as many rows as its capacity. Rows that do not fit
+    stay unassigned. Returns (row, column) pairs. Falls back to
+    greedyAssignment if scipy is not installed.
+    """
+    capacities = np.maximum(capacities, 0)
+    if distances.size == 0 or capacities.sum() == 0:
+        return []
+    if linear_sum_assignment is None:
+        return greedyAssignment(distances, capacities)
+    # one column per free slot so that the assignment is one to one
+    slotColumns = np.repeat(np.arange(len(capacities)), capacities)
+    rows, slots = linear_sum_assignment(distances[:, slotColumns])
+    return list(zip(rows.tolist(), slotColumns[slots].tolist()))
+
+
+def greedyAssignment(distances: np.ndarray, capacities: np.ndarray) -> List[Tuple[int, int]]:
+    """Assign rows to columns shortest distance first (see minCostAssignment).
+
+    Not optimal, but every column still gets at most its capacity and no
+    row is assigned twice.
+    """
+    capacities = np.maximum(capacities, 0).copy()
+    assignedRows = np.zeros(len(distances), dtype=bool)
+    assignment: List[Tuple[int, int]] = []
+    remaining = min(len(distances), int(capacities.sum()))
+    for flatIndex in np.argsort(distances, axis=None, kind="stable"):
+        if len(assignment) == remaining:
+            break
+        row, column = divmod(int(flatIndex), distances.shape[1])
+        if assignedRows[row] or capacities[column] == 0:
+            continue
+        assignedRows[row] = True
+        capacities[column] -= 1
+        assignment.append((row, column))
+    return assignment
+
+
+def closestPerRow(distances: np.ndarray, allowed: np.ndarray) -> np.ndarray:
+    """Index of the closest allowed column for every row (-1 if none is allowed).
+    """
+    if distances.shape[1] == 0:
+        return np.full(len(distances), -1)
+    masked = np.where(allowed, distances, np.inf)
+    result = np.argmin(masked, axis=1)
+    result[~np.isfinite(masked[np.arange(len(masked)), result])] = -1
+    return result